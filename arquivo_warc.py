@@ -0,0 +1,276 @@
+import base64
+import glob
+import gzip
+import hashlib
+import logging
+import os
+import platform
+import queue
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+# ==============================================================================
+# GRAVAÇÃO DAS RESPOSTAS EM ARQUIVOS WARC
+#
+# Com "gravar_warc" na configuração, cada resposta baixada (requisição e
+# resposta, cabeçalhos e corpo) vai para arquivos .warc.gz no formato WARC 1.1,
+# o mesmo dos arquivos da web, com um membro gzip por registro. Assim dá para
+# testar uma regra nova de extração ou investigar um magnet perdido sem baixar
+# o site de novo.
+#
+# Os workers só colocam a resposta em uma fila; uma thread separada monta os
+# registros, comprime e grava. Cada arquivo (segmento) é fechado ao passar de
+# tamanho_segmento_mb e o próximo é aberto; enquanto está sendo escrito ele se
+# chama .warc.gz.open, então um leitor nunca pega um segmento pela metade.
+#
+# O requests entrega o corpo já descompactado: ele é gravado assim, sem os
+# cabeçalhos Content-Encoding/Transfer-Encoding originais (guardados como
+# X-Original-Content-Encoding), com o Content-Length do corpo gravado.
+#
+# ler_respostas() lê de volta as respostas de um .warc.gz (deste gravador ou
+# de outras ferramentas, como wget --warc-file) para o reprocessamento offline
+# (crawler_profissional.py --reprocessar).
+# ==============================================================================
+
+CABECALHOS_REESCRITOS = ('content-encoding', 'transfer-encoding', 'content-length')
+
+
+def _data_warc(instante):
+    return datetime.fromtimestamp(instante, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _digest(dados):
+    return 'sha1:' + base64.b32encode(hashlib.sha1(dados).digest()).decode('ascii')
+
+
+def _versao_http(resposta):
+    versao = getattr(resposta.raw, 'version', 11)
+    return {10: 'HTTP/1.0', 20: 'HTTP/2'}.get(versao, 'HTTP/1.1')
+
+
+def _cabecalhos_resposta(resposta):
+    brutos = getattr(resposta.raw, 'headers', None)
+    return list(brutos.items()) if brutos is not None else list(resposta.headers.items())
+
+
+def _ler_cabecalhos(linhas):
+    cabecalhos = {}
+    for linha in linhas:
+        nome, separador, valor = linha.partition(':')
+        if separador:
+            cabecalhos[nome.strip().lower()] = valor.strip()
+    return cabecalhos
+
+
+def _juntar_pedacos(corpo):
+    """Corpo com Transfer-Encoding: chunked (gravado assim por outras ferramentas) em um só bloco."""
+    partes, posicao = [], 0
+    while True:
+        fim_linha = corpo.find(b'\r\n', posicao)
+        if fim_linha < 0:
+            break
+        tamanho = int(corpo[posicao:fim_linha].split(b';')[0] or b'0', 16)
+        if tamanho == 0:
+            break
+        partes.append(corpo[fim_linha + 2:fim_linha + 2 + tamanho])
+        posicao = fim_linha + 2 + tamanho + 2
+    return b''.join(partes)
+
+
+def _decodificar_corpo(corpo, cabecalhos):
+    if 'chunked' in cabecalhos.get('transfer-encoding', '').lower():
+        corpo = _juntar_pedacos(corpo)
+    codificacao = cabecalhos.get('content-encoding', '').lower()
+    if codificacao in ('gzip', 'x-gzip', 'deflate'):
+        # wbits 47 aceita gzip e zlib; deflate "cru" (sem cabeçalho) precisa de -15
+        try:
+            corpo = zlib.decompress(corpo, 47)
+        except zlib.error:
+            corpo = zlib.decompress(corpo, -zlib.MAX_WBITS)
+    return corpo
+
+
+def arquivos_warc(caminhos):
+    """Arquivos .warc.gz / .warc dos caminhos (pastas são expandidas; segmentos .open ficam de fora).
+
+    Caminhos que não existem são avisados no log e ignorados.
+    """
+    arquivos = []
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            arquivos += sorted(glob.glob(os.path.join(caminho, '*.warc.gz')) + glob.glob(os.path.join(caminho, '*.warc')))
+        elif os.path.isfile(caminho):
+            arquivos.append(caminho)
+        else:
+            logging.warning(f"⚠️ {caminho} não existe, ignorado.")
+    return arquivos
+
+
+def ler_respostas(caminho):
+    """Gera (url, instante, status, cabeçalhos, corpo) de cada resposta HTTP gravada no arquivo WARC.
+
+    Os cabeçalhos vêm em um dict com nomes minúsculos e o corpo já sem chunked/gzip.
+    """
+    abrir = gzip.open if caminho.endswith('.gz') else open
+    with abrir(caminho, 'rb') as f:
+        while True:
+            linha = f.readline()
+            if not linha:
+                return
+            if not linha.strip():
+                continue
+            if not linha.startswith(b'WARC/'):
+                raise ValueError(f"Registro WARC inválido em {caminho}: {linha[:40]!r}")
+            linhas = []
+            while True:
+                linha = f.readline()
+                if not linha.strip():
+                    break
+                linhas.append(linha.decode('utf-8', errors='replace'))
+            campos = _ler_cabecalhos(linhas)
+            bloco = f.read(int(campos.get('content-length', 0)))
+
+            if (campos.get('warc-type') != 'response'
+                    or not campos.get('content-type', '').startswith('application/http')):
+                continue
+            cabecalho_http, _, corpo = bloco.partition(b'\r\n\r\n')
+            linhas = cabecalho_http.decode('latin-1').split('\r\n')
+            try:
+                status = int(linhas[0].split(' ', 2)[1])
+            except (IndexError, ValueError):
+                logging.warning(f"⚠️ Resposta sem linha de status em {caminho}: {campos.get('warc-target-uri')}")
+                continue
+            cabecalhos = _ler_cabecalhos(linhas[1:])
+            try:
+                corpo = _decodificar_corpo(corpo, cabecalhos)
+            except (ValueError, zlib.error) as e:
+                logging.warning(f"⚠️ Corpo ilegível em {caminho} ({campos.get('warc-target-uri')}): {e}")
+                continue
+            data = campos.get('warc-date', '')
+            try:
+                instante = datetime.strptime(data[:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+            except ValueError:
+                instante = None
+            yield campos.get('warc-target-uri', '').strip('<>'), instante, status, cabecalhos, corpo
+
+
+class GravadorWARC:
+    """Grava requisições e respostas em segmentos .warc.gz por uma thread em segundo plano."""
+
+    def __init__(self, pasta='warc', prefixo='crawler', tamanho_segmento_mb=100, max_pendentes=1000,
+                 nivel_compressao=6):
+        self.pasta = pasta
+        self.prefixo = prefixo
+        self.tamanho_segmento = tamanho_segmento_mb * 1024 * 1024
+        self.nivel_compressao = nivel_compressao
+        os.makedirs(pasta, exist_ok=True)
+
+        # Fila limitada: se o disco não der conta, os workers esperam em vez de acumular páginas na memória
+        self.fila = queue.Queue(maxsize=max_pendentes)
+        self.arquivo = None
+        self.caminho_atual = None
+        self.segmentos = 0
+        self.registros = 0
+        self.bytes_gravados = 0
+        self.thread = threading.Thread(target=self._gravar_fila, name='GravadorWARC', daemon=True)
+        self.thread.start()
+
+    # --- CHAMADO PELOS WORKERS ---
+
+    def gravar(self, resposta):
+        """Enfileira uma resposta do requests (com o corpo já lido) para ser gravada."""
+        requisicao = resposta.request
+        self.fila.put((
+            time.time(), resposta.url,
+            requisicao.method, requisicao.path_url, list(requisicao.headers.items()),
+            _versao_http(resposta), resposta.status_code, resposta.reason or '',
+            _cabecalhos_resposta(resposta), resposta.content,
+        ))
+
+    def fechar(self):
+        """Grava o que falta na fila e fecha o segmento atual."""
+        self.fila.put(None)
+        self.thread.join()
+
+    def resumo(self):
+        return (f"{self.registros} respostas gravadas em {self.segmentos} segmentos WARC "
+                f"({self.bytes_gravados / (1024 * 1024):.1f} MB) em {self.pasta}")
+
+    # --- THREAD DE GRAVAÇÃO ---
+
+    def _gravar_fila(self):
+        while True:
+            item = self.fila.get()
+            if item is None:
+                break
+            try:
+                self._gravar_troca(*item)
+            except Exception as e:
+                # A thread não pode morrer: com a fila cheia os workers ficariam parados em gravar()
+                logging.error(f"❌ Falha ao gravar WARC de {item[1]}: {e}")
+        self._fechar_segmento()
+
+    def _gravar_troca(self, instante, url, metodo, caminho, cabecalhos_req, versao, status, motivo,
+                      cabecalhos_resp, corpo):
+        if self.arquivo is None or self.arquivo.tell() >= self.tamanho_segmento:
+            self._fechar_segmento()
+            self._abrir_segmento()
+
+        data = _data_warc(instante)
+        id_resposta = f"<urn:uuid:{uuid.uuid4()}>"
+
+        linhas = [f"{metodo} {caminho} HTTP/1.1"] + [f"{nome}: {valor}" for nome, valor in cabecalhos_req]
+        bloco_req = ('\r\n'.join(linhas) + '\r\n\r\n').encode('latin-1', errors='replace')
+
+        linhas = [f"{versao} {status} {motivo}"]
+        for nome, valor in cabecalhos_resp:
+            if nome.lower() in CABECALHOS_REESCRITOS:
+                if nome.lower() == 'content-encoding':
+                    linhas.append(f"X-Original-Content-Encoding: {valor}")
+                continue
+            linhas.append(f"{nome}: {valor}")
+        linhas.append(f"Content-Length: {len(corpo)}")
+        bloco_resp = ('\r\n'.join(linhas) + '\r\n\r\n').encode('latin-1', errors='replace') + corpo
+
+        self._escrever('response', bloco_resp, 'application/http;msgtype=response', {
+            'WARC-Record-ID': id_resposta, 'WARC-Date': data, 'WARC-Target-URI': url,
+            'WARC-Payload-Digest': _digest(corpo),
+        })
+        self._escrever('request', bloco_req, 'application/http;msgtype=request', {
+            'WARC-Record-ID': f"<urn:uuid:{uuid.uuid4()}>", 'WARC-Date': data, 'WARC-Target-URI': url,
+            'WARC-Concurrent-To': id_resposta,
+        })
+        self.registros += 1
+
+    def _escrever(self, tipo, bloco, content_type, campos):
+        cabecalho = ["WARC/1.1", f"WARC-Type: {tipo}"]
+        cabecalho += [f"{nome}: {valor}" for nome, valor in campos.items()]
+        cabecalho += [f"Content-Type: {content_type}", f"WARC-Block-Digest: {_digest(bloco)}",
+                      f"Content-Length: {len(bloco)}"]
+        registro = ('\r\n'.join(cabecalho) + '\r\n\r\n').encode('utf-8') + bloco + b'\r\n\r\n'
+        # Um membro gzip por registro: leitores podem pular direto para qualquer registro
+        compressor = zlib.compressobj(self.nivel_compressao, zlib.DEFLATED, 31)
+        dados = compressor.compress(registro) + compressor.flush()
+        self.arquivo.write(dados)
+        self.bytes_gravados += len(dados)
+
+    def _abrir_segmento(self):
+        self.segmentos += 1
+        nome = f"{self.prefixo}-{time.strftime('%Y%m%d%H%M%S')}-{self.segmentos:05d}-{os.getpid()}.warc.gz"
+        self.caminho_atual = os.path.join(self.pasta, nome)
+        self.arquivo = open(self.caminho_atual + '.open', 'wb')
+        info = f"software: crawler_profissional\r\nformat: WARC File Format 1.1\r\nhostname: {platform.node()}\r\n"
+        self._escrever('warcinfo', info.encode('utf-8'), 'application/warc-fields', {
+            'WARC-Record-ID': f"<urn:uuid:{uuid.uuid4()}>", 'WARC-Date': _data_warc(time.time()),
+            'WARC-Filename': nome,
+        })
+
+    def _fechar_segmento(self):
+        if self.arquivo is None:
+            return
+        self.arquivo.close()
+        os.replace(self.caminho_atual + '.open', self.caminho_atual)
+        self.arquivo = None
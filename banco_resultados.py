@@ -0,0 +1,414 @@
+import csv
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from parser_magnet import analisar_magnet, mesclar_magnets
+
+# ==============================================================================
+# BANCO DE RESULTADOS (SQLite)
+#
+# Um único arquivo indexado com todos os magnets já vistos, por infohash:
+# nome, tamanho, categoria, site e URL onde foi visto pela primeira vez, e
+# quando foi visto pela primeira/última vez. Os crawlers gravam em lotes
+# (uma transação por lote, modo WAL) e os arquivos .txt/.csv de sempre passam
+# a ser gerados a partir de consultas baratas sobre este banco.
+#
+# O mesmo torrent publicado em vários sites (com trackers ou 'dn' diferentes) é
+# UMA linha: o link guardado acumula os trackers de todas as versões vistas, e
+# cada página onde ele apareceu fica na tabela fontes.
+#
+# Uso direto:
+#   python banco_resultados.py                     # resumo por site/categoria
+#   python banco_resultados.py --txt todos.txt     # exporta todos os links
+#   python banco_resultados.py --csv todos.csv --site www.exemplo.com
+#   python banco_resultados.py --fontes <hash>      # onde um magnet foi visto
+#   python banco_resultados.py --falhas             # páginas que falharam na última execução
+# ==============================================================================
+
+ARQUIVO_BANCO = "resultados.db"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS magnets (
+    infohash     BLOB PRIMARY KEY,
+    uri          TEXT NOT NULL,
+    nome         TEXT,
+    tamanho      INTEGER,
+    categoria    TEXT,
+    site         TEXT,
+    url_origem   TEXT,
+    primeira_vez REAL NOT NULL,
+    ultima_vez   REAL NOT NULL,
+    exportado    INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_magnets_site ON magnets (site, primeira_vez);
+CREATE INDEX IF NOT EXISTS idx_magnets_primeira_vez ON magnets (primeira_vez);
+CREATE INDEX IF NOT EXISTS idx_magnets_ultima_vez ON magnets (ultima_vez);
+CREATE INDEX IF NOT EXISTS idx_magnets_categoria ON magnets (categoria);
+CREATE INDEX IF NOT EXISTS idx_magnets_pendentes ON magnets (primeira_vez) WHERE exportado = 0;
+CREATE TABLE IF NOT EXISTS fontes (
+    infohash     BLOB NOT NULL,
+    url_origem   TEXT NOT NULL,
+    site         TEXT,
+    primeira_vez REAL NOT NULL,
+    PRIMARY KEY (infohash, url_origem)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_fontes_site ON fontes (site);
+CREATE TABLE IF NOT EXISTS falhas (
+    url        TEXT PRIMARY KEY,
+    site       TEXT,
+    tentativas INTEGER NOT NULL,
+    erro       TEXT,
+    quando     REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_falhas_site ON falhas (site);
+CREATE TABLE IF NOT EXISTS padroes_url (
+    site    TEXT NOT NULL,
+    padrao  TEXT NOT NULL,
+    visitas REAL NOT NULL,
+    magnets REAL NOT NULL,
+    PRIMARY KEY (site, padrao)
+) WITHOUT ROWID;
+"""
+
+# Um magnet já conhecido só atualiza a última vez em que foi visto e o link
+# (que chega já mesclado com o anterior, ver _gravar_lote); o que se soube dele
+# na primeira vez (site, URL de origem) é preservado.
+UPSERT = """
+INSERT INTO magnets (infohash, uri, nome, tamanho, categoria, site, url_origem, primeira_vez, ultima_vez, exportado)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (infohash) DO UPDATE SET
+    uri = excluded.uri,
+    ultima_vez = max(magnets.ultima_vez, excluded.ultima_vez),
+    nome = coalesce(magnets.nome, excluded.nome),
+    tamanho = coalesce(magnets.tamanho, excluded.tamanho),
+    categoria = coalesce(magnets.categoria, excluded.categoria)
+"""
+
+INSERIR_FONTE = """
+INSERT INTO fontes (infohash, url_origem, site, primeira_vez) VALUES (?, ?, ?, ?)
+ON CONFLICT (infohash, url_origem) DO NOTHING
+"""
+
+# Limite seguro de parâmetros por consulta (SQLite antigo aceita até 999).
+PARAMETROS_POR_CONSULTA = 900
+
+# Colunas disponíveis para as exportações em CSV.
+COLUNAS = {
+    'hash': "hex(infohash)",
+    'nome': "coalesce(nome, 'Sem nome')",
+    'tamanho': "coalesce(tamanho, 'N/A')",
+    'categoria': "coalesce(categoria, '')",
+    'site': "coalesce(site, '')",
+    'url_origem': "coalesce(url_origem, '')",
+    'fontes': "(SELECT count(*) FROM fontes f WHERE f.infohash = magnets.infohash)",
+    'sites': "coalesce((SELECT group_concat(DISTINCT f.site) FROM fontes f WHERE f.infohash = magnets.infohash), '')",
+    'primeira_vez': "datetime(primeira_vez, 'unixepoch', 'localtime')",
+    'ultima_vez': "datetime(ultima_vez, 'unixepoch', 'localtime')",
+    'link': "uri",
+}
+
+
+class BancoResultados:
+    """Acesso ao banco de resultados, seguro para várias threads, com escrita em lotes."""
+
+    def __init__(self, caminho=ARQUIVO_BANCO, tamanho_lote=500):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.lock = threading.Lock()
+        self._pendentes = []
+
+        # timeout longo: na varredura distribuída vários processos gravam no mesmo banco
+        self.conexao = sqlite3.connect(caminho, timeout=60, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(ESQUEMA)
+
+    # --- ESCRITA ---
+
+    def registrar(self, info, url_origem=None, site=None, categoria=None, exportado=False, quando=None):
+        """Enfileira um magnet (MagnetInfo) visto agora; grava quando o lote enche."""
+        quando = quando or time.time()
+        with self.lock:
+            self._pendentes.append((info, categoria, site, url_origem, quando, exportado))
+            if len(self._pendentes) >= self.tamanho_lote:
+                self._gravar_lote()
+
+    def _mesclar_com_banco(self, mesclados):
+        """Junta aos registros do lote os trackers dos links que já estão no banco."""
+        hashes = list(mesclados)
+        for i in range(0, len(hashes), PARAMETROS_POR_CONSULTA):
+            parte = hashes[i:i + PARAMETROS_POR_CONSULTA]
+            consulta = f"SELECT infohash, uri FROM magnets WHERE infohash IN ({','.join('?' * len(parte))})"
+            for infohash, uri in self.conexao.execute(consulta, parte):
+                anterior = analisar_magnet(uri)
+                if anterior is not None:
+                    mesclados[infohash] = mesclar_magnets(anterior, mesclados[infohash])
+
+    def _gravar_lote(self):
+        if not self._pendentes:
+            return
+        # Um registro por infohash: as várias versões do mesmo torrent no lote viram uma só
+        mesclados = {}
+        for info, *_ in self._pendentes:
+            anterior = mesclados.get(info.infohash)
+            mesclados[info.infohash] = mesclar_magnets(anterior, info) if anterior else info
+        self._mesclar_com_banco(mesclados)
+
+        linhas, fontes = [], []
+        for info, categoria, site, url_origem, quando, exportado in self._pendentes:
+            linhas.append((info.infohash, mesclados[info.infohash].uri, info.nome, info.tamanho, categoria,
+                           site, url_origem, quando, quando, 1 if exportado else 0))
+            if url_origem:
+                fontes.append((info.infohash, url_origem, site, quando))
+        with self.conexao:
+            self.conexao.executemany(UPSERT, linhas)
+            self.conexao.executemany(INSERIR_FONTE, fontes)
+        self._pendentes = []
+
+    def registrar_falha(self, url, site, erro, tentativas):
+        """Guarda uma página que falhou em todas as tentativas, para a próxima execução."""
+        with self.lock, self.conexao:
+            self.conexao.execute("INSERT OR REPLACE INTO falhas (url, site, tentativas, erro, quando) "
+                                 "VALUES (?, ?, ?, ?, ?)", (url, site, tentativas, erro, time.time()))
+
+    def retomar_falhas(self, site):
+        """URLs do site que falharam na execução anterior. Saem da tabela: se falharem de novo, voltam."""
+        with self.lock, self.conexao:
+            urls = [url for (url,) in self.conexao.execute(
+                "SELECT url FROM falhas WHERE site = ? ORDER BY quando", (site,))]
+            self.conexao.execute("DELETE FROM falhas WHERE site = ?", (site,))
+        return urls
+
+    def falhas(self):
+        """[(site, url, tentativas, erro, quando), ...] das páginas que falharam definitivamente."""
+        with self.lock:
+            return self.conexao.execute(
+                "SELECT site, url, tentativas, erro, datetime(quando, 'unixepoch', 'localtime') FROM falhas "
+                "ORDER BY site, quando").fetchall()
+
+    def carregar_padroes(self, site):
+        """{padrão de URL: (visitas, magnets)} aprendidos nas execuções anteriores para o site."""
+        with self.lock:
+            return {padrao: (visitas, magnets) for padrao, visitas, magnets in self.conexao.execute(
+                "SELECT padrao, visitas, magnets FROM padroes_url WHERE site = ?", (site,))}
+
+    def salvar_padroes(self, site, padroes):
+        """Substitui as estatísticas de padrões de URL do site (ver fronteira.EstatisticasPadroes)."""
+        with self.lock, self.conexao:
+            self.conexao.execute("DELETE FROM padroes_url WHERE site = ?", (site,))
+            self.conexao.executemany("INSERT INTO padroes_url (site, padrao, visitas, magnets) VALUES (?, ?, ?, ?)",
+                                     [(site, padrao, visitas, magnets) for padrao, (visitas, magnets) in padroes.items()])
+
+    def atualizar_categorias(self, categorias):
+        """Troca a categoria dos magnets ({infohash: categoria}), ex.: depois de mudar as regras.
+
+        registrar() mantém a categoria que o magnet já tinha; aqui ela é sobrescrita.
+        """
+        with self.lock:
+            self._gravar_lote()
+            with self.conexao:
+                self.conexao.executemany("UPDATE magnets SET categoria = ? WHERE infohash = ?",
+                                         [(categoria, infohash) for infohash, categoria in categorias.items()])
+
+    def salvar(self):
+        """Grava imediatamente o que ainda estiver no lote."""
+        with self.lock:
+            self._gravar_lote()
+
+    def fechar(self):
+        with self.lock:
+            self._gravar_lote()
+            self.conexao.close()
+
+    # --- CONSULTAS ---
+
+    def total(self):
+        self.salvar()
+        with self.lock:
+            return self.conexao.execute("SELECT count(*) FROM magnets").fetchone()[0]
+
+    def carregar_hashes(self):
+        """Hashes (hex maiúsculo) de todos os magnets conhecidos, para checar novidades em memória."""
+        self.salvar()
+        with self.lock:
+            return {linha[0] for linha in self.conexao.execute("SELECT hex(infohash) FROM magnets")}
+
+    def fontes(self, hash_hex):
+        """Páginas onde o magnet (hash em hex) foi visto: [(site, url_origem, primeira_vez), ...]."""
+        self.salvar()
+        with self.lock:
+            return self.conexao.execute(
+                "SELECT site, url_origem, datetime(primeira_vez, 'unixepoch', 'localtime') FROM fontes "
+                "WHERE infohash = ? ORDER BY primeira_vez", (bytes.fromhex(hash_hex),)).fetchall()
+
+    def _leitura(self):
+        """Conexão separada só para leitura: no modo WAL ela não bloqueia as threads que gravam."""
+        return closing(sqlite3.connect(self.caminho, timeout=60))
+
+    @staticmethod
+    def _consultar(conexao, expressoes, site=None, desde=None, visto_desde=None, categoria=None,
+                   somente_pendentes=False):
+        """desde filtra pela primeira vez em que o magnet foi visto; visto_desde, pela última."""
+        condicoes, parametros = [], []
+        if site is not None:
+            condicoes.append("site = ?")
+            parametros.append(site)
+        if desde is not None:
+            condicoes.append("primeira_vez >= ?")
+            parametros.append(desde)
+        if visto_desde is not None:
+            condicoes.append("ultima_vez >= ?")
+            parametros.append(visto_desde)
+        if categoria is not None:
+            condicoes.append("categoria = ?")
+            parametros.append(categoria)
+        if somente_pendentes:
+            condicoes.append("exportado = 0")
+        sql = f"SELECT {', '.join(expressoes)} FROM magnets"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += " ORDER BY primeira_vez"
+        return conexao.execute(sql, parametros)
+
+    # --- VISÕES EXPORTADAS (.txt / .csv) ---
+
+    def iterar_links(self, **filtros):
+        """Gera os links (uri) que atendem aos filtros, lendo o banco em streaming."""
+        self.salvar()
+        with self._leitura() as conexao:
+            for (uri,) in self._consultar(conexao, ["uri"], **filtros):
+                yield uri
+
+    def exportar_links(self, arquivo, modo='w', cabecalho=None, **filtros):
+        """Escreve um link por linha. Retorna quantos foram escritos."""
+        total = 0
+        with open(arquivo, modo, encoding='utf-8') as f:
+            if cabecalho:
+                f.write(cabecalho)
+            for uri in self.iterar_links(**filtros):
+                f.write(uri + '\n')
+                total += 1
+        return total
+
+    def exportar_csv(self, arquivo, colunas, **filtros):
+        """Escreve um CSV com as colunas pedidas ([(titulo, coluna), ...], coluna em COLUNAS)."""
+        self.salvar()
+        total = 0
+        with self._leitura() as conexao, open(arquivo, 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.writer(f, quoting=csv.QUOTE_ALL)
+            escritor.writerow([titulo for titulo, _ in colunas])
+            for linha in self._consultar(conexao, [COLUNAS[coluna] for _, coluna in colunas], **filtros):
+                escritor.writerow(linha)
+                total += 1
+        return total
+
+    def exportar_pendentes(self, arquivos):
+        """Acrescenta aos arquivos [(caminho, modo), ...] os magnets ainda não exportados e os marca.
+
+        Magnets gravados por uma execução que terminou antes de exportar (ex.: queda de
+        energia) também saem aqui na próxima execução, então nenhum link se perde.
+        """
+        self.salvar()
+        with self.lock:
+            linhas = self._consultar(self.conexao, ["infohash", "uri"], somente_pendentes=True).fetchall()
+            for caminho, modo in arquivos:
+                with open(caminho, modo, encoding='utf-8') as f:
+                    for _, uri in linhas:
+                        f.write(uri + '\n')
+            # Só os que foram escritos: na varredura distribuída outros processos podem ter
+            # gravado magnets novos desde a consulta, e eles ficam para a próxima exportação
+            hashes = [infohash for infohash, _ in linhas]
+            with self.conexao:
+                for i in range(0, len(hashes), PARAMETROS_POR_CONSULTA):
+                    parte = hashes[i:i + PARAMETROS_POR_CONSULTA]
+                    self.conexao.execute(
+                        f"UPDATE magnets SET exportado = 1 WHERE infohash IN ({','.join('?' * len(parte))})", parte)
+        return len(linhas)
+
+    def resumo(self):
+        """Quantidade de magnets por site e por categoria, e quantos foram vistos em mais de um site."""
+        self.salvar()
+        with self.lock:
+            por_site = self.conexao.execute(
+                "SELECT coalesce(site, '(desconhecido)'), count(*) FROM magnets GROUP BY site ORDER BY 2 DESC").fetchall()
+            por_categoria = self.conexao.execute(
+                "SELECT coalesce(categoria, '(sem categoria)'), count(*) FROM magnets GROUP BY categoria ORDER BY 2 DESC").fetchall()
+            em_varios_sites = self.conexao.execute(
+                "SELECT count(*) FROM (SELECT infohash FROM fontes GROUP BY infohash HAVING count(DISTINCT site) > 1)").fetchone()[0]
+        return por_site, por_categoria, em_varios_sites
+
+
+def importar_historico_txt(banco, arquivos, regras=None):
+    """Importa (uma única vez) o histórico dos arquivos .txt para um banco vazio."""
+    if banco.total() > 0:
+        return 0
+    for arquivo in arquivos:
+        if not os.path.exists(arquivo):
+            continue
+        quando = os.path.getmtime(arquivo)
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            for linha in f:
+                info = analisar_magnet(linha.strip()) if linha.startswith('magnet:') else None
+                if info is None:
+                    continue
+                categoria = regras.categorizar(info.nome or "Sem nome") if regras else None
+                banco.registrar(info, categoria=categoria, exportado=True, quando=quando)
+    importados = banco.total()
+    if importados:
+        logging.info(f"🗄️ {importados} links do histórico em .txt importados para {banco.caminho}.")
+    return importados
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Consulta e exporta o banco de resultados dos crawlers.')
+    parser.add_argument('--banco', default=ARQUIVO_BANCO)
+    parser.add_argument('--site', help='Filtra por site (netloc, ex.: www.exemplo.com)')
+    parser.add_argument('--categoria', help='Filtra por categoria')
+    parser.add_argument('--desde', type=float, help='Apenas magnets vistos pela primeira vez após este timestamp')
+    parser.add_argument('--visto-desde', type=float, help='Apenas magnets vistos (de novo) após este timestamp')
+    parser.add_argument('--txt', help='Exporta os links filtrados para este arquivo .txt')
+    parser.add_argument('--csv', help='Exporta os detalhes filtrados para este arquivo .csv')
+    parser.add_argument('--fontes', metavar='HASH', help='Mostra os sites/páginas onde o magnet foi visto')
+    parser.add_argument('--falhas', action='store_true',
+                        help='Lista as páginas que falharam (serão tentadas de novo na próxima execução)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.banco):
+        print(f"❌ Banco {args.banco} não encontrado!")
+        raise SystemExit(1)
+
+    banco = BancoResultados(args.banco)
+    filtros = {'site': args.site, 'categoria': args.categoria, 'desde': args.desde, 'visto_desde': args.visto_desde}
+    if args.txt:
+        print(f"📄 {banco.exportar_links(args.txt, **filtros)} links exportados para {args.txt}")
+    if args.csv:
+        colunas = [('Hash', 'hash'), ('Nome', 'nome'), ('Tamanho', 'tamanho'), ('Categoria', 'categoria'),
+                   ('Site', 'site'), ('Sites', 'sites'), ('Fontes', 'fontes'), ('Primeira vez', 'primeira_vez'),
+                   ('Link', 'link')]
+        print(f"📊 {banco.exportar_csv(args.csv, colunas, **filtros)} linhas exportadas para {args.csv}")
+    if args.fontes:
+        fontes = banco.fontes(args.fontes)
+        print(f"🔎 {len(fontes)} páginas com o magnet {args.fontes.upper()}:")
+        for site, url_origem, quando in fontes:
+            print(f"   {quando}  {site}  {url_origem}")
+    if args.falhas:
+        falhas = banco.falhas()
+        print(f"🔁 {len(falhas)} páginas para tentar de novo na próxima execução:")
+        for site, url, tentativas, erro, quando in falhas:
+            print(f"   {quando}  {url}  ({tentativas} tentativas: {erro})")
+    if not args.txt and not args.csv and not args.fontes and not args.falhas:
+        por_site, por_categoria, em_varios_sites = banco.resumo()
+        print(f"🗄️ {banco.total()} magnets em {args.banco} ({em_varios_sites} vistos em mais de um site)")
+        print("\n🌐 Por site:")
+        for site, total in por_site:
+            print(f"   {site}: {total}")
+        print("\n📁 Por categoria:")
+        for categoria, total in por_categoria:
+            print(f"   {categoria}: {total}")
+    banco.fechar()
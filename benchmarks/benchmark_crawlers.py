@@ -0,0 +1,353 @@
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from site_ficticio import PERFIL_SITE_FICTICIO, SiteFicticio, servir_site_ficticio
+from pipeline_parsing import MODOS, gil_ativo, modos_disponiveis
+
+# ==============================================================================
+# BENCHMARK DOS CRAWLERS CONTRA UM SITE FICTÍCIO LOCAL
+#
+# Cada crawler roda em um processo separado (para que CPU e pico de memória
+# sejam medidos isoladamente) contra o mesmo site sintético servido em
+# 127.0.0.1. Nenhum acesso à internet é necessário.
+#
+# Uso:
+#   python benchmarks/benchmark_crawlers.py --paginas 300 --latencia 0.01
+#   python benchmarks/benchmark_crawlers.py --json resultado.json
+#   python benchmarks/benchmark_crawlers.py --latencia 0.05 --max-simultaneas 3 \
+#       --crawlers profissional profissional_adaptativo   # site que responde 429
+#   python benchmarks/benchmark_crawlers.py --latencia 0.02 --proporcao-lentas 0.03 --latencia-lenta 1 \
+#       --crawlers profissional profissional_reserva      # páginas lentas de vez em quando
+#   python benchmarks/benchmark_crawlers.py --espelhos 3 --crawlers profissional profissional_simhash
+#   python benchmarks/benchmark_crawlers.py --tags 600 --crawlers profissional profissional_prioridade
+#   python benchmarks/benchmark_crawlers.py --tags 200 --crawlers digite_site digite_site_perfil profissional_perfil
+#   python benchmarks/benchmark_crawlers.py --paginas 20 --listagem 200 --latencia 0.05 \
+#       --crawlers profissional profissional_paginacao       # categoria com 200 páginas numeradas
+#   python benchmarks/benchmark_crawlers.py --crawlers profissional profissional_warc  # custo de gravar WARC
+# ==============================================================================
+
+CRAWLERS = ['profissional', 'profissional_processos', 'profissional_subinterpretadores',
+            'profissional_threads', 'profissional_adaptativo', 'profissional_reserva',
+            'profissional_simhash', 'profissional_prioridade', 'profissional_perfil', 'profissional_paginacao',
+            'profissional_warc',
+            'digite_site', 'digite_site_perfil', 'ok']
+
+
+def extrair_hash(magnet):
+    hash_match = re.search(r'xt=urn:btih:([a-zA-Z0-9]{32,40})', magnet, re.IGNORECASE)
+    return hash_match.group(1).upper() if hash_match else None
+
+
+def pico_memoria_mb():
+    """Pico de memória residente do processo atual (MB), ou None se indisponível."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes.
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+# --- ADAPTADORES: executam cada crawler até o fim e devolvem (páginas, magnets) ---
+
+def rodar_profissional(url, params, modo_parsing=None, controle_adaptativo=None, requisicoes_de_reserva=None,
+                       quase_duplicadas=None, fronteira_por_padrao=False, perfis_extracao=None,
+                       paginacao_paralela=None, gravar_warc=None):
+    import crawler_profissional
+    logging.getLogger().setLevel(logging.WARNING)
+    config = {
+        'max_threads': params['threads'],
+        'delay_entre_requests': 0,
+        'delay_entre_sites': 0,
+        'trabalhadores_parsing': params['processos'] if modo_parsing else 0,
+        'modo_parsing': modo_parsing,
+        'controle_adaptativo': controle_adaptativo,
+        'requisicoes_de_reserva': requisicoes_de_reserva,
+        'quase_duplicadas': quase_duplicadas,
+        'fronteira_por_padrao': fronteira_por_padrao,
+        'perfis_extracao': perfis_extracao or {},
+        'paginacao_paralela': paginacao_paralela,
+        'gravar_warc': gravar_warc,
+    }
+    crawler = crawler_profissional.CrawlerProfissional(config)
+    scanner = crawler_profissional.SiteScanner(url, crawler)
+    _, todos_links = scanner.iniciar_varredura()
+    if crawler.pipeline:
+        crawler.pipeline.fechar()
+    crawler.fechar_gravador_warc()
+    todos_links = [info.uri for info in todos_links.values()]
+    # O SiteScanner descarta nomes de baixa qualidade: eles não contam como perda.
+    ignorados = lambda magnet: crawler.deve_ignorar_link(crawler.extrair_nome_magnet(magnet))
+    return len(scanner.urls_visitadas), todos_links, ignorados
+
+
+def rodar_profissional_processos(url, params):
+    return rodar_profissional(url, params, 'processos')
+
+
+def rodar_profissional_subinterpretadores(url, params):
+    return rodar_profissional(url, params, 'subinterpretadores')
+
+
+def rodar_profissional_threads(url, params):
+    # Parsing em um pool de threads: só é paralelo de verdade no Python sem GIL
+    return rodar_profissional(url, params, 'threads')
+
+
+def rodar_profissional_adaptativo(url, params):
+    # Concorrência e delay ajustados pelas respostas do site (controle_taxa.py)
+    return rodar_profissional(url, params, controle_adaptativo={'delay_min': 0, 'delay_max': 5})
+
+
+def rodar_profissional_reserva(url, params):
+    # Requisição de reserva para as páginas que passam do percentil 95 de latência
+    return rodar_profissional(url, params, requisicoes_de_reserva={'percentil': 0.95, 'proporcao_max': 0.1})
+
+
+def rodar_profissional_simhash(url, params):
+    # Não segue os links de páginas quase iguais a uma já vista (similaridade.py)
+    return rodar_profissional(url, params, quase_duplicadas={'limiar': 3})
+
+
+def rodar_profissional_prioridade(url, params):
+    # Fronteira "melhor primeiro" pelos padrões de URL que mais rendem magnets (fronteira.py)
+    return rodar_profissional(url, params, fronteira_por_padrao=True)
+
+
+def perfis_do_site_ficticio(url):
+    return {urlparse(url).netloc: PERFIL_SITE_FICTICIO}
+
+
+def rodar_profissional_perfil(url, params):
+    # Extração direcionada pelos seletores do site (perfis_extracao.py)
+    return rodar_profissional(url, params, perfis_extracao=perfis_do_site_ficticio(url))
+
+
+def rodar_profissional_paginacao(url, params):
+    # Páginas numeradas de listagem enfileiradas em janelas (paginacao.py)
+    return rodar_profissional(url, params, paginacao_paralela={'janela': 50})
+
+
+def rodar_profissional_warc(url, params):
+    # Todas as respostas gravadas em .warc.gz pela thread de gravação (arquivo_warc.py)
+    return rodar_profissional(url, params, gravar_warc={'pasta': 'warc'})
+
+
+def rodar_digite_site(url, params, perfis=None):
+    import deepseek_digite_site
+    crawler = deepseek_digite_site.CrawlerProfissional(url, max_threads=params['threads'], delay=0, perfis=perfis or {})
+    crawler.iniciar_varredura_completa()
+    return crawler.estatisticas['total_paginas'], [info.uri for info in crawler.links_magneticos.values()], None
+
+
+def rodar_digite_site_perfil(url, params):
+    return rodar_digite_site(url, params, perfis_do_site_ficticio(url))
+
+
+def rodar_ok(url, params):
+    import deepseek_ok
+    crawler = deepseek_ok.MagnetCrawlerQBittorrent(url, max_paginas=params['paginas'] * 2, delay=0)
+    crawler.iniciar_crawler()
+    return len(crawler.urls_visitadas), [info.uri for info in crawler.links_magneticos.values()], None
+
+
+ADAPTADORES = {
+    'profissional': rodar_profissional,
+    'profissional_processos': rodar_profissional_processos,
+    'profissional_subinterpretadores': rodar_profissional_subinterpretadores,
+    'profissional_threads': rodar_profissional_threads,
+    'profissional_adaptativo': rodar_profissional_adaptativo,
+    'profissional_reserva': rodar_profissional_reserva,
+    'profissional_simhash': rodar_profissional_simhash,
+    'profissional_prioridade': rodar_profissional_prioridade,
+    'profissional_perfil': rodar_profissional_perfil,
+    'profissional_paginacao': rodar_profissional_paginacao,
+    'profissional_warc': rodar_profissional_warc,
+    'digite_site': rodar_digite_site,
+    'digite_site_perfil': rodar_digite_site_perfil,
+    'ok': rodar_ok,
+}
+
+
+def executar_crawler(nome, url, params, fila_resultado):
+    """Processo filho: mede o crawler e devolve o resultado (ou o erro) pela fila."""
+    try:
+        fila_resultado.put(medir_crawler(nome, url, params))
+    except Exception as e:
+        fila_resultado.put({'crawler': nome, 'erro': f"{type(e).__name__}: {e}"})
+
+
+def medir_crawler(nome, url, params):
+    """Roda um crawler em um diretório temporário e mede tempo, CPU, memória e acertos."""
+    site = criar_site(params)
+    esperados = {extrair_hash(m): m for m in site.magnets_esperados()}
+
+    with tempfile.TemporaryDirectory(prefix=f'bench_{nome}_') as pasta:
+        os.chdir(pasta)
+        saida = io.StringIO()
+        inicio = time.perf_counter()
+        cpu_inicio = time.process_time()
+        with contextlib.redirect_stdout(saida):
+            paginas, magnets, ignorados = ADAPTADORES[nome](url, params)
+        cpu = time.process_time() - cpu_inicio
+        duracao = time.perf_counter() - inicio
+        os.chdir(RAIZ)
+
+    if ignorados is not None:
+        esperados = {h: m for h, m in esperados.items() if not ignorados(m)}
+    encontrados = {extrair_hash(m) for m in magnets} - {None}
+    corretos = encontrados & set(esperados)
+
+    return {
+        'crawler': nome,
+        'paginas': paginas,
+        'tempo_s': round(duracao, 3),
+        'paginas_por_s': round(paginas / duracao, 2) if duracao > 0 else None,
+        'cpu_s': round(cpu, 3),
+        'pico_memoria_mb': round(pico_memoria_mb(), 1) if resource else None,
+        'magnets_esperados': len(esperados),
+        'magnets_encontrados': len(encontrados),
+        'recall': round(len(corretos) / len(esperados), 4) if esperados else 1.0,
+        'precisao': round(len(corretos) / len(encontrados), 4) if encontrados else 1.0,
+    }
+
+
+def crawlers_disponiveis():
+    """Todos os crawlers, menos as variantes de parsing que este Python não executa em paralelo."""
+    modos = modos_disponiveis()
+    return [nome for nome in CRAWLERS
+            if nome.split('_', 1)[-1] not in MODOS or nome.split('_', 1)[1] in modos]
+
+
+def criar_site(params):
+    return SiteFicticio(
+        paginas=params['paginas'],
+        links_por_pagina=params['fanout'],
+        magnets_por_pagina=params['magnets'],
+        latencia=params['latencia'],
+        tamanho_pagina=params['tamanho'],
+        semente=params['semente'],
+        max_simultaneas=params['max_simultaneas'],
+        proporcao_lentas=params['proporcao_lentas'],
+        latencia_lenta=params['latencia_lenta'],
+        espelhos=params['espelhos'],
+        tags=params['tags'],
+        listagem=params['listagem'],
+    )
+
+
+def rodar_benchmark(params, crawlers):
+    site = criar_site(params)
+    contexto = multiprocessing.get_context('spawn')
+    resultados = []
+
+    with servir_site_ficticio(site) as (url, servidor):
+        for nome in crawlers:
+            servidor.zerar_contadores()
+            fila = contexto.Queue()
+            processo = contexto.Process(target=executar_crawler, args=(nome, url, params, fila), name=f'bench-{nome}')
+            processo.start()
+            try:
+                resultado = fila.get(timeout=params['tempo_maximo'])
+            except Exception:
+                processo.terminate()
+                resultado = {'crawler': nome, 'erro': f"sem resultado em {params['tempo_maximo']}s"}
+            processo.join()
+            resultado['requisicoes_servidor'] = servidor.requisicoes
+            resultado['recusadas_servidor'] = servidor.recusadas
+            resultado['requisicoes_ate_90'] = servidor.requisicoes_ate(0.9)
+            resultados.append(resultado)
+            imprimir_resultado(resultado)
+    return resultados
+
+
+def imprimir_resultado(r):
+    if 'erro' in r:
+        print(f"❌ {r['crawler']:<31} {r['erro']}")
+        return
+    memoria = f"{r['pico_memoria_mb']:.1f}MB" if r['pico_memoria_mb'] is not None else "n/d"
+    print(f"📊 {r['crawler']:<31} {r['paginas']:>5} págs  {r['paginas_por_s']:>8} págs/s  "
+          f"CPU {r['cpu_s']:>7}s  RSS {memoria:>9}  "
+          f"recall {r['recall']:.3f}  precisão {r['precisao']:.3f}  "
+          f"({r['requisicoes_servidor']} requisições, 90% dos magnets em {r['requisicoes_ate_90']}"
+          + (f", {r['recusadas_servidor']} com 429)" if r['recusadas_servidor'] else ")"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark offline dos crawlers contra um site fictício local.')
+    parser.add_argument('--paginas', type=int, default=200, help='Número de páginas do site fictício')
+    parser.add_argument('--fanout', type=int, default=8, help='Links internos por página')
+    parser.add_argument('--magnets', type=int, default=5, help='Links magnéticos por página')
+    parser.add_argument('--latencia', type=float, default=0.0, help='Latência artificial por requisição (s)')
+    parser.add_argument('--tamanho', type=int, default=20000, help='Tamanho aproximado de cada página (bytes)')
+    parser.add_argument('--threads', type=int, default=5, help='Threads para os crawlers multi-thread')
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 2,
+                        help='Trabalhadores de parsing para as variantes profissional_<modo>')
+    parser.add_argument('--max-simultaneas', type=int, default=None,
+                        help='O site responde 429 acima deste número de requisições simultâneas')
+    parser.add_argument('--proporcao-lentas', type=float, default=0.0,
+                        help='Fração das requisições que demoram --latencia-lenta (cauda de latência)')
+    parser.add_argument('--latencia-lenta', type=float, default=1.0, help='Latência das requisições lentas (s)')
+    parser.add_argument('--espelhos', type=int, default=0,
+                        help='Ordenações alternativas da página inicial, cada uma espelhando o site inteiro')
+    parser.add_argument('--tags', type=int, default=0,
+                        help='Páginas /tag/N/ sem magnets, ligadas às páginas de lançamentos')
+    parser.add_argument('--listagem', type=int, default=0,
+                        help='Páginas numeradas da categoria /lancamentos/ (cada uma liga só à anterior, próxima e última)')
+    parser.add_argument('--semente', type=int, default=42, help='Semente do gerador do site')
+    parser.add_argument('--tempo-maximo', type=float, default=600, help='Tempo máximo por crawler (s)')
+    parser.add_argument('--crawlers', nargs='+', choices=CRAWLERS, default=crawlers_disponiveis())
+    parser.add_argument('--json', help='Salva os resultados neste arquivo JSON')
+    args = parser.parse_args()
+
+    params = {
+        'paginas': args.paginas,
+        'fanout': args.fanout,
+        'magnets': args.magnets,
+        'latencia': args.latencia,
+        'tamanho': args.tamanho,
+        'threads': args.threads,
+        'processos': args.processos,
+        'semente': args.semente,
+        'max_simultaneas': args.max_simultaneas,
+        'proporcao_lentas': args.proporcao_lentas,
+        'latencia_lenta': args.latencia_lenta,
+        'espelhos': args.espelhos,
+        'tags': args.tags,
+        'listagem': args.listagem,
+        'tempo_maximo': args.tempo_maximo,
+    }
+    print(f"🚀 BENCHMARK: {args.paginas} páginas, fan-out {args.fanout}, {args.magnets} magnets/página, "
+          f"latência {args.latencia}s, ~{args.tamanho} bytes/página, {args.threads} threads")
+    print(f"🐍 Python {platform.python_version()}, GIL {'ativo' if gil_ativo() else 'desativado'}, "
+          f"{os.cpu_count()} núcleos, modos de parsing: {', '.join(modos_disponiveis())}")
+    print("-" * 60)
+    resultados = rodar_benchmark(params, args.crawlers)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'parametros': params, 'resultados': resultados}, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados salvos em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(PASTA_BENCHMARKS)
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, PASTA_BENCHMARKS)
+
+from site_ficticio import PERFIL_SITE_FICTICIO, SiteFicticio
+
+# ==============================================================================
+# MICRO-BENCHMARKS DAS FUNÇÕES EXECUTADAS POR MAGNET / POR PÁGINA
+#
+# Mede a vazão (operações por segundo) das funções quentes de extração e
+# categorização sobre um corpus fixo, sem acesso à rede:
+#   - magnets reais salvos em "Nova pasta/*.txt" (e em benchmarks/corpus/*.txt);
+#   - páginas HTML salvas em benchmarks/corpus/*.html, ou páginas geradas pelo
+#     site fictício quando o corpus não tiver HTML.
+#
+# O repositório não traz páginas salvas (elas são de sites de terceiros): sem
+# elas os números por página medem o HTML sintético do site fictício, o que é
+# avisado na saída e gravado no JSON ("paginas_sinteticas"). Para medir o HTML
+# real, salve algumas páginas dos sites da base_busca.txt em benchmarks/corpus/.
+#
+# Uso:
+#   python benchmarks/micro_benchmarks.py --salvar base.json        # versão atual
+#   python benchmarks/micro_benchmarks.py --comparar base.json      # após a mudança
+# ==============================================================================
+
+PASTA_CORPUS = os.path.join(PASTA_BENCHMARKS, 'corpus')
+PASTAS_MAGNETS = [os.path.join(RAIZ, 'Nova pasta'), PASTA_CORPUS]
+
+
+def carregar_magnets():
+    magnets = []
+    for pasta in PASTAS_MAGNETS:
+        for arquivo in sorted(glob.glob(os.path.join(pasta, '*.txt'))):
+            with open(arquivo, 'r', encoding='utf-8', errors='replace') as f:
+                magnets.extend(linha.strip() for linha in f if linha.strip().startswith('magnet:'))
+    # Completa o corpus com magnets sintéticos (nomes com categorias e releases CAM).
+    site = SiteFicticio(paginas=50)
+    magnets.extend(sorted(site.magnets_esperados()))
+    return magnets
+
+
+def carregar_paginas():
+    """(páginas, sintéticas): as páginas de benchmarks/corpus/*.html, ou as do site fictício."""
+    paginas = []
+    for arquivo in sorted(glob.glob(os.path.join(PASTA_CORPUS, '*.html'))):
+        with open(arquivo, 'r', encoding='utf-8', errors='replace') as f:
+            paginas.append(f.read())
+    if paginas:
+        return paginas, False
+    logging.warning(f"⚠️ Nenhuma página HTML em {PASTA_CORPUS}: os benchmarks por página vão medir "
+                    f"páginas sintéticas do site fictício, não HTML real.")
+    site = SiteFicticio(paginas=20, magnets_por_pagina=10, tamanho_pagina=40000)
+    return [site.html_pagina(n).decode('utf-8') for n in range(site.paginas)], True
+
+
+def criar_crawlers(pasta):
+    """Instancia os crawlers em um diretório temporário (eles leem/criam arquivos no cwd)."""
+    os.chdir(pasta)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import crawler_profissional
+        import deepseek_digite_site
+        logging.getLogger().setLevel(logging.WARNING)
+        profissional = crawler_profissional.CrawlerProfissional(
+            {'max_threads': 1, 'delay_entre_requests': 0, 'delay_entre_sites': 0})
+        digite_site = deepseek_digite_site.CrawlerProfissional('http://127.0.0.1/', max_threads=1, delay=0)
+    os.chdir(RAIZ)
+    return profissional, digite_site
+
+
+def montar_casos(profissional, digite_site, magnets, paginas):
+    """Lista de (nome, função, entradas). Cada entrada conta como uma operação."""
+    from parser_magnet import analisar_magnet
+    from perfis_extracao import PerfilExtracao
+    from pipeline_parsing import analisar_pagina
+    perfil = PerfilExtracao('site fictício', **PERFIL_SITE_FICTICIO)
+    nomes = [profissional.extrair_nome_magnet(m) for m in magnets]
+    return [
+        # __wrapped__ ignora o cache: mede o custo real de analisar um magnet inédito.
+        ('analisar_magnet_sem_cache', analisar_magnet.__wrapped__, magnets),
+        ('extrair_hash_magnet', profissional.extrair_hash_magnet, magnets),
+        ('extrair_nome_magnet', profissional.extrair_nome_magnet, magnets),
+        ('deve_ignorar_link', profissional.deve_ignorar_link, nomes),
+        ('categorizar_link', profissional.categorizar_link, magnets),
+        ('classificar_nome_sem_cache', profissional.regras._classificar, nomes),
+        ('validar_magnet', digite_site.validar_magnet, magnets),
+        ('extrair_magnets_avancado', lambda html: digite_site.extrair_magnets_avancado(html, 'http://127.0.0.1/'), paginas),
+        # Unidade de trabalho enviada aos processos de parsing do crawler_profissional
+        ('analisar_pagina', lambda html: analisar_pagina('http://127.0.0.1/', html), paginas),
+        ('extrair_links_completos', lambda html: digite_site.extrair_links_completos(html, 'http://127.0.0.1/'), paginas),
+        # Extração direcionada pelos seletores do perfil do site (perfis_extracao.py)
+        ('analisar_pagina_com_perfil', lambda html: analisar_pagina('http://127.0.0.1/', html, perfil=perfil), paginas),
+    ]
+
+
+def medir(funcao, entradas, tempo_minimo, repeticoes):
+    """Melhor vazão (operações/s) entre `repeticoes` rodadas de pelo menos `tempo_minimo` segundos."""
+    melhor = 0.0
+    for _ in range(repeticoes):
+        operacoes = 0
+        inicio = time.perf_counter()
+        while True:
+            for entrada in entradas:
+                funcao(entrada)
+            operacoes += len(entradas)
+            decorrido = time.perf_counter() - inicio
+            if decorrido >= tempo_minimo:
+                break
+        melhor = max(melhor, operacoes / decorrido)
+    return melhor
+
+
+def comparar(resultados, arquivo_base, tolerancia, paginas_sinteticas):
+    with open(arquivo_base, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    base = dados['resultados']
+    regressoes = 0
+    print(f"\n🔍 COMPARAÇÃO COM {arquivo_base} (tolerância {tolerancia:.0%})")
+    if dados.get('corpus', {}).get('paginas_sinteticas', paginas_sinteticas) != paginas_sinteticas:
+        print("⚠️ A base e esta execução usaram páginas diferentes (reais x sintéticas): "
+              "os números por página não são comparáveis.")
+    for nome, ops in resultados.items():
+        if nome not in base:
+            print(f"   {nome:<26} (novo, sem base)")
+            continue
+        variacao = ops / base[nome] - 1
+        if variacao < -tolerancia:
+            marcador = "❌ REGRESSÃO"
+            regressoes += 1
+        elif variacao > tolerancia:
+            marcador = "✅ melhora"
+        else:
+            marcador = "   estável"
+        print(f"   {nome:<26} {variacao:+8.1%}  {marcador}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmarks offline das funções de extração e categorização.')
+    parser.add_argument('--tempo-minimo', type=float, default=0.5, help='Duração mínima de cada rodada (s)')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Rodadas por função (vale a melhor)')
+    parser.add_argument('--filtro', help='Mede apenas as funções cujo nome contém este texto')
+    parser.add_argument('--salvar', help='Salva os resultados neste arquivo JSON')
+    parser.add_argument('--comparar', help='Compara com um JSON salvo anteriormente')
+    parser.add_argument('--tolerancia', type=float, default=0.10, help='Queda relativa considerada regressão')
+    args = parser.parse_args()
+
+    magnets = carregar_magnets()
+    paginas, paginas_sinteticas = carregar_paginas()
+    with tempfile.TemporaryDirectory(prefix='micro_bench_') as pasta:
+        profissional, digite_site = criar_crawlers(pasta)
+        casos = montar_casos(profissional, digite_site, magnets, paginas)
+
+        origem = "sintéticas, do site fictício" if paginas_sinteticas else "reais, de benchmarks/corpus"
+        print(f"🚀 MICRO-BENCHMARKS: {len(magnets)} magnets, {len(paginas)} páginas HTML ({origem})")
+        print("-" * 60)
+        resultados = {}
+        for nome, funcao, entradas in casos:
+            if args.filtro and args.filtro not in nome:
+                continue
+            ops = medir(funcao, entradas, args.tempo_minimo, args.repeticoes)
+            resultados[nome] = ops
+            print(f"📊 {nome:<26} {ops:>12,.0f} ops/s  {1e6 / ops:>10.2f} µs/op")
+
+    if args.salvar:
+        with open(args.salvar, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'maquina': platform.machine(),
+                'corpus': {'magnets': len(magnets), 'paginas': len(paginas), 'paginas_sinteticas': paginas_sinteticas},
+                'resultados': resultados,
+            }, f, indent=2)
+        print(f"💾 Resultados salvos em {args.salvar}")
+
+    if args.comparar:
+        if comparar(resultados, args.comparar, args.tolerancia, paginas_sinteticas):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
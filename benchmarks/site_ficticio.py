@@ -0,0 +1,345 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, quote
+
+# ==============================================================================
+# SITE DE TORRENTS FICTÍCIO PARA BENCHMARKS OFFLINE
+#
+# Gera de forma determinística (a partir de uma semente) um site com N páginas,
+# cada uma com links internos e links magnéticos, e o serve em 127.0.0.1.
+# Assim os crawlers podem ser medidos sem depender de sites reais.
+# ==============================================================================
+
+TITULOS = [
+    'Duna', 'Oppenheimer', 'Matrix', 'Interestelar', 'Gladiador', 'Coringa',
+    'Avatar', 'Barbie', 'Napoleao', 'Alien', 'Tropa.de.Elite', 'Cidade.de.Deus',
+    'The.Office', 'Breaking.Bad', 'Round.Six', 'Euphoria', 'Andor', 'Fallout',
+]
+QUALIDADES = ['1080p.WEB-DL', '720p.BluRay', '2160p.WEB-DL', '1080p.BluRay', '480p.DVDRip']
+AUDIOS = ['DUAL.5.1', 'Dublado', 'Legendado', 'Dual.Audio', 'PT-BR', '']
+TRACKERS = [
+    'udp://tracker.opentrackr.org:1337/announce',
+    'udp://open.stealth.si:80/announce',
+    'udp://tracker.fnix.net:6969/announce',
+]
+
+# Perfil de extração (perfis_extracao.py) do site fictício: só as páginas de lançamentos
+# são seguidas (as tags ficam de fora) e os magnets vêm da lista de lançamentos.
+PERFIL_SITE_FICTICIO = {
+    'paginacao': 'div.paginas a[href^="/pagina/"], div.paginas a[href="/"]',
+    'magnets': 'ul.lancamentos a.magnet',
+}
+
+
+class SiteFicticio:
+    """Descreve um site sintético: estrutura de links, magnets e tamanho das páginas."""
+
+    def __init__(self, paginas=200, links_por_pagina=8, magnets_por_pagina=5,
+                 latencia=0.0, tamanho_pagina=20000, proporcao_cam=0.1, semente=42,
+                 max_simultaneas=None, proporcao_lentas=0.0, latencia_lenta=0.0, espelhos=0, tags=0, listagem=0):
+        self.paginas = paginas
+        self.links_por_pagina = links_por_pagina
+        self.magnets_por_pagina = magnets_por_pagina
+        self.latencia = latencia
+        self.tamanho_pagina = tamanho_pagina
+        self.proporcao_cam = proporcao_cam
+        self.semente = semente
+        # Acima deste número de requisições simultâneas o servidor responde 429 (Retry-After: 1)
+        self.max_simultaneas = max_simultaneas
+        # Cauda de latência: esta fração das requisições (sorteada a cada uma) demora latencia_lenta
+        self.proporcao_lentas = proporcao_lentas
+        self.latencia_lenta = latencia_lenta
+        # Ordenações alternativas da página inicial (/?ordem=1..N); os links de uma página
+        # aberta com ?ordem=k mantêm a ordenação, então cada uma espelha o site inteiro
+        self.espelhos = espelhos
+        # Páginas /tag/N/ sem magnets, só com links para outras tags e páginas: o que um
+        # crawler FIFO visita tanto quanto as páginas de lançamentos
+        self.tags = tags
+        # Categoria paginada /lancamentos/, /lancamentos/page/2/ ... /page/N/: cada página só tem
+        # links para a anterior, a próxima e a última, como na maioria dos sites
+        self.listagem = listagem
+
+        # Cada página sorteia magnets de um "catálogo" maior que o site, como nos
+        # sites reais onde o mesmo lançamento aparece na listagem e no detalhe.
+        self.total_catalogo = max(1, (paginas + listagem) * magnets_por_pagina * 3 // 4)
+        self._catalogo = [self._gerar_magnet(i) for i in range(self.total_catalogo)]
+        self._magnets_por_pagina = [self._sortear_magnets(n) for n in range(paginas)]
+        self._links_por_pagina = [self._sortear_links(n) for n in range(paginas)]
+        self._magnets_por_listagem = [self._sortear_magnets(paginas + n) for n in range(listagem)]
+        self._tags_por_pagina = [self._sortear_tags(('pagina', n)) for n in range(paginas)]
+        self._tags_por_tag = [self._sortear_tags(('tag', n), links_por_pagina) for n in range(tags)]
+
+    def _gerar_magnet(self, indice):
+        rnd = random.Random(self.semente * 1_000_003 + indice)
+        infohash = '%040x' % rnd.getrandbits(160)
+        titulo = rnd.choice(TITULOS)
+        ano = rnd.randint(1990, 2025)
+        qualidade = rnd.choice(QUALIDADES)
+        if rnd.random() < self.proporcao_cam:
+            qualidade = 'HDCAM'
+        audio = rnd.choice(AUDIOS)
+        nome = '.'.join(p for p in [titulo, str(ano), qualidade, audio] if p)
+        trackers = '&'.join('tr=' + quote(t, safe='') for t in rnd.sample(TRACKERS, 2))
+        tamanho = rnd.randint(200, 60000) * 1024 * 1024
+        return f"magnet:?xt=urn:btih:{infohash}&dn={quote(nome)}&xl={tamanho}&{trackers}"
+
+    def _sortear_magnets(self, pagina):
+        rnd = random.Random(self.semente * 7919 + pagina)
+        return [self._catalogo[rnd.randrange(self.total_catalogo)] for _ in range(self.magnets_por_pagina)]
+
+    def _sortear_links(self, pagina):
+        rnd = random.Random(self.semente * 104729 + pagina)
+        # O link para a próxima página garante que todo o site é alcançável a partir da raiz.
+        links = [(pagina + 1) % self.paginas]
+        links += [rnd.randrange(self.paginas) for _ in range(max(0, self.links_por_pagina - 1))]
+        return links
+
+    def _sortear_tags(self, origem, quantidade=2):
+        if not self.tags:
+            return []
+        rnd = random.Random(f'{self.semente}-{origem}')
+        return [rnd.randrange(self.tags) for _ in range(quantidade)]
+
+    @staticmethod
+    def caminho_pagina(numero):
+        return '/' if numero == 0 else f'/pagina/{numero}/'
+
+    def magnets_esperados(self):
+        """Conjunto de todos os magnets publicados no site (alcançáveis a partir da raiz)."""
+        esperados = set()
+        for magnets in self._magnets_por_pagina + self._magnets_por_listagem:
+            esperados.update(magnets)
+        return esperados
+
+    def html_pagina(self, numero, ordem=None):
+        sufixo = f'?ordem={ordem}' if ordem else ''
+        partes = [
+            '<!DOCTYPE html><html><head><meta charset="utf-8">',
+            f'<title>Página {numero} - Site Fictício</title></head><body>',
+            '<nav><a href="/">Início</a> <a href="/contato.css">css</a></nav><ul class="lancamentos">',
+        ]
+        for magnet in self._magnets_por_pagina[numero]:
+            partes.append(f'<li><a class="magnet" href="{magnet}">Download</a></li>')
+        partes.append('</ul><div class="paginas">')
+        for destino in self._links_por_pagina[numero]:
+            partes.append(f'<a href="{self.caminho_pagina(destino)}{sufixo}">Página {destino}</a> ')
+        for tag in self._tags_por_pagina[numero]:
+            partes.append(f'<a href="/tag/{tag}/">Tag {tag}</a> ')
+        if numero == 0 and self.listagem:
+            partes.append('<a href="/lancamentos/">Lançamentos</a> ')
+        if numero == 0:
+            for outra in range(1, self.espelhos + 1):
+                partes.append(f'<a href="/?ordem={outra}">Ordenar {outra}</a> ')
+        partes.append('</div><div class="descricao"><p>')
+        return self._completar(''.join(partes))
+
+    def html_tag(self, numero):
+        partes = [
+            '<!DOCTYPE html><html><head><meta charset="utf-8">',
+            f'<title>Tag {numero} - Site Fictício</title></head><body>',
+            '<nav><a href="/">Início</a></nav><div class="tags">',
+        ]
+        for tag in self._tags_por_tag[numero]:
+            partes.append(f'<a href="/tag/{tag}/">Tag {tag}</a> ')
+        pagina = random.Random(f'{self.semente}-tag-pagina-{numero}').randrange(self.paginas)
+        partes.append(f'<a href="{self.caminho_pagina(pagina)}">Página {pagina}</a> ')
+        partes.append('</div><div class="descricao"><p>')
+        return self._completar(''.join(partes))
+
+    @staticmethod
+    def caminho_listagem(numero):
+        return '/lancamentos/' if numero == 1 else f'/lancamentos/page/{numero}/'
+
+    def html_listagem(self, numero):
+        partes = [
+            '<!DOCTYPE html><html><head><meta charset="utf-8">',
+            f'<title>Lançamentos - página {numero} - Site Fictício</title></head><body>',
+            '<nav><a href="/">Início</a></nav><ul class="lancamentos">',
+        ]
+        for magnet in self._magnets_por_listagem[numero - 1]:
+            partes.append(f'<li><a class="magnet" href="{magnet}">Download</a></li>')
+        partes.append('</ul><div class="paginacao">')
+        if numero > 1:
+            partes.append(f'<a href="{self.caminho_listagem(numero - 1)}">Anterior</a> ')
+        if numero < self.listagem:
+            partes.append(f'<a href="{self.caminho_listagem(numero + 1)}">Próxima</a> ')
+            partes.append(f'<a href="{self.caminho_listagem(self.listagem)}">Última</a> ')
+        partes.append('</div><div class="descricao"><p>')
+        return self._completar(''.join(partes))
+
+    def numero_da_listagem(self, caminho):
+        caminho = caminho.rstrip('/') + '/'
+        if caminho == '/lancamentos/':
+            return 1 if self.listagem else None
+        if not caminho.startswith('/lancamentos/page/'):
+            return None
+        try:
+            numero = int(caminho.strip('/').split('/')[2])
+        except (IndexError, ValueError):
+            return None
+        return numero if 2 <= numero <= self.listagem else None
+
+    def _completar(self, html):
+        """Preenche a página com texto até tamanho_pagina e fecha o HTML."""
+        faltando = self.tamanho_pagina - len(html) - len('</p></div></body></html>')
+        if faltando > 0:
+            texto = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. '
+            html += (texto * (faltando // len(texto) + 1))[:faltando]
+        html += '</p></div></body></html>'
+        return html.encode('utf-8')
+
+    def numero_da_tag(self, caminho):
+        if not caminho.startswith('/tag/'):
+            return None
+        try:
+            numero = int(caminho.strip('/').split('/')[1])
+        except (IndexError, ValueError):
+            return None
+        return numero if 0 <= numero < self.tags else None
+
+    def numero_da_pagina(self, caminho):
+        if caminho == '/':
+            return 0
+        if caminho.startswith('/pagina/'):
+            try:
+                numero = int(caminho.strip('/').split('/')[1])
+            except (IndexError, ValueError):
+                return None
+            return numero if 0 <= numero < self.paginas else None
+        return None
+
+
+class ServidorSiteFicticio:
+    """Serve um SiteFicticio em uma porta local, contando as requisições recebidas."""
+
+    def __init__(self, site, host='127.0.0.1', porta=0):
+        self.site = site
+        self.requisicoes = 0
+        self.recusadas = 0
+        self.em_andamento = 0
+        self.paginas_servidas = []  # magnets de cada página servida, na ordem, para medir a ordem de visita
+        self.lock = threading.Lock()
+
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with servidor.lock:
+                    servidor.requisicoes += 1
+                    limite = servidor.site.max_simultaneas
+                    if limite and servidor.em_andamento >= limite:
+                        servidor.recusadas += 1
+                        recusar = True
+                    else:
+                        servidor.em_andamento += 1
+                        recusar = False
+                if recusar:
+                    self._responder(429, b'Too Many Requests', 'text/plain', {'Retry-After': '1'})
+                    return
+                try:
+                    self._atender()
+                finally:
+                    with servidor.lock:
+                        servidor.em_andamento -= 1
+
+            def _atender(self):
+                if servidor.site.latencia:
+                    time.sleep(servidor.site.latencia)
+                if servidor.site.proporcao_lentas and random.random() < servidor.site.proporcao_lentas:
+                    time.sleep(servidor.site.latencia_lenta)
+
+                caminho, _, query = self.path.partition('?')
+                ordem = parse_qs(query).get('ordem', [None])[0]
+                if caminho == '/robots.txt':
+                    self._responder(200, b'User-agent: *\nAllow: /\n', 'text/plain')
+                    return
+                tag = servidor.site.numero_da_tag(caminho)
+                if tag is not None:
+                    with servidor.lock:
+                        servidor.paginas_servidas.append([])
+                    self._responder(200, servidor.site.html_tag(tag), 'text/html; charset=utf-8')
+                    return
+                listagem = servidor.site.numero_da_listagem(caminho)
+                if listagem is not None:
+                    with servidor.lock:
+                        servidor.paginas_servidas.append(servidor.site._magnets_por_listagem[listagem - 1])
+                    self._responder(200, servidor.site.html_listagem(listagem), 'text/html; charset=utf-8')
+                    return
+                numero = servidor.site.numero_da_pagina(caminho)
+                if numero is None:
+                    self._responder(404, b'<html><body>Nao encontrado</body></html>', 'text/html; charset=utf-8')
+                    return
+                with servidor.lock:
+                    servidor.paginas_servidas.append(servidor.site._magnets_por_pagina[numero])
+                self._responder(200, servidor.site.html_pagina(numero, ordem), 'text/html; charset=utf-8')
+
+            def _responder(self, status, corpo, content_type, cabecalhos=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(corpo)))
+                for nome, valor in (cabecalhos or {}).items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, porta), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://{host}:{self.httpd.server_address[1]}/'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='SiteFicticio', daemon=True)
+
+    def iniciar(self):
+        self.thread.start()
+        return self.url
+
+    def parar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def zerar_contadores(self):
+        with self.lock:
+            self.requisicoes = 0
+            self.recusadas = 0
+            self.paginas_servidas = []
+
+    def requisicoes_ate(self, fracao):
+        """Quantas páginas (de qualquer tipo) foram servidas até os magnets servidos chegarem a `fracao` do site."""
+        esperados = self.site.magnets_esperados()
+        vistos = set()
+        with self.lock:
+            servidas = list(self.paginas_servidas)
+        for quantidade, magnets in enumerate(servidas, 1):
+            vistos.update(magnets)
+            if len(vistos) >= fracao * len(esperados):
+                return quantidade
+        return None
+
+
+@contextmanager
+def servir_site_ficticio(site):
+    """Context manager que sobe o servidor local e devolve (url_base, servidor)."""
+    servidor = ServidorSiteFicticio(site)
+    servidor.iniciar()
+    try:
+        yield servidor.url, servidor
+    finally:
+        servidor.parar()
+
+
+if __name__ == "__main__":
+    site = SiteFicticio()
+    with servir_site_ficticio(site) as (url, _):
+        print(f"🌐 Site fictício com {site.paginas} páginas em {url}")
+        print(f"🔗 {len(site.magnets_esperados())} magnets publicados. Ctrl+C para parar.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,171 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# ==============================================================================
+# qBittorrent FICTÍCIO PARA TESTAR A ENTREGA DIRETA (cliente_qbittorrent.py)
+#
+# Implementa só o pedaço da Web API v2 usado pelo cliente: auth/login,
+# torrents/add (multipart) e torrents/info?hashes=. Pode simular instabilidade
+# (as N primeiras chamadas de torrents/add respondem 503) e latência.
+#
+# Uso:
+#   python benchmarks/stub_qbittorrent.py              # autoteste do cliente
+#   python benchmarks/stub_qbittorrent.py --falhas 3   # com o servidor instável
+# ==============================================================================
+
+
+class ServidorQBittorrentFicticio:
+    """Guarda os torrents adicionados por infohash e conta as chamadas recebidas."""
+
+    def __init__(self, usuario="admin", senha="adminadmin", falhas_iniciais=0, latencia=0.0,
+                 host='127.0.0.1', porta=0):
+        self.usuario = usuario
+        self.senha = senha
+        self.falhas_restantes = falhas_iniciais
+        self.latencia = latencia
+        self.torrents = {}  # hash (hex minúsculo) -> magnet
+        self.adicoes_repetidas = 0
+        self.chamadas = {'login': 0, 'add': 0, 'info': 0}
+        self.sessoes = set()
+        self.lock = threading.Lock()
+
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _sessao_valida(self):
+                cookies = self.headers.get('Cookie', '')
+                return any(c.strip().startswith('SID=') and c.strip()[4:] in servidor.sessoes
+                           for c in cookies.split(';'))
+
+            def _corpo(self):
+                return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+            def do_GET(self):
+                partes = urlsplit(self.path)
+                if partes.path != '/api/v2/torrents/info':
+                    return self._responder(404, b'Not Found')
+                if not self._sessao_valida():
+                    return self._responder(403, b'Forbidden')
+                with servidor.lock:
+                    servidor.chamadas['info'] += 1
+                    filtro = parse_qs(partes.query).get('hashes')
+                    hashes = filtro[0].lower().split('|') if filtro else list(servidor.torrents)
+                    encontrados = [h for h in hashes if h in servidor.torrents]
+                corpo = ('[' + ','.join(f'{{"hash": "{h}"}}' for h in encontrados) + ']').encode()
+                self._responder(200, corpo, 'application/json')
+
+            def do_POST(self):
+                corpo = self._corpo()
+                if self.path == '/api/v2/auth/login':
+                    with servidor.lock:
+                        servidor.chamadas['login'] += 1
+                    dados = parse_qs(corpo.decode())
+                    if dados.get('username') == [servidor.usuario] and dados.get('password') == [servidor.senha]:
+                        sid = uuid.uuid4().hex
+                        servidor.sessoes.add(sid)
+                        return self._responder(200, b'Ok.', cookie=f'SID={sid}; HttpOnly; path=/')
+                    return self._responder(200, b'Fails.')
+                if self.path != '/api/v2/torrents/add':
+                    return self._responder(404, b'Not Found')
+                if not self._sessao_valida():
+                    return self._responder(403, b'Forbidden')
+                if servidor.latencia:
+                    time.sleep(servidor.latencia)
+                with servidor.lock:
+                    servidor.chamadas['add'] += 1
+                    if servidor.falhas_restantes > 0:
+                        servidor.falhas_restantes -= 1
+                        return self._responder(503, b'Service Unavailable')
+                mensagem = BytesParser(policy=HTTP).parsebytes(
+                    b'Content-Type: ' + self.headers['Content-Type'].encode() + b'\r\n\r\n' + corpo)
+                campos = {parte.get_param('name', header='content-disposition'): parte.get_content()
+                          for parte in mensagem.iter_parts()}
+                with servidor.lock:
+                    for magnet in campos.get('urls', '').splitlines():
+                        infohash = magnet.split('xt=urn:btih:', 1)[-1][:40].lower()
+                        if infohash in servidor.torrents:
+                            servidor.adicoes_repetidas += 1
+                        servidor.torrents[infohash] = magnet
+                self._responder(200, b'Ok.')
+
+            def _responder(self, status, corpo, content_type='text/plain; charset=UTF-8', cookie=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(corpo)))
+                if cookie:
+                    self.send_header('Set-Cookie', cookie)
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, porta), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://{host}:{self.httpd.server_address[1]}'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='qBittorrentFicticio', daemon=True)
+
+    def iniciar(self):
+        self.thread.start()
+        return self.url
+
+    def parar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@contextmanager
+def servir_qbittorrent_ficticio(**opcoes):
+    """Context manager que sobe o qBittorrent fictício e devolve (url, servidor)."""
+    servidor = ServidorQBittorrentFicticio(**opcoes)
+    servidor.iniciar()
+    try:
+        yield servidor.url, servidor
+    finally:
+        servidor.parar()
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    from cliente_qbittorrent import ClienteQBittorrent
+    from parser_magnet import analisar_magnet
+    from site_ficticio import SiteFicticio
+
+    parser = argparse.ArgumentParser(description='Autoteste da entrega ao qBittorrent contra um servidor fictício.')
+    parser.add_argument('--magnets', type=int, default=500)
+    parser.add_argument('--falhas', type=int, default=0, help='Chamadas de torrents/add que respondem 503')
+    parser.add_argument('--latencia', type=float, default=0.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+
+    site = SiteFicticio(paginas=max(1, args.magnets // 4), magnets_por_pagina=5)
+    magnets = sorted(site.magnets_esperados())[:args.magnets]
+    with servir_qbittorrent_ficticio(falhas_iniciais=args.falhas, latencia=args.latencia) as (url, servidor):
+        cliente = ClienteQBittorrent(url, espera_lote=0.2, espera_base=0.05).conectar()
+        inicio = time.perf_counter()
+        for magnet in magnets + magnets[:50]:  # os repetidos não devem sair de novo
+            cliente.enviar(analisar_magnet(magnet))
+        entregues, falhas = cliente.fechar()
+        duracao = time.perf_counter() - inicio
+
+        print(f"🧲 {entregues} magnets entregues em {duracao:.2f}s, {servidor.chamadas['add']} chamadas a torrents/add")
+        print(f"   {len(servidor.torrents)} torrents no servidor, {servidor.adicoes_repetidas} adições repetidas, {len(falhas)} falhas")
+        ok = len(servidor.torrents) == len(magnets) and servidor.adicoes_repetidas == 0 and not falhas
+        print("✅ Entrega idempotente e completa" if ok else "❌ Resultado inesperado")
+        sys.exit(0 if ok else 1)
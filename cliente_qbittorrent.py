@@ -0,0 +1,198 @@
+import logging
+import random
+import threading
+import time
+from queue import Queue, Empty
+
+import requests
+
+# ==============================================================================
+# ENTREGA DIRETA AO qBittorrent (Web API v2)
+#
+# Em vez de importar links-novos.txt à mão, os magnets novos são enviados ao
+# qBittorrent enquanto a varredura acontece. Uma thread própria junta os links
+# em lotes (um POST /api/v2/torrents/add com vários magnets), sempre pela mesma
+# sessão HTTP, e reenvia com espera exponencial quando o cliente está fora do
+# ar. O envio é idempotente por infohash: antes de cada tentativa os hashes do
+# lote são conferidos em /api/v2/torrents/info, então um lote que chegou mas
+# cuja resposta se perdeu não é adicionado duas vezes.
+#
+# Uso:
+#   cliente = ClienteQBittorrent("http://127.0.0.1:8080", "admin", "senha")
+#   cliente.conectar()
+#   cliente.enviar(info)        # MagnetInfo do parser_magnet
+#   cliente.fechar()            # entrega o que falta e para a thread
+# ==============================================================================
+
+_FIM = object()
+
+
+class ErroQBittorrent(Exception):
+    pass
+
+
+class ClienteQBittorrent:
+    """Envia magnets novos ao qBittorrent em lotes, em segundo plano."""
+
+    def __init__(self, url="http://127.0.0.1:8080", usuario="admin", senha="adminadmin",
+                 categoria=None, pasta_destino=None, pausado=False,
+                 tamanho_lote=50, espera_lote=1.0, tentativas=5, espera_base=0.5, timeout=10):
+        self.url = url.rstrip('/')
+        self.usuario = usuario
+        self.senha = senha
+        self.categoria = categoria
+        self.pasta_destino = pasta_destino
+        self.pausado = pausado
+        self.tamanho_lote = tamanho_lote
+        self.espera_lote = espera_lote
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        # O qBittorrent recusa requisições com Referer/Origin de outro host (proteção CSRF)
+        self.session.headers.update({'Referer': self.url})
+
+        self.fila = Queue()
+        self.lock = threading.Lock()
+        self.conhecidos = set()  # infohashes (hex minúsculo) já no cliente ou já enfileirados
+        self.entregues = 0
+        self.falhas = []  # magnets que não puderam ser entregues após todas as tentativas
+        # Sinalizado por fechar() quando o prazo acaba: a thread para de tentar e devolve o que falta
+        self.parar = threading.Event()
+        self.thread = threading.Thread(target=self._entregar, name="qBittorrent", daemon=True)
+
+    # --- SESSÃO ---
+
+    def _login(self):
+        resposta = self.session.post(f"{self.url}/api/v2/auth/login",
+                                     data={'username': self.usuario, 'password': self.senha},
+                                     timeout=self.timeout)
+        if resposta.status_code != 200 or resposta.text.strip() != 'Ok.':
+            raise ErroQBittorrent(f"login recusado pelo qBittorrent (HTTP {resposta.status_code})")
+
+    def _requisicao(self, metodo, caminho, **kwargs):
+        """Faz a requisição na sessão aberta; refaz o login uma vez se a sessão expirou."""
+        resposta = self.session.request(metodo, f"{self.url}{caminho}", timeout=self.timeout, **kwargs)
+        if resposta.status_code == 403:
+            self._login()
+            resposta = self.session.request(metodo, f"{self.url}{caminho}", timeout=self.timeout, **kwargs)
+        if resposta.status_code >= 500:
+            raise requests.exceptions.HTTPError(f"HTTP {resposta.status_code}", response=resposta)
+        if resposta.status_code != 200:
+            raise ErroQBittorrent(f"{caminho} respondeu HTTP {resposta.status_code}")
+        return resposta
+
+    def conectar(self):
+        """Faz o login, carrega os hashes que já estão no cliente e inicia a thread de entrega."""
+        self._login()
+        torrents = self._requisicao('GET', "/api/v2/torrents/info").json()
+        with self.lock:
+            self.conhecidos.update(t['hash'].lower() for t in torrents if t.get('hash'))
+        logging.info(f"🧲 Conectado ao qBittorrent em {self.url} ({len(torrents)} torrents já no cliente).")
+        self.thread.start()
+        return self
+
+    # --- ENTREGA ---
+
+    def enviar(self, info):
+        """Enfileira um magnet (MagnetInfo). Retorna False se o infohash já foi enviado ou já existe."""
+        infohash = info.infohash.hex()
+        with self.lock:
+            if infohash in self.conhecidos:
+                return False
+            self.conhecidos.add(infohash)
+        self.fila.put((infohash, info.uri))
+        return True
+
+    def _proximo_lote(self):
+        """Espera o primeiro magnet e junta os que chegarem em até espera_lote segundos."""
+        primeiro = self.fila.get()
+        if primeiro is _FIM:
+            return None, True
+        lote = [primeiro]
+        limite = time.monotonic() + self.espera_lote
+        while len(lote) < self.tamanho_lote:
+            restante = limite - time.monotonic()
+            try:
+                item = self.fila.get(timeout=max(restante, 0)) if restante > 0 else self.fila.get_nowait()
+            except Empty:
+                break
+            if item is _FIM:
+                return lote, True
+            lote.append(item)
+        return lote, False
+
+    def _entregar(self):
+        terminar = False
+        while not terminar:
+            lote, terminar = self._proximo_lote()
+            if lote:
+                self._enviar_lote(lote)
+
+    def _ja_no_cliente(self, hashes):
+        resposta = self._requisicao('GET', "/api/v2/torrents/info", params={'hashes': '|'.join(hashes)})
+        return {t['hash'].lower() for t in resposta.json() if t.get('hash')}
+
+    def _enviar_lote(self, lote):
+        for tentativa in range(self.tentativas):
+            if self.parar.is_set():
+                break
+            try:
+                presentes = self._ja_no_cliente([infohash for infohash, _ in lote])
+                faltando = [(infohash, uri) for infohash, uri in lote if infohash not in presentes]
+                if faltando:
+                    # multipart/form-data, como a API espera: um magnet por linha no campo 'urls'
+                    campos = {'urls': (None, '\n'.join(uri for _, uri in faltando))}
+                    if self.categoria:
+                        campos['category'] = (None, self.categoria)
+                    if self.pasta_destino:
+                        campos['savepath'] = (None, self.pasta_destino)
+                    if self.pausado:
+                        # 'paused' até o qBittorrent 4.6, 'stopped' a partir do 5.0 (cada um ignora o outro)
+                        campos['paused'] = (None, 'true')
+                        campos['stopped'] = (None, 'true')
+                    resposta = self._requisicao('POST', "/api/v2/torrents/add", files=campos)
+                    if resposta.text.strip() != 'Ok.':
+                        logging.warning(f"⚠️ qBittorrent não aceitou parte do lote: {resposta.text.strip()}")
+                with self.lock:
+                    self.entregues += len(faltando)
+                logging.info(f"🧲 {len(faltando)} magnets enviados ao qBittorrent ({len(lote) - len(faltando)} já existiam).")
+                return True
+            except (requests.exceptions.RequestException, ValueError) as e:
+                espera = min(self.espera_base * 2 ** tentativa, 30) * random.uniform(0.5, 1.5)
+                logging.warning(f"⚠️ Falha ao enviar lote ao qBittorrent ({e}). Nova tentativa em {espera:.1f}s...")
+                if self.parar.wait(espera):
+                    break
+            except ErroQBittorrent as e:
+                logging.error(f"❌ qBittorrent recusou o lote: {e}")
+                break
+        with self.lock:
+            self.falhas.extend(uri for _, uri in lote)
+        logging.error(f"❌ {len(lote)} magnets não foram entregues ao qBittorrent.")
+        return False
+
+    def fechar(self, timeout=60):
+        """Entrega o que ainda está na fila e para a thread. Retorna (entregues, falhas).
+
+        Se a entrega não terminar em `timeout` segundos, a thread deixa de tentar de novo
+        e os magnets que faltam entram em falhas; a sessão só é fechada depois que ela sai.
+        """
+        if self.thread.is_alive():
+            self.fila.put(_FIM)
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                logging.warning("⚠️ qBittorrent não recebeu tudo no prazo; os magnets restantes ficam como falhas.")
+                self.parar.set()
+                self.thread.join()
+        # Só sobra algo na fila se a thread nunca rodou (ex.: conectar() falhou)
+        while True:
+            try:
+                item = self.fila.get_nowait()
+            except Empty:
+                break
+            if item is not _FIM:
+                with self.lock:
+                    self.falhas.append(item[1])
+        self.session.close()
+        return self.entregues, list(self.falhas)
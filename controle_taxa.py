@@ -0,0 +1,148 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# ==============================================================================
+# CONTROLE ADAPTATIVO DE CONCORRÊNCIA POR HOST (AIMD)
+#
+# Em vez de um número fixo de threads e um delay fixo por requisição, cada host
+# tem um limite de requisições simultâneas e um intervalo mínimo entre o início
+# de duas requisições, ajustados pelo que o servidor responde:
+#
+#   - aumento aditivo: a cada "janela" de respostas boas (tantas quanto o limite
+#     atual) o limite sobe 1 e o intervalo cai 10%;
+#   - redução multiplicativa: um 429/503, um timeout/erro de conexão ou uma
+#     latência muito acima da melhor já vista cortam o limite pela metade (e, nas
+#     recusas, dobram o intervalo). Só uma redução por janela: as requisições que
+#     já estavam no ar quando o corte aconteceu não cortam de novo;
+#   - Retry-After (em segundos ou data HTTP) pausa o host inteiro até o horário pedido.
+#
+# Tudo fica entre os limites dados pelo usuário (min/max simultâneas, delay min/max).
+#
+# Uso:
+#   controle = ControleAdaptativo(max_simultaneas=8, delay_inicial=1.0, delay_min=0.2)
+#   inicio = controle.adquirir()          # espera uma vaga e o intervalo do host
+#   resposta = None
+#   try:
+#       resposta = session.get(url)
+#   finally:
+#       controle.liberar(inicio, resposta)  # None = timeout/erro de conexão
+# ==============================================================================
+
+STATUS_RECUSA = (429, 503)
+
+
+def ler_retry_after(valor):
+    """Segundos pedidos pelo cabeçalho Retry-After (número ou data HTTP), ou None."""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        data = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, data.timestamp() - time.time())
+
+
+class ControleAdaptativo:
+    """Limite de simultâneas e intervalo entre requisições de um host, ajustados por AIMD."""
+
+    def __init__(self, max_simultaneas=5, min_simultaneas=1, delay_inicial=1.0, delay_min=0.0,
+                 delay_max=30.0, fator_latencia=3.0, max_retry_after=600):
+        self.max_simultaneas = max(1, max_simultaneas)
+        self.min_simultaneas = max(1, min(min_simultaneas, self.max_simultaneas))
+        self.delay_min = delay_min
+        self.delay_max = max(delay_max, delay_min)
+        self.fator_latencia = fator_latencia
+        self.max_retry_after = max_retry_after
+
+        self.limite = float(self.min_simultaneas)  # começa devagar e sobe com as respostas boas
+        self.delay = min(max(delay_inicial, self.delay_min), self.delay_max)
+        self.ativas = 0
+        self.proximo_inicio = 0.0  # time.monotonic() a partir do qual a próxima requisição pode sair
+        self.latencia_media = None
+        self.latencia_base = None  # menor latência média vista: a referência de host "folgado"
+        self.ultima_reducao = 0.0
+        self.respostas_na_janela = 0
+        self.recusas = 0
+        self.condicao = threading.Condition()
+
+    def adquirir(self):
+        """Espera uma vaga e o intervalo mínimo do host. Retorna o instante de início (para liberar)."""
+        with self.condicao:
+            while True:
+                agora = time.monotonic()
+                if self.ativas < int(self.limite) and agora >= self.proximo_inicio:
+                    break
+                espera = self.proximo_inicio - agora if self.ativas < int(self.limite) else None
+                self.condicao.wait(espera)
+            self.ativas += 1
+            self.proximo_inicio = agora + self.delay
+            return agora
+
+    def tentar_adquirir(self):
+        """Como adquirir(), mas sem esperar: None se não há vaga ou o intervalo ainda não passou."""
+        with self.condicao:
+            agora = time.monotonic()
+            if self.ativas >= int(self.limite) or agora < self.proximo_inicio:
+                return None
+            self.ativas += 1
+            self.proximo_inicio = agora + self.delay
+            return agora
+
+    def liberar(self, inicio, resposta=None):
+        """Devolve a vaga e ajusta limite/intervalo pela resposta (None = timeout ou erro de conexão)."""
+        agora = time.monotonic()
+        with self.condicao:
+            self.ativas -= 1
+            if resposta is None:
+                self._reduzir(inicio, recusa=False)
+            elif resposta.status_code in STATUS_RECUSA:
+                self.recusas += 1
+                espera = ler_retry_after(resposta.headers.get('Retry-After'))
+                if espera is not None:
+                    self.proximo_inicio = max(self.proximo_inicio, agora + min(espera, self.max_retry_after))
+                self._reduzir(inicio, recusa=True)
+            else:
+                self._registrar_latencia(agora - inicio)
+                if self.latencia_media > self.fator_latencia * self.latencia_base:
+                    self._reduzir(inicio, recusa=False)
+                else:
+                    self._aumentar()
+            self.condicao.notify_all()
+
+    def _registrar_latencia(self, latencia):
+        if self.latencia_media is None:
+            self.latencia_media = latencia
+        else:
+            self.latencia_media = 0.8 * self.latencia_media + 0.2 * latencia
+        # A referência sobe 1% por resposta quando o host fica mais lento de vez, para não
+        # cortar o limite para sempre. Piso de 50ms: em rede local variações de poucos
+        # milissegundos não são sobrecarga.
+        base = self.latencia_base * 1.01 if self.latencia_base else self.latencia_media
+        self.latencia_base = max(min(base, self.latencia_media), 0.05)
+
+    def _aumentar(self):
+        self.respostas_na_janela += 1
+        if self.respostas_na_janela >= int(self.limite):
+            self.respostas_na_janela = 0
+            self.limite = min(self.limite + 1, self.max_simultaneas)
+            self.delay = max(self.delay * 0.9, self.delay_min)
+
+    def _reduzir(self, inicio, recusa):
+        if inicio < self.ultima_reducao:
+            return  # requisição da janela que já causou um corte
+        self.ultima_reducao = time.monotonic()
+        self.respostas_na_janela = 0
+        self.limite = max(self.limite / 2, self.min_simultaneas)
+        if recusa:
+            # Sem delay nenhum (delay_min 0) a recusa ainda impõe um intervalo de 100ms
+            self.delay = min(max(self.delay * 2, self.delay_min, 0.1), self.delay_max)
+
+    def resumo(self):
+        with self.condicao:
+            return (f"{int(self.limite)} simultâneas, {self.delay:.2f}s entre requisições, "
+                    f"{self.recusas} recusas (429/503)")
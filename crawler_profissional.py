@@ -1,27 +1,58 @@
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse, unquote
+from urllib.parse import urljoin, urlparse
 import urllib.robotparser
-import re
 import time
 import os
 import json
 import threading
-from queue import Queue, Empty
-from collections import deque
+from collections import Counter, deque
 import logging
 
+from parser_magnet import extrair_hash, extrair_nome, mesclar_magnets
+from regras_categorias import MotorRegras
+from relatorios import RelatorioCategorias
+from banco_resultados import BancoResultados, importar_historico_txt
+from cliente_qbittorrent import ClienteQBittorrent, ErroQBittorrent
+from pipeline_parsing import PipelineParsing, analisar_pagina
+from fronteira import EstatisticasPadroes, FilaPorPadrao, FilaRastreamento
+from perfis_extracao import ARQUIVO_PERFIS, carregar_perfis, perfil_do_site
+from paginacao import DetectorPaginacao
+from arquivo_warc import GravadorWARC, arquivos_warc, ler_respostas
+from similaridade import DetectorQuaseDuplicadas
+from controle_taxa import ControleAdaptativo
+from retentativas import PoliticaRetentativas, falha_temporaria
+from requisicoes_http import (Disjuntor, CircuitoAberto, RequisicoesDeReserva, Vigia, AdaptadorCacheDNS, CacheDNS,
+                              baixar_com_prazo, preaquecer_conexoes)
+from fronteira_distribuida import FronteiraDistribuida, PENDENTE, EM_ANDAMENTO, CONCLUIDO
+
 # ==============================================================================
 # CONFIGURAÇÃO DO LOG
+# (não nos processos de parsing, que no Windows reimportam este módulo como
+# __mp_main__ e truncariam o crawler.log do processo principal)
 # ==============================================================================
-logging.basicConfig(
-    level=logging.INFO,  # Mude para logging.DEBUG para ver informações detalhadas
-    format='%(asctime)s - %(levelname)s - [%(threadName)s] - %(message)s',
-    handlers=[
-        logging.FileHandler("crawler.log", mode='w', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+if __name__ != "__mp_main__":
+    logging.basicConfig(
+        level=logging.INFO,  # Mude para logging.DEBUG para ver informações detalhadas
+        format='%(asctime)s - %(levelname)s - [%(threadName)s] - %(message)s',
+        handlers=[
+            # delay=True: o arquivo só é aberto no primeiro log, então um nó da varredura
+            # distribuída pode trocar de arquivo (usar_arquivo_de_log) sem truncar o crawler.log
+            logging.FileHandler("crawler.log", mode='w', encoding='utf-8', delay=True),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def usar_arquivo_de_log(nome):
+    """Troca o arquivo do log (ex.: um por nó da varredura distribuída)."""
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        if isinstance(handler, logging.FileHandler):
+            raiz.removeHandler(handler)
+            handler.close()
+            novo = logging.FileHandler(nome, mode='w', encoding='utf-8')
+            novo.setFormatter(handler.formatter)
+            raiz.addHandler(novo)
 
 # ==============================================================================
 # CRAWLER PROFISSIONAL - VERSÃO UNIFICADA
@@ -35,63 +66,102 @@ class CrawlerProfissional:
         self.arquivo_baixados = "links-baixados.txt"
         self.arquivo_todos = "links-magnetic-download.txt"
         
-        self.links_ja_capturados = set()
+        self.regras = MotorRegras.do_arquivo("audio")
+        # Seletores de links e magnets por site (perfis_sites.json); os outros sites usam a extração genérica
+        self.perfis = carregar_perfis(config.get('perfis_extracao', ARQUIVO_PERFIS))
+        # Os arquivos links-<categoria>.txt são escritos durante a varredura
+        self.relatorio_categorias = RelatorioCategorias(self.regras)
+        # Todos os magnets vistos ficam em resultados.db; os .txt são gerados a partir dele
+        self.banco = BancoResultados()
+        importar_historico_txt(self.banco, [self.arquivo_baixados, self.arquivo_todos], self.regras)
+        
+        self.hashes_ja_capturados = set()
+        self.lock_historico = threading.Lock()
         self.carregar_links_existentes()
         
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # Opcional: nomes dos sites resolvidos uma vez e guardados pelo TTL (requisicoes_http.py)
+        if config.get('cache_dns'):
+            adaptador = AdaptadorCacheDNS(CacheDNS(**config['cache_dns']), pool_maxsize=max(config['max_threads'] * 2, 10))
+            self.session.mount('http://', adaptador)
+            self.session.mount('https://', adaptador)
+
+        # Opcional: o parsing das páginas roda em um pool separado das threads de rede
+        # (processos, subinterpretadores ou, no Python sem GIL, threads)
+        self.pipeline = None
+        if config.get('trabalhadores_parsing'):
+            self.pipeline = PipelineParsing(config['trabalhadores_parsing'], config.get('modo_parsing', 'auto'))
+
+        # Opcional: toda resposta baixada é gravada em arquivos .warc.gz (por uma thread separada)
+        self.gravador_warc = GravadorWARC(**config['gravar_warc']) if config.get('gravar_warc') else None
+
+        # Opcional: links novos vão direto para o qBittorrent durante a varredura
+        self.qbittorrent = None
+        if config.get('qbittorrent'):
+            try:
+                self.qbittorrent = ClienteQBittorrent(**config['qbittorrent']).conectar()
+            except (requests.exceptions.RequestException, ErroQBittorrent) as e:
+                logging.warning(f"⚠️ qBittorrent indisponível ({e}). Os links novos ficarão apenas nos arquivos.")
 
     # --- MÉTODOS DE GERENCIAMENTO DE HISTÓRICO E FILTRAGEM ---
 
     def carregar_links_existentes(self):
-        """Carrega todos os links de execuções anteriores para evitar duplicatas."""
+        """Carrega os hashes de execuções anteriores (banco + arquivos .txt) para evitar duplicatas."""
+        self.hashes_ja_capturados.update(self.banco.carregar_hashes())
+        # links-baixados.txt é editado à mão, então os .txt continuam sendo lidos
         for arquivo in [self.arquivo_baixados, self.arquivo_todos]:
             if os.path.exists(arquivo):
                 with open(arquivo, 'r', encoding='utf-8') as f:
                     for linha in f:
                         if linha.strip().startswith('magnet:'):
-                            self.links_ja_capturados.add(linha.strip())
-        logging.info(f"📚 Total de {len(self.links_ja_capturados)} links únicos na base de dados histórica.")
+                            hash_magnet = extrair_hash(linha.strip())
+                            if hash_magnet: self.hashes_ja_capturados.add(hash_magnet)
+        logging.info(f"📚 Total de {len(self.hashes_ja_capturados)} links únicos na base de dados histórica.")
 
     def extrair_hash_magnet(self, magnet_link):
-        """Extrai o hash BTIH de um link magnético para comparação."""
-        hash_match = re.search(r'xt=urn:btih:([a-zA-Z0-9]{32,40})', magnet_link, re.IGNORECASE)
-        return hash_match.group(1).upper() if hash_match else None
+        """Extrai o hash BTIH (hex maiúsculo) de um link magnético para comparação."""
+        return extrair_hash(magnet_link)
 
     def eh_link_novo(self, magnet_link):
         """Verifica se um link é novo comparando seu hash com os já salvos."""
         novo_hash = self.extrair_hash_magnet(magnet_link)
         if not novo_hash: return False
-        return not any(self.extrair_hash_magnet(link) == novo_hash for link in self.links_ja_capturados)
+        return novo_hash not in self.hashes_ja_capturados
 
     def deve_ignorar_link(self, nome_link):
         """Verifica se o link deve ser ignorado com base em palavras-chave de baixa qualidade."""
-        # Removemos a restrição de \b (palavra exata) para pegar variações como 'camrip'
-        palavras_para_ignorar = ['cam', 'hdcam', 'ts', 'hdts', 'telesync', 'subbed']
-        nome_lower = nome_link.lower()
-        return any(palavra in nome_lower for palavra in palavras_para_ignorar)
+        # As palavras ficam em regras_categorias.json; sem 'palavra_inteira' elas pegam
+        # variações como 'camrip'.
+        return self.regras.deve_ignorar(nome_link)
 
     def salvar_link_novo(self, magnet_link, links_novos_encontrados):
-        """Salva um novo link magnético se ele não existir no histórico."""
-        if not self.eh_link_novo(magnet_link): return False
-        
-        links_novos_encontrados.add(magnet_link)
-        self.links_ja_capturados.add(magnet_link)
-        
-        with open(self.arquivo_novos, 'a', encoding='utf-8') as f: f.write(magnet_link + '\n')
-        with open(self.arquivo_todos, 'a', encoding='utf-8') as f: f.write(magnet_link + '\n')
+        """Marca um link como novo se ele não existir no histórico.
+
+        O link só vai para links-novos.txt / links-magnetic-download.txt no fim da busca,
+        a partir do banco (ver registrar_link_encontrado e exportar_pendentes).
+        """
+        with self.lock_historico:
+            if not self.eh_link_novo(magnet_link): return False
+            
+            links_novos_encontrados.add(magnet_link)
+            self.hashes_ja_capturados.add(self.extrair_hash_magnet(magnet_link))
         return True
 
     # --- MOTOR DE VARREDURA PROFUNDA ---
 
-    def processar_site(self, site_url):
+    def processar_site(self, site_url, fila=None):
         """Orquestra a varredura completa de um único site."""
         logging.info(f"{ '='*20} PROCESSANDO SITE: {site_url} { '='*20}")
-        scanner = SiteScanner(site_url, self)
+        scanner = SiteScanner(site_url, self, fila)
         novos_links_count, todos_links_site = scanner.iniciar_varredura()
+        self.banco.salvar()
         logging.info(f"📊 Site {site_url} finalizado: {novos_links_count} novos links encontrados.")
+        if scanner.quase_duplicadas:
+            logging.info(f"👯 {scanner.quase_duplicadas.duplicadas} de {scanner.quase_duplicadas.paginas} páginas "
+                         f"de {site_url} eram quase duplicadas (links delas não foram seguidos).")
         return novos_links_count, todos_links_site
 
     # --- GERENCIAMENTO E EXECUÇÃO ---
@@ -117,96 +187,282 @@ class CrawlerProfissional:
         sites = self.carregar_sites_para_busca()
         if not sites: return
 
-        links_novos_geral = set()
-        todos_os_links_da_execucao = set()
+        total_novos_links = 0
         
-        for site in sites:
-            novos_links_count, todos_links_site = self.processar_site(site)
-            # A função salvar_link_novo já adiciona em links_novos_geral, mas fazemos aqui para garantir consistência
-            # Na verdade, a responsabilidade deveria ser de quem chama, vamos ajustar
-            todos_os_links_da_execucao.update(todos_links_site)
-            logging.info(f"⏰ Aguardando {self.config['delay_entre_sites']}s antes de ir para o próximo site...")
-            time.sleep(self.config['delay_entre_sites'])
-
-        # Carrega os links novos do arquivo para garantir que temos todos
-        if os.path.exists(self.arquivo_novos):
-            with open(self.arquivo_novos, 'r', encoding='utf-8') as f:
-                links_novos_geral = {line.strip() for line in f}
+        try:
+            for site in sites:
+                novos_links_count, _ = self.processar_site(site)
+                total_novos_links += novos_links_count
+                logging.info(f"⏰ Aguardando {self.config['delay_entre_sites']}s antes de ir para o próximo site...")
+                time.sleep(self.config['delay_entre_sites'])
+        finally:
+            logging.info("\n📁 LINKS ENCONTRADOS POR CATEGORIAS:")
+            self.relatorio_categorias.fechar()
+            # Inclui links de uma execução anterior que tenha terminado antes de exportar
+            self.banco.exportar_pendentes([(self.arquivo_novos, 'w'), (self.arquivo_todos, 'a')])
+            if self.pipeline:
+                self.pipeline.fechar()
+            self.fechar_gravador_warc()
+            if self.qbittorrent:
+                entregues, falhas = self.qbittorrent.fechar()
+                logging.info(f"🧲 {entregues} links enviados ao qBittorrent ({len(falhas)} falharam e estão em {self.arquivo_novos}).")
 
         logging.info("\n" + "=" * 60)
         logging.info("🎉 BUSCA FINALIZADA!")
-        logging.info(f"🎯 Total de novos links encontrados nesta execução: {len(links_novos_geral)}")
-        logging.info(f"🔗 Total de links na base histórica: {len(self.links_ja_capturados)}")
-        
-        if todos_os_links_da_execucao:
-            logging.info("\n📁 ORGANIZANDO TODOS OS LINKS ENCONTRADOS POR CATEGORIAS:")
-            self.gerar_relatorio_categorias(todos_os_links_da_execucao)
+        logging.info(f"🎯 Total de novos links encontrados nesta execução: {total_novos_links}")
+        logging.info(f"🔗 Total de links na base histórica: {len(self.hashes_ja_capturados)}")
         
         logging.info(f"\n💾 Arquivos atualizados:")
         logging.info(f"   • {self.arquivo_novos} - Apenas os links novos desta busca.")
         logging.info(f"   • {self.arquivo_todos} - Todos os links já encontrados.")
+        logging.info(f"   • {self.banco.caminho} - Banco com todos os links, sites e datas.")
         logging.info(f"   • links-*.txt - Links encontrados nesta busca, organizados por categoria.")
 
+    def fechar_gravador_warc(self):
+        if self.gravador_warc:
+            self.gravador_warc.fechar()
+            logging.info(f"🗄️ {self.gravador_warc.resumo()}")
+
+    # --- REPROCESSAMENTO OFFLINE ---
+
+    def reprocessar_arquivos(self, caminhos):
+        """Passa as páginas gravadas em WARC (gravar_warc) de novo pela extração e categorização, sem rede.
+
+        Serve para aplicar regras novas (palavras ignoradas, categorias, perfis de extração)
+        ao que já foi baixado: o banco, os links-<categoria>.txt e o links-novos.txt são
+        atualizados como em uma busca, com a data em que cada página foi baixada. No fim,
+        mostra as páginas por segundo (o mesmo número serve de benchmark do parsing).
+        """
+        arquivos = arquivos_warc(caminhos)
+        if not arquivos:
+            logging.error(f"❌ Nenhum arquivo WARC encontrado em {', '.join(caminhos)}.")
+            if self.pipeline:
+                self.pipeline.fechar()
+            return
+        logging.info(f"🔁 REPROCESSANDO {len(arquivos)} arquivos WARC (sem rede)")
+        if os.path.exists(self.arquivo_novos): os.remove(self.arquivo_novos)
+
+        pipeline = self.pipeline or PipelineParsing(os.cpu_count() or 1, self.config.get('modo_parsing', 'auto'))
+        contagem = Counter()
+        categorias = {}
+        lock = threading.Lock()
+
+        def concluir(url, instante, magnets, erro):
+            if erro is not None:
+                logging.error(f"❌ Erro no parsing de {url}: {erro}")
+                return
+            links_novos = set()
+            site = urlparse(url).netloc
+            ignorados = 0
+            for info in magnets:
+                if self.deve_ignorar_link(info.nome or "Sem nome"):
+                    ignorados += 1
+                    continue
+                novo = self.salvar_link_novo(info.uri, links_novos)
+                categoria = self.registrar_link_encontrado(info, url, site, novo, quando=instante)
+                with lock:
+                    if categoria is not None:
+                        categorias[info.infohash] = categoria
+            with lock:
+                contagem.update(magnets=len(magnets), ignorados=ignorados, novos=len(links_novos))
+
+        inicio = time.perf_counter()
+        try:
+            for arquivo in arquivos:
+                for url, instante, status, cabecalhos, corpo in ler_respostas(arquivo):
+                    # Só as páginas que a busca teria analisado
+                    if status != 200 or 'text/html' not in cabecalhos.get('content-type', 'text/html'):
+                        continue
+                    with lock:
+                        contagem['paginas'] += 1
+                    pipeline.enviar(url, corpo, requests.utils.get_encoding_from_headers(cabecalhos),
+                                    lambda m, l, e, url=url, instante=instante: concluir(url, instante, m, e),
+                                    perfil_do_site(self.perfis, url))
+        finally:
+            # Espera o parsing das últimas páginas (os callbacks rodam antes de fechar() voltar)
+            pipeline.fechar()
+            self.pipeline = None
+            duracao = time.perf_counter() - inicio
+
+            # A categoria calculada agora substitui a antiga: as regras podem ter mudado
+            self.banco.atualizar_categorias(categorias)
+            logging.info("\n📁 LINKS ENCONTRADOS POR CATEGORIAS:")
+            self.relatorio_categorias.fechar()
+            self.banco.exportar_pendentes([(self.arquivo_novos, 'w'), (self.arquivo_todos, 'a')])
+            if self.qbittorrent:
+                entregues, falhas = self.qbittorrent.fechar()
+                logging.info(f"🧲 {entregues} links enviados ao qBittorrent ({len(falhas)} falharam e estão em {self.arquivo_novos}).")
+
+        logging.info("\n" + "=" * 60)
+        logging.info(f"⚡ {contagem['paginas']} páginas reprocessadas em {duracao:.1f}s "
+                     f"({contagem['paginas'] / max(duracao, 1e-9):.1f} páginas/s com {pipeline.trabalhadores} {pipeline.modo}).")
+        logging.info(f"🧲 {contagem['magnets']} magnets: {contagem['novos']} novos, {contagem['ignorados']} ignorados "
+                     f"pelas regras atuais, {len(categorias)} categorizados de novo.")
+        logging.info(f"🔗 Total de links na base histórica: {len(self.hashes_ja_capturados)}")
+
+    # --- VARREDURA DISTRIBUÍDA ---
+
+    def executar_coordenador(self, fronteira, reiniciar=True, intervalo=10):
+        """Semeia a fronteira compartilhada, acompanha os nós e exporta os links novos no final."""
+        logging.info("🚀 INICIANDO BUSCA DISTRIBUÍDA (coordenador)")
+        sites = self.carregar_sites_para_busca()
+        if not sites: return
+        fronteira.semear(sites, reiniciar=reiniciar)
+        logging.info(f"🗂️ {len(sites)} sites na fronteira {fronteira.caminho}. Inicie os nós com --no.")
+
+        try:
+            while not fronteira.terminou():
+                time.sleep(intervalo)
+                situacao = fronteira.situacao()
+                logging.info(f"📊 Sites: {situacao['hosts'].get(CONCLUIDO, 0)}/{len(sites)} concluídos, "
+                             f"{situacao['hosts'].get(EM_ANDAMENTO, 0)} em andamento | "
+                             f"URLs: {situacao['urls'].get(CONCLUIDO, 0)} visitadas, "
+                             f"{situacao['urls'].get(PENDENTE, 0)} na fila")
+        finally:
+            # Um único processo exporta, então cada link novo sai uma vez só
+            novos = self.banco.exportar_pendentes([(self.arquivo_novos, 'w'), (self.arquivo_todos, 'a')])
+            logging.info(f"🎯 {novos} links novos exportados para {self.arquivo_novos}.")
+
+    def executar_no(self, fronteira):
+        """Nó de trabalho: reserva um site por vez na fronteira até não sobrar nenhum."""
+        logging.info(f"🛰️ Nó {fronteira.no} conectado à fronteira {fronteira.caminho}")
+        # Arquivos por categoria separados por nó, para os processos não escreverem no mesmo arquivo
+        pasta = f"no_{fronteira.no}"
+        os.makedirs(pasta, exist_ok=True)
+        self.relatorio_categorias = RelatorioCategorias(self.regras, pasta)
+        total_novos_links = 0
+        try:
+            while True:
+                reserva = fronteira.reservar_host()
+                if reserva is None: break
+                host, site_url = reserva
+                # Links salvos por outros nós desde o início deste nó não contam como novos
+                with self.lock_historico:
+                    self.hashes_ja_capturados.update(self.banco.carregar_hashes())
+                novos_links_count, _ = self.processar_site(site_url, fronteira.fila(host))
+                fronteira.concluir_host(host)
+                total_novos_links += novos_links_count
+        finally:
+            fronteira.fechar()
+            self.relatorio_categorias.fechar()
+            self.banco.salvar()
+            if self.pipeline:
+                self.pipeline.fechar()
+            self.fechar_gravador_warc()
+            if self.qbittorrent:
+                self.qbittorrent.fechar()
+        logging.info(f"🏁 Nó {fronteira.no} sem sites pendentes: {total_novos_links} novos links encontrados.")
+
     # --- CATEGORIZAÇÃO E RELATÓRIOS ---
 
     def extrair_nome_magnet(self, magnet_link):
-        try:
-            nome_match = re.search(r'dn=([^&]+)', magnet_link)
-            return unquote(nome_match.group(1)) if nome_match else "Sem nome"
-        except: return "Sem nome"
+        return extrair_nome(magnet_link)
 
     def categorizar_link(self, magnet_link):
-        nome = self.extrair_nome_magnet(magnet_link).lower()
-        if any(p in nome for p in ['dual audio', 'dual.audio', 'dual-audio']): return "Dual-Audio"
-        if any(p in nome for p in ['dublado', 'dub', 'pt-br', 'pt br']): return "Dublado"
-        if any(p in nome for p in ['legendado', 'leg']): return "Legendado"
-        return "Outros"
-
-    def gerar_relatorio_categorias(self, links_para_categorizar):
-        """Gera arquivos .txt para cada categoria, usando a lista de links fornecida."""
-        logging.info(f"Gerando relatórios para {len(links_para_categorizar)} links.")
-        categorias = { "Dual-Audio": [], "Dublado": [], "Legendado": [], "Outros": [] }
-        
-        for link in links_para_categorizar:
-            categoria = self.categorizar_link(link)
-            if categoria not in categorias: categorias[categoria] = []
-            categorias[categoria].append(link)
-            
-        for categoria, links in categorias.items():
-            if links:
-                arquivo_categoria = f"links-{categoria.lower().replace(' ', '-')}.txt"
-                with open(arquivo_categoria, 'w', encoding='utf-8') as f:
-                    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-                    cabecalho = f"# Categoria: {categoria}\n# Total de links: {len(links)}\n# Gerado em: {timestamp}\n\n"
-                    f.write(cabecalho)
-                    for link in links:
-                        f.write(link + '\n')
-                logging.info(f"✅ Categoria [{categoria}] salva em '{arquivo_categoria}' com {len(links)} links.")
+        return self.regras.categorizar(self.extrair_nome_magnet(magnet_link))
+
+    def registrar_link_encontrado(self, info, url_origem, site, novo, quando=None):
+        """Grava o link (MagnetInfo) no banco e no arquivo da sua categoria assim que ele é encontrado.
+
+        A categoria só é calculada na primeira vez que o infohash aparece na execução;
+        nas outras o banco mantém a que já tem e apenas registra a nova fonte.
+        """
+        categoria = self.relatorio_categorias.adicionar(info)
+        if categoria is None and novo:
+            categoria = self.regras.categorizar(info.nome or "Sem nome")
+        # Links que já estavam nos .txt não precisam ser exportados de novo
+        self.banco.registrar(info, url_origem, site, categoria, exportado=not novo, quando=quando)
+        if novo and self.qbittorrent:
+            self.qbittorrent.enviar(info)
+        return categoria
 
 
 
 class SiteScanner:
-    def __init__(self, site_url, main_crawler):
+    def __init__(self, site_url, main_crawler, fila=None):
         self.main_crawler = main_crawler
         self.config = main_crawler.config
         self.site_url = site_url
         self.dominio_parseado = urlparse(site_url)
         
-        self.urls_para_visitar = Queue()
-        self.urls_para_visitar.put(site_url)
+        # Fila sem repetição com contador de URLs em andamento: a varredura termina
+        # assim que a última página é processada. Na varredura distribuída a fila
+        # vem da fronteira compartilhada (FilaDistribuida), com a mesma interface.
+        # Com "fronteira_por_padrao" as URLs dos padrões que mais renderam magnets
+        # (nesta varredura e nas anteriores) saem primeiro.
+        self.padroes = None
+        if self.config.get('fronteira_por_padrao'):
+            self.padroes = EstatisticasPadroes(main_crawler.banco.carregar_padroes(self.dominio_parseado.netloc))
+        if fila is not None:
+            self.urls_para_visitar = fila
+        elif self.padroes:
+            self.urls_para_visitar = FilaPorPadrao(self.padroes, [site_url])
+        else:
+            self.urls_para_visitar = FilaRastreamento([site_url])
+        # Páginas que falharam em todas as tentativas na execução anterior
+        for url in main_crawler.banco.retomar_falhas(self.dominio_parseado.netloc):
+            self.urls_para_visitar.adicionar(url)
+        self.retentativas = PoliticaRetentativas(**(self.config.get('retentativas') or {}))
+        self.disjuntor = Disjuntor(self.dominio_parseado.netloc, **(self.config.get('disjuntor') or {}))
+        self.timeout = (self.config.get('timeout_conexao', 10), self.config.get('timeout_leitura', 10))
+        opcoes_reserva = self.config.get('requisicoes_de_reserva')
+        self.reservas = RequisicoesDeReserva(self.config['max_threads'], **opcoes_reserva) if opcoes_reserva else None
+        opcoes_duplicadas = self.config.get('quase_duplicadas')
+        self.quase_duplicadas = DetectorQuaseDuplicadas(**opcoes_duplicadas) if opcoes_duplicadas else None
+        opcoes_paginacao = self.config.get('paginacao_paralela')
+        self.paginacao = DetectorPaginacao(**opcoes_paginacao) if opcoes_paginacao else None
+        self.perfil = perfil_do_site(main_crawler.perfis, site_url)
+        if self.perfil:
+            logging.info(f"🧾 Usando o perfil de extração de {self.perfil.site}")
+        limite_vigia = self.config.get('vigia_travadas')
+        self.vigia = Vigia(limite_vigia) if limite_vigia else None
         self.urls_visitadas = set()
         self.novos_links_encontrados_site = 0
-        self.todos_links_encontrados_site = set()
+        # infohash -> MagnetInfo, com os trackers de todas as versões vistas no site
+        self.todos_links_encontrados_site = {}
         
         self.lock = threading.Lock()
-        self.running = True
+
+        # Com "controle_adaptativo", max_threads e delay_entre_requests viram o teto de
+        # simultâneas e o intervalo inicial; o resto é ajustado pelas respostas do host.
+        opcoes_controle = self.config.get('controle_adaptativo')
+        self.controle = ControleAdaptativo(max_simultaneas=self.config['max_threads'],
+                                           delay_inicial=self.config['delay_entre_requests'],
+                                           **opcoes_controle) if opcoes_controle else None
         
+        # Conexões abertas antes da primeira leva de páginas (DNS + TCP + TLS em paralelo)
+        if self.config.get('preaquecer_conexoes'):
+            self.preaquecer()
+
         self.robot_parser = urllib.robotparser.RobotFileParser()
         self.robot_parser.set_url(urljoin(site_url, '/robots.txt'))
+        self.carregar_robots()
+
+    def preaquecer(self):
+        conexoes = min(self.config['preaquecer_conexoes'], self.config['max_threads'])
+        inicio = time.perf_counter()
+        try:
+            abertas = preaquecer_conexoes(self.main_crawler.session, self.site_url, conexoes, self.timeout[0])
+            logging.info(f"🔥 {abertas} conexões abertas com {self.dominio_parseado.netloc} "
+                         f"em {time.perf_counter() - inicio:.2f}s")
+        except Exception as e:
+            logging.warning(f"⚠️ Não foi possível pré-abrir conexões com {self.dominio_parseado.netloc}: {e}")
+
+    def carregar_robots(self):
+        """Baixa o robots.txt pela sessão, com os mesmos timeouts e disjuntor das páginas."""
         try:
-            self.robot_parser.read()
+            response = self._get(self.robot_parser.url)
+            self._gravar_warc(response)
+            # Mesmas regras do RobotFileParser.read()
+            if response.status_code in (401, 403):
+                self.robot_parser.disallow_all = True
+            elif response.status_code >= 400:
+                self.robot_parser.allow_all = True
+            else:
+                self.robot_parser.parse(response.text.splitlines())
             logging.info("🤖 Robots.txt carregado com sucesso.")
         except Exception as e:
+            self.robot_parser.allow_all = True
             logging.warning(f"⚠️ Não foi possível carregar robots.txt: {e}")
 
     def pode_rastrear(self, url):
@@ -221,77 +477,203 @@ class SiteScanner:
             return True
         except: return False
 
+    def baixar(self, url):
+        """GET da página com o delay fixo da configuração ou pelo controle adaptativo do host."""
+        if not self.disjuntor.permitir():
+            raise CircuitoAberto(self.dominio_parseado.netloc, self.disjuntor.tempo_restante())
+        if self.controle is None:
+            time.sleep(self.config['delay_entre_requests'])
+            principal = lambda: self._get(url)
+        else:
+            inicio = self.controle.adquirir()
+            principal = lambda: self._get_controlado(url, inicio)
+        if self.reservas is None:
+            response = principal()
+        else:
+            response = self.reservas.executar(principal, lambda: self._preparar_reserva(url))
+        # Só a resposta usada vai para o WARC (a perdedora de uma reserva é descartada)
+        self._gravar_warc(response)
+        return response
+
+    def _gravar_warc(self, response):
+        if self.main_crawler.gravador_warc:
+            self.main_crawler.gravador_warc.gravar(response)
+
+    def _preparar_reserva(self, url):
+        """Função da requisição de reserva, ou None se o controle adaptativo não tem vaga agora."""
+        if self.controle is None:
+            # A reserva também é uma requisição ao host: respeita o mesmo delay fixo
+            time.sleep(self.config['delay_entre_requests'])
+            return lambda: self._get(url)
+        inicio = self.controle.tentar_adquirir()
+        if inicio is None:
+            return None
+        return lambda: self._get_controlado(url, inicio)
+
+    def _get_controlado(self, url, inicio):
+        response = None
+        try:
+            response = self._get(url)
+            return response
+        finally:
+            self.controle.liberar(inicio, response)
+
+    def _get(self, url):
+        try:
+            response = baixar_com_prazo(self.main_crawler.session, url, self.timeout, self.config.get('prazo_total'))
+        except requests.exceptions.ConnectionError:
+            self.disjuntor.registrar(falha_conexao=True)
+            raise
+        except BaseException:
+            self.disjuntor.registrar(falha_conexao=False)
+            raise
+        self.disjuntor.registrar(falha_conexao=False)
+        return response
+
+    def tratar_falha(self, url, erro):
+        """Reagenda a URL com espera exponencial ou, esgotadas as tentativas, guarda para a próxima execução."""
+        if isinstance(erro, CircuitoAberto):
+            # Host em pausa: a URL espera o disjuntor sem gastar tentativas
+            with self.lock:
+                self.urls_visitadas.discard(url)
+            if erro.espera is not None and self.urls_para_visitar.reagendar(url, erro.espera):
+                return
+            self.main_crawler.banco.registrar_falha(url, self.dominio_parseado.netloc, str(erro), 0)
+            return
+        espera, tentativas = self.retentativas.registrar_falha(url, erro)
+        if espera is not None:
+            with self.lock:
+                self.urls_visitadas.discard(url)
+            if self.urls_para_visitar.reagendar(url, espera):
+                logging.warning(f"🔁 Falha em {url} ({erro}). Tentativa {tentativas + 1} em {espera:.1f}s...")
+                return
+        logging.error(f"❌ Erro de requisição ao processar {url}: {erro}")
+        if falha_temporaria(erro):
+            self.main_crawler.banco.registrar_falha(url, self.dominio_parseado.netloc, str(erro), tentativas)
+
     def worker(self):
-        """Thread de trabalho que processa URLs da fila até que self.running seja False."""
-        while self.running:
+        """Thread de trabalho que processa URLs da fila até a fila avisar que o trabalho acabou."""
+        while True:
+            url = self.urls_para_visitar.proxima()
+            if url is None:
+                break
+            concluir = True
             try:
-                url = self.urls_para_visitar.get(timeout=1)
-                
                 with self.lock:
-                    if url in self.urls_visitadas: 
-                        self.urls_para_visitar.task_done()
-                        continue
+                    if url in self.urls_visitadas: continue
                     self.urls_visitadas.add(url)
 
                 if not self.pode_rastrear(url): 
                     logging.debug(f"🚫 Bloqueado por robots.txt: {url}")
-                    self.urls_para_visitar.task_done()
                     continue
 
+                if self.vigia: self.vigia.comecou(url)
+
                 try:
-                    time.sleep(self.config['delay_entre_requests'])
-                    response = self.main_crawler.session.get(url, timeout=10)
+                    response = self.baixar(url)
                     response.raise_for_status()
                     
                     if 'text/html' in response.headers.get('content-type', ''):
-                        magnets = set(re.findall(r'magnet:\?[^\s"\']+', response.text, re.IGNORECASE))
-                        links_novos_nesta_pagina = set()
-                        for magnet in magnets:
-                            nome_magnet = self.main_crawler.extrair_nome_magnet(magnet)
-                            if self.main_crawler.deve_ignorar_link(nome_magnet): continue
-                            
-                            self.todos_links_encontrados_site.add(magnet)
-
-                            if self.main_crawler.salvar_link_novo(magnet, links_novos_nesta_pagina):
-                                logging.info(f"🎯 NOVO LINK ({self.main_crawler.categorizar_link(magnet)}): {nome_magnet[:60]}...")
-                        
-                        with self.lock: self.novos_links_encontrados_site += len(links_novos_nesta_pagina)
-
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        for link in soup.find_all('a', href=True):
-                            url_absoluta = urljoin(url, link['href'])
-                            if self.eh_url_valida(url_absoluta):
-                                with self.lock:
-                                    if url_absoluta not in self.urls_visitadas and url_absoluta not in list(self.urls_para_visitar.queue):
-                                        self.urls_para_visitar.put(url_absoluta)
+                        if self.main_crawler.pipeline:
+                            # O parsing acontece em outro processo; a URL só é dada como
+                            # concluída quando o resultado voltar (concluir_pagina).
+                            self.main_crawler.pipeline.enviar(
+                                url, response.content, response.encoding,
+                                lambda magnets, links, erro, url=url: self.concluir_pagina(url, magnets, links, erro),
+                                self.perfil)
+                            concluir = False
+                            continue
+                        magnets, links = analisar_pagina(url, response.text, perfil=self.perfil)
+                        self.processar_resultado(url, magnets, links)
                 except requests.exceptions.RequestException as e:
-                    logging.error(f"❌ Erro de requisição ao processar {url}: {e}")
+                    self.tratar_falha(url, e)
                 except Exception as e:
                     logging.error(f"❌ Erro inesperado ao processar {url}", exc_info=True)
-                
-                self.urls_para_visitar.task_done()
-            except Empty:
-                # A fila está vazia, o worker continua no loop até self.running ser False.
-                continue
             except Exception as e:
                 logging.critical(f"CRITICAL ERRO no worker: {e}", exc_info=True)
+            finally:
+                if self.vigia: self.vigia.terminou()
+                if concluir: self.urls_para_visitar.concluir(url)
+
+    def processar_resultado(self, url, magnets, links):
+        """Registra os magnets (MagnetInfo) e enfileira os links extraídos de uma página."""
+        links_novos_nesta_pagina = set()
+        ineditos_no_site = 0
+        for info in magnets:
+            magnet = info.uri
+            nome_magnet = info.nome or "Sem nome"
+            if self.main_crawler.deve_ignorar_link(nome_magnet): continue
+            
+            with self.lock:
+                anterior = self.todos_links_encontrados_site.get(info.infohash)
+                self.todos_links_encontrados_site[info.infohash] = mesclar_magnets(anterior, info) if anterior else info
+            if anterior is None: ineditos_no_site += 1
+
+            novo = self.main_crawler.salvar_link_novo(magnet, links_novos_nesta_pagina)
+            categoria = self.main_crawler.registrar_link_encontrado(info, url, self.dominio_parseado.netloc, novo)
+            if novo:
+                logging.info(f"🎯 NOVO LINK ({categoria}): {nome_magnet[:60]}...")
+        
+        with self.lock: self.novos_links_encontrados_site += len(links_novos_nesta_pagina)
+        if self.padroes: self.padroes.registrar(url, ineditos_no_site)
+
+        # Cópia de uma página já vista (outra ordenação, espelho...): os links dela já foram seguidos
+        duplicada = self.quase_duplicadas and self.quase_duplicadas.eh_quase_duplicada(magnets, links)
+        links_validos = [] if duplicada else [link for link in links if self.eh_url_valida(link)]
+
+        # Páginas numeradas de listagem (/page/2 ... /page/N) vão para a fila de uma vez
+        if self.paginacao:
+            for url_pagina in self.paginacao.observar(url, links_validos, ineditos_no_site):
+                if self.eh_url_valida(url_pagina):
+                    self.urls_para_visitar.adicionar(url_pagina)
+
+        if duplicada:
+            logging.debug(f"👯 Página quase duplicada, links ignorados: {url}")
+            return
+
+        for url_absoluta in links_validos:
+            self.urls_para_visitar.adicionar(url_absoluta)
+
+    def concluir_pagina(self, url, magnets, links, erro):
+        """Chamado pelo pipeline de parsing quando a página volta dos processos."""
+        try:
+            if erro is not None:
+                logging.error(f"❌ Erro no parsing de {url}: {erro}")
+            else:
+                self.processar_resultado(url, magnets, links)
+        finally:
+            self.urls_para_visitar.concluir(url)
 
     def iniciar_varredura(self):
         """Inicia e gerencia as threads de varredura de forma robusta."""
         threads = [threading.Thread(target=self.worker, name=f"Worker-{i+1}", daemon=True) for i in range(self.config['max_threads'])]
         for t in threads: t.start()
+        if self.vigia: self.vigia.iniciar()
 
-        # Bloco principal de monitoramento: espera a fila esvaziar.
+        # Bloco principal de monitoramento: dorme até o contador de URLs pendentes chegar
+        # a zero. O timeout só existe para o Ctrl+C ser atendido também no Windows.
         try:
-            self.urls_para_visitar.join()
+            while not self.urls_para_visitar.aguardar(timeout=1):
+                pass
             logging.info("Fila de URLs processada. Finalizando workers...")
+            if self.controle:
+                logging.info(f"🎚️ Controle adaptativo de {self.dominio_parseado.netloc}: {self.controle.resumo()}")
+            if self.reservas:
+                logging.info(f"🪞 {self.dominio_parseado.netloc}: {self.reservas.resumo()}")
+            if self.paginacao:
+                logging.info(f"📑 {self.dominio_parseado.netloc}: {self.paginacao.resumo()}")
+            if self.padroes:
+                melhores = ', '.join(f"{padrao} ({media:.1f}/pág)" for padrao, media in self.padroes.melhores())
+                logging.info(f"🧭 Padrões de URL com mais magnets em {self.dominio_parseado.netloc}: {melhores}")
         except KeyboardInterrupt:
             logging.warning("\n🛑 Interrupção manual detectada. Finalizando workers...")
-            self.running = False # Sinaliza para as threads pararem
 
-        # Sinaliza para as threads pararem e espera por elas
-        self.running = False
+        # Libera os workers (que já saíram, se a varredura terminou) e espera por eles
+        self.urls_para_visitar.parar()
         for t in threads: t.join(timeout=5)
+        if self.vigia: self.vigia.parar()
+        if self.reservas: self.reservas.fechar()
+        if self.padroes: self.main_crawler.banco.salvar_padroes(self.dominio_parseado.netloc, self.padroes.exportar())
         
         print() # Nova linha para limpar a barra de status
         return self.novos_links_encontrados_site, self.todos_links_encontrados_site
@@ -313,18 +695,89 @@ def criar_arquivo_base_exemplo():
     return False
 
 if __name__ == "__main__":
-    if criar_arquivo_base_exemplo():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Crawler profissional de links magnéticos.')
+    parser.add_argument('--coordenador', action='store_true',
+                        help='Varredura distribuída: semeia a fronteira com base_busca.txt e exporta no final')
+    parser.add_argument('--no', action='store_true',
+                        help='Varredura distribuída: processa sites da fronteira até não sobrar nenhum')
+    parser.add_argument('--fronteira', default='fronteira.db', help='Arquivo da fronteira compartilhada')
+    parser.add_argument('--id', help='Identificador do nó (padrão: máquina-pid)')
+    parser.add_argument('--continuar', action='store_true',
+                        help='Coordenador: retoma a fronteira da execução anterior em vez de recomeçar')
+    parser.add_argument('--reprocessar', nargs='+', metavar='WARC',
+                        help='Reprocessa offline as páginas de arquivos .warc.gz (ou pastas) com as regras atuais')
+    parser.add_argument('--trabalhadores', type=int,
+                        help='Reprocessamento: processos de parsing (padrão: número de núcleos)')
+    args = parser.parse_args()
+
+    if not args.reprocessar and criar_arquivo_base_exemplo():
         input("\nPressione Enter para sair...")
     else:
         config = {
             "max_threads": 5,
             "delay_entre_requests": 1,
             "delay_entre_sites": 5,
+            # Ajusta simultâneas e delay por site pelas respostas (latência, 429/503, Retry-After),
+            # entre 1 e max_threads e entre delay_min e delay_max. None = delay fixo acima.
+            "controle_adaptativo": {"min_simultaneas": 1, "delay_min": 0.25, "delay_max": 30},
+            # Timeouts, erros de conexão e 408/429/5xx são tentados de novo com espera exponencial;
+            # depois de max_tentativas a página fica para a próxima execução (banco_resultados.py --falhas)
+            "retentativas": {"max_tentativas": 4, "espera_base": 2, "espera_max": 120},
+            # Conexão com timeout curto (site fora do ar é detectado logo), leitura mais longa e
+            # prazo total por página (servidor que manda a resposta aos poucos não prende a thread)
+            "timeout_conexao": 3.05,
+            "timeout_leitura": 15,
+            "prazo_total": 30,
+            # Após limite_falhas falhas de conexão seguidas o site é pausado por espera_aberto s e
+            # testado com uma requisição; após max_sondagens testes falhos, fica para a próxima execução
+            "disjuntor": {"limite_falhas": 5, "espera_aberto": 30, "max_sondagens": 3},
+            # Repete a página que passou do percentil 95 de latência do site e usa a primeira
+            # resposta (no máximo 5% das requisições), ex.: {"percentil": 0.95, "proporcao_max": 0.05}
+            "requisicoes_de_reserva": None,
+            # Avisa no log quando uma thread passa mais que estes segundos na mesma página
+            "vigia_travadas": 120,
+            # Cache de DNS (TTL do registro com o dnspython instalado, senão ttl_padrao segundos) e
+            # conexões abertas com o site antes da primeira página
+            "cache_dns": {"ttl_padrao": 300},
+            "preaquecer_conexoes": 5,
+            # Páginas quase iguais a uma já vista (SimHash dos magnets e links) não têm os links seguidos;
+            # limiar = bits de diferença aceitos, parametros_ignorados = parâmetros de ordenação/visualização
+            "quase_duplicadas": {"limiar": 3},
+            # Visita primeiro os padrões de URL (/filme/<x>, /tag/<x>...) que mais renderam magnets;
+            # o aprendizado fica no resultados.db para as próximas execuções
+            "fronteira_por_padrao": True,
+            # Descobre o modelo das páginas numeradas (/page/2 ... /page/500) e enfileira várias de uma vez,
+            # em janelas de `janela` páginas enquanto elas trouxerem magnets novos
+            "paginacao_paralela": {"janela": 50, "max_paginas": 2000},
+            # Grava todas as respostas em .warc.gz para reprocessar depois sem rede
+            # (ex.: {"pasta": "warc", "tamanho_segmento_mb": 100})
+            "gravar_warc": None,
+            # Trabalhadores para o parsing do HTML (0 = nas próprias threads de rede). Em
+            # máquinas com muitos núcleos e sites rápidos, use algo como os.cpu_count().
+            # modo_parsing: "auto", "processos", "subinterpretadores" (3.14+) ou "threads" (sem GIL)
+            "trabalhadores_parsing": 0,
+            "modo_parsing": "auto",
+            # Para enviar os links novos direto ao qBittorrent (Web UI ativada), ex.:
+            # "qbittorrent": {"url": "http://127.0.0.1:8080", "usuario": "admin", "senha": "adminadmin"},
+            "qbittorrent": None,
         }
         logging.info("=" * 60)
         logging.info("🕵️ CRAWLER PROFISSIONAL")
         logging.info(f"⚙️  Configuração: {config['max_threads']} threads, {config['delay_entre_requests']}s de delay por request.")
         logging.info("=" * 60)
-        crawler = CrawlerProfissional(config)
-        crawler.executar_busca()
-        input("\nPressione Enter para finalizar...")
\ No newline at end of file
+        if args.reprocessar:
+            config['trabalhadores_parsing'] = args.trabalhadores or os.cpu_count() or 1
+            CrawlerProfissional(config).reprocessar_arquivos(args.reprocessar)
+        elif args.no:
+            fronteira = FronteiraDistribuida(args.fronteira, no=args.id)
+            usar_arquivo_de_log(f"crawler-{fronteira.no}.log")
+            CrawlerProfissional(config).executar_no(fronteira)
+        elif args.coordenador:
+            fronteira = FronteiraDistribuida(args.fronteira, no=args.id)
+            CrawlerProfissional(config).executar_coordenador(fronteira, reiniciar=not args.continuar)
+        else:
+            crawler = CrawlerProfissional(config)
+            crawler.executar_busca()
+            input("\nPressione Enter para finalizar...")
\ No newline at end of file
@@ -1,11 +1,15 @@
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse, unquote
+from urllib.parse import urljoin, urlparse
 import re
 import time
 import os
 from datetime import datetime
 
+from parser_magnet import analisar_magnet, extrair_hash, extrair_nome
+from regras_categorias import MotorRegras
+from relatorios import RelatorioCategorias
+
 class CrawlerInteligente:
     def __init__(self):
         # Arquivos de configuração
@@ -16,12 +20,17 @@ class CrawlerInteligente:
         
         # Listas de controle
         self.links_ja_capturados = set()  # Todos os links já vistos
+        self.hashes_ja_capturados = set()  # Hashes BTIH (hex maiúsculo) desses links, para checar novidades
         self.links_novos_encontrados = set()  # Novos nesta execução
         self.links_baixados = set()  # Marcados como baixados
         
         # Carregar dados existentes
         self.carregar_links_existentes()
         
+        # Regras de categorização (regras_categorias.json, conjunto "tipo")
+        self.regras = MotorRegras.do_arquivo("tipo")
+        self.relatorio_categorias = RelatorioCategorias(self.regras)
+        
         # Configuração do requests
         self.session = requests.Session()
         self.session.headers.update({
@@ -38,7 +47,7 @@ class CrawlerInteligente:
                 for linha in f:
                     linha = linha.strip()
                     if linha.startswith('magnet:'):
-                        self.links_ja_capturados.add(linha)
+                        self.adicionar_capturado(linha)
                         self.links_baixados.add(linha)
             print(f"📥 {len(self.links_baixados)} links já baixados carregados")
         
@@ -48,7 +57,7 @@ class CrawlerInteligente:
                 for linha in f:
                     linha = linha.strip()
                     if linha.startswith('magnet:'):
-                        self.links_ja_capturados.add(linha)
+                        self.adicionar_capturado(linha)
             print(f"📋 {len(self.links_ja_capturados) - len(self.links_baixados)} links novos pendentes")
         
         # Carregar arquivo consolidado (se existir)
@@ -57,9 +66,15 @@ class CrawlerInteligente:
                 for linha in f:
                     linha = linha.strip()
                     if linha.startswith('magnet:'):
-                        self.links_ja_capturados.add(linha)
+                        self.adicionar_capturado(linha)
             print(f"📚 Total de {len(self.links_ja_capturados)} links únicos na base")
     
+    def adicionar_capturado(self, magnet_link):
+        self.links_ja_capturados.add(magnet_link)
+        hash_magnet = self.extrair_hash_magnet(magnet_link)
+        if hash_magnet:
+            self.hashes_ja_capturados.add(hash_magnet)
+
     def carregar_sites_para_busca(self):
         """Carrega a lista de sites do arquivo base_busca.txt"""
         if not os.path.exists(self.arquivo_base):
@@ -78,8 +93,7 @@ class CrawlerInteligente:
     
     def extrair_hash_magnet(self, magnet_link):
         """Extrai o hash do link magnético para comparação"""
-        hash_match = re.search(r'xt=urn:btih:([a-zA-Z0-9]{32,40})', magnet_link)
-        return hash_match.group(1) if hash_match else None
+        return extrair_hash(magnet_link)
     
     def eh_link_novo(self, magnet_link):
         """Verifica se o link é novo comparando hashes"""
@@ -87,13 +101,8 @@ class CrawlerInteligente:
         if not novo_hash:
             return False  # Link inválido
         
-        # Comparar com todos os links já capturados
-        for link_existente in self.links_ja_capturados:
-            hash_existente = self.extrair_hash_magnet(link_existente)
-            if hash_existente and hash_existente.upper() == novo_hash.upper():
-                return False  # Já existe
-        
-        return True  # É novo!
+        # extrair_hash já devolve o hash canônico (hex maiúsculo, mesmo vindo em base32)
+        return novo_hash not in self.hashes_ja_capturados
     
     def salvar_link_novo(self, magnet_link, categoria="Geral"):
         """Salva link novo se for realmente novo"""
@@ -101,7 +110,7 @@ class CrawlerInteligente:
             return False  # Já existe, ignorar
         
         self.links_novos_encontrados.add(magnet_link)
-        self.links_ja_capturados.add(magnet_link)
+        self.adicionar_capturado(magnet_link)
         
         # Salvar no arquivo de novos links
         with open(self.arquivo_novos, 'a', encoding='utf-8') as f:
@@ -111,6 +120,9 @@ class CrawlerInteligente:
         with open(self.arquivo_todos, 'a', encoding='utf-8') as f:
             f.write(magnet_link + '\n')
         
+        # Atualizar arquivo da categoria
+        self.relatorio_categorias.adicionar(analisar_magnet(magnet_link))
+        
         return True
     
     def extrair_links_pagina(self, html, url_base):
@@ -138,30 +150,11 @@ class CrawlerInteligente:
     
     def extrair_nome_magnet(self, magnet_link):
         """Extrai o nome do arquivo do magnet link"""
-        try:
-            nome_match = re.search(r'dn=([^&]+)', magnet_link)
-            if nome_match:
-                return unquote(nome_match.group(1))
-        except:
-            pass
-        return "Sem nome"
+        return extrair_nome(magnet_link)
     
     def categorizar_link(self, magnet_link):
         """Categoriza o link baseado no nome"""
-        nome = self.extrair_nome_magnet(magnet_link).lower()
-        
-        if any(palavra in nome for palavra in ['filme', 'movie', '1080p', '720p', 'bluray', 'dvdrip']):
-            return "Filmes"
-        elif any(palavra in nome for palavra in ['serie', 'season', 's01', 's02', 'temporada']):
-            return "Series"
-        elif any(palavra in nome for palavra in ['jogo', 'game', 'repack', 'iso']):
-            return "Jogos"
-        elif any(palavra in nome for palavra in ['musica', 'album', 'mp3', 'flac']):
-            return "Musicas"
-        elif any(palavra in nome for palavra in ['software', 'app', 'windows', 'mac']):
-            return "Software"
-        else:
-            return "Outros"
+        return self.regras.categorizar(self.extrair_nome_magnet(magnet_link))
     
     def processar_site(self, url):
         """Processa um site completo, procurando por novos links"""
@@ -224,30 +217,9 @@ class CrawlerInteligente:
             return 0
     
     def gerar_relatorio_categorias(self):
-        """Gera relatório por categorias"""
-        categorias = {
-            "Filmes": [],
-            "Series": [],
-            "Jogos": [],
-            "Musicas": [],
-            "Software": [],
-            "Outros": []
-        }
-        
-        # Classificar os novos links por categoria
-        for link in self.links_novos_encontrados:
-            categoria = self.categorizar_link(link)
-            categorias[categoria].append(link)
-        
-        # Gerar arquivos por categoria
-        for categoria, links in categoritas.items():
-            if links:
-                arquivo_categoria = f"links-{categoria.lower()}.txt"
-                with open(arquivo_categoria, 'w', encoding='utf-8') as f:
-                    f.write(f"# {categoria} - {len(links)} links\n")
-                    for link in links:
-                        f.write(link + '\n')
-                print(f"📂 {categoria}: {len(links)} links salvos em {arquivo_categoria}")
+        """Fecha os arquivos por categoria (preenchidos durante a busca)"""
+        for categoria, (arquivo_categoria, total) in self.relatorio_categorias.fechar().items():
+            print(f"📂 {categoria}: {total} links salvos em {arquivo_categoria}")
     
     def executar_busca(self):
         """Executa a busca em todos os sites da lista"""
@@ -1,30 +1,38 @@
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse, urlencode
+from urllib.parse import urljoin, urlparse, urlencode, parse_qs
 import re
 import time
 import threading
-from queue import Queue, Empty
-import json
 import os
 from collections import defaultdict
 import hashlib
 
+from parser_magnet import analisar_magnet, mesclar_magnets
+from banco_resultados import BancoResultados
+from relatorios import EscritorCSVMagnets, LogEventos, escrever_relatorio_json
+from pipeline_parsing import gil_ativo
+from fronteira import FilaRastreamento
+from retentativas import PoliticaRetentativas, falha_temporaria
+from perfis_extracao import ARQUIVO_PERFIS, carregar_perfis, perfil_do_site
+from arquivo_warc import GravadorWARC
+
 class CrawlerProfissional:
-    def __init__(self, dominio_base, max_threads=10, delay=0.5):
+    def __init__(self, dominio_base, max_threads=10, delay=0.5, comprimir_csv=False, max_tentativas=4,
+                 perfis=ARQUIVO_PERFIS, gravar_warc=False):
         self.dominio_base = dominio_base
         self.dominio_parseado = urlparse(dominio_base)
         self.base_netloc = self.dominio_parseado.netloc
         
         # Controle de URLs
         self.urls_visitadas = set()
-        self.urls_para_visitar = Queue()
-        self.urls_para_visitar.put(dominio_base)
+        # Fila sem repetição com contador de URLs em andamento (ver fronteira.py)
+        self.urls_para_visitar = FilaRastreamento([dominio_base])
         self.lock = threading.Lock()
         
         # Resultados
-        self.links_magneticos = set()
-        self.paginas_por_diretorio = defaultdict(list)
+        self.links_magneticos = {}  # infohash -> MagnetInfo (trackers de todas as páginas mesclados)
+        self.paginas_por_diretorio = defaultdict(int)
         self.estatisticas = {
             'total_paginas': 0,
             'total_magnets': 0,
@@ -32,10 +40,36 @@ class CrawlerProfissional:
             'inicio': time.time()
         }
         
+        # Banco compartilhado de resultados (resultados.db)
+        self.banco = BancoResultados()
+        # Falhas temporárias voltam para a fila com espera exponencial; as que esgotarem
+        # as tentativas ficam no banco e são tentadas de novo na próxima varredura
+        self.retentativas = PoliticaRetentativas(max_tentativas=max_tentativas)
+        for url in self.banco.retomar_falhas(self.base_netloc):
+            self.urls_para_visitar.adicionar(url)
+        
+        # Pasta de resultados e log de eventos, gravado durante toda a varredura
+        self.timestamp = time.strftime("%Y%m%d_%H%M%S")
+        self.pasta_resultados = f"resultados_{self.base_netloc}_{self.timestamp}"
+        os.makedirs(self.pasta_resultados, exist_ok=True)
+        self.eventos = LogEventos(os.path.join(self.pasta_resultados, "eventos.jsonl"))
+        self.eventos.registrar('inicio', dominio=dominio_base, max_threads=max_threads, delay=delay)
+        # CSV de detalhes escrito à medida que os magnets aparecem (opcionalmente .csv.gz)
+        self.csv_detalhes = EscritorCSVMagnets(os.path.join(self.pasta_resultados, "detalhes_magneticos.csv"),
+                                               comprimir=comprimir_csv)
+        
+        # Opcional: respostas gravadas em <pasta de resultados>/warc/*.warc.gz para reprocessar sem rede
+        self.gravador_warc = None
+        if gravar_warc:
+            self.gravador_warc = GravadorWARC(os.path.join(self.pasta_resultados, "warc"),
+                                              prefixo=self.base_netloc.replace(':', '_'))
+        
+        # Seletores do site em perfis_sites.json, se houver; senão a extração genérica
+        self.perfil = perfil_do_site(carregar_perfis(perfis), dominio_base)
+        
         # Configurações
         self.max_threads = max_threads
         self.delay = delay
-        self.running = True
         
         # Session com configurações profissionais
         self.session = requests.Session()
@@ -60,8 +94,12 @@ class CrawlerProfissional:
         
         print(f"🚀 CRAWLER PROFISSIONAL INICIADO")
         print(f"📍 Domínio: {self.dominio_base}")
-        print(f"🧵 Threads: {self.max_threads}")
+        # No Python free-threaded (sem GIL) as threads também fazem o parsing em paralelo;
+        # todo o estado compartilhado abaixo é acessado sob self.lock.
+        print(f"🧵 Threads: {self.max_threads} ({'GIL ativo' if gil_ativo() else 'sem GIL: parsing em paralelo'})")
         print(f"⏰ Delay: {self.delay}s")
+        if self.perfil:
+            print(f"🧾 Perfil de extração: {self.perfil.site}")
         print("-" * 60)
     
     def eh_url_valida(self, url):
@@ -160,47 +198,36 @@ class CrawlerProfissional:
     
     def extrair_magnets_avancado(self, html, url):
         """Extrai links magnéticos com técnicas avançadas"""
-        magnets_encontrados = set()
-        
-        # Regex mais abrangente para magnets
-        padroes_magnet = [
-            r'magnet:\?xt=urn:btih:[a-zA-Z0-9]{32,40}[^\s"\'<>]*',
-            r'magnet:\?[^\s"\'<>]{10,500}',  # Pattern genérico
-        ]
-        
-        for padrao in padroes_magnet:
-            magnets = re.findall(padrao, html, re.IGNORECASE)
-            for magnet in magnets:
-                # Limpar e validar
-                magnet_limpo = magnet.split('"')[0].split("'")[0].split(' ')[0]
-                if self.validar_magnet(magnet_limpo):
-                    magnets_encontrados.add(magnet_limpo)
+        magnets_encontrados = {}  # por infohash: o mesmo torrent repetido na página conta uma vez
+        
+        def adicionar(info):
+            anterior = magnets_encontrados.get(info.infohash)
+            magnets_encontrados[info.infohash] = mesclar_magnets(anterior, info) if anterior else info
+        
+        # Uma única regex: a limpeza e a validação ficam com o parser_magnet
+        for magnet in re.findall(r'magnet:\?[^\s"\'<>]+', html, re.IGNORECASE):
+            info = analisar_magnet(magnet)
+            if info and self.validar_magnet(info.uri):
+                adicionar(info)
         
         # Procurar em atributos data-*, info-*, etc.
         soup = BeautifulSoup(html, 'html.parser')
         for tag in soup.find_all(True):  # Todas as tags
             for attr, value in tag.attrs.items():
                 if isinstance(value, str) and 'magnet:' in value:
-                    magnet_match = re.search(r'magnet:\?[^\s"\'<>]+', value)
-                    if magnet_match:
-                        magnet_limpo = magnet_match.group(0)
-                        if self.validar_magnet(magnet_limpo):
-                            magnets_encontrados.add(magnet_limpo)
+                    info = analisar_magnet(value[value.index('magnet:'):])
+                    if info and self.validar_magnet(info.uri):
+                        adicionar(info)
         
-        return list(magnets_encontrados)
+        return [info.uri for info in magnets_encontrados.values()]
     
     def validar_magnet(self, magnet_link):
         """Valida se o link magnético é válido"""
         if not magnet_link.startswith('magnet:?'):
             return False
         
-        # Verificar componentes mínimos
-        if 'xt=urn:btih:' not in magnet_link:
-            return False
-        
-        # Verificar hash
-        hash_match = re.search(r'xt=urn:btih:([a-zA-Z0-9]{32,40})', magnet_link)
-        if not hash_match:
+        # Verificar hash BTIH (hex ou base32)
+        if analisar_magnet(magnet_link) is None:
             return False
         
         # Tamanho razoável
@@ -224,6 +251,8 @@ class CrawlerProfissional:
             
             # Fazer request
             response = self.session.get(url, timeout=15, allow_redirects=True)
+            if self.gravador_warc:
+                self.gravador_warc.gravar(response)
             response.raise_for_status()
             
             # Verificar se é HTML
@@ -233,51 +262,81 @@ class CrawlerProfissional:
             
             html = response.text
             
-            # Extrair magnets
-            magnets = self.extrair_magnets_avancado(html, url)
+            # Extrair magnets (e links, se o site tem perfil: uma leitura só, direcionada)
+            if self.perfil:
+                infos_perfil, links_perfil = self.perfil.extrair(html, url)
+                magnets = [info.uri for info in infos_perfil if self.validar_magnet(info.uri)]
+            else:
+                magnets = self.extrair_magnets_avancado(html, url)
             if magnets:
+                infos = [analisar_magnet(magnet) for magnet in magnets]
+                magnets_ineditos = []
                 with self.lock:
-                    self.links_magneticos.update(magnets)
+                    for info in infos:
+                        anterior = self.links_magneticos.get(info.infohash)
+                        if anterior is None:
+                            magnets_ineditos.append(info)
+                            self.links_magneticos[info.infohash] = info
+                        else:
+                            self.links_magneticos[info.infohash] = mesclar_magnets(anterior, info)
                     self.estatisticas['total_magnets'] += len(magnets)
+                for info in magnets_ineditos:
+                    self.eventos.registrar('magnet', magnet=info.uri, url=url)
+                    self.csv_detalhes.adicionar(info)
+                for info in infos:
+                    # Este script exporta os próprios arquivos, então o link já sai como exportado
+                    self.banco.registrar(info, url, self.base_netloc, exportado=True)
                 print(f"🎯 [{threading.current_thread().name}] Encontrados {len(magnets)} magnets!")
             
             # Extrair links
-            novos_links = self.extrair_links_completos(html, url)
+            if self.perfil:
+                novos_links = list({self.normalizar_url(link) for link in links_perfil if self.eh_url_valida(link)})
+            else:
+                novos_links = self.extrair_links_completos(html, url)
             
             # Registrar estatísticas
+            diretorio = urlparse(url).path.rsplit('/', 1)[0] if '/' in urlparse(url).path else '/'
             with self.lock:
                 self.estatisticas['total_paginas'] += 1
-                diretorio = urlparse(url).path.rsplit('/', 1)[0] if '/' in urlparse(url).path else '/'
-                self.paginas_por_diretorio[diretorio].append(url)
+                self.paginas_por_diretorio[diretorio] += 1
+            self.eventos.registrar('pagina', url=url, diretorio=diretorio, magnets=len(magnets))
             
             return novos_links
             
         except Exception as e:
+            espera, tentativas = self.retentativas.registrar_falha(url, e)
+            if espera is not None:
+                with self.lock:
+                    self.urls_visitadas.discard(url)
+                if self.urls_para_visitar.reagendar(url, espera):
+                    print(f"🔁 [{threading.current_thread().name}] Falha em {url}: {e}. Nova tentativa em {espera:.1f}s")
+                    return []
             with self.lock:
                 self.estatisticas['erros'] += 1
+            self.eventos.registrar('erro', url=url, erro=str(e))
             print(f"❌ [{threading.current_thread().name}] Erro em {url}: {e}")
+            if falha_temporaria(e):
+                self.banco.registrar_falha(url, self.base_netloc, str(e), tentativas)
             return []
     
     def worker(self):
         """Thread worker para processamento paralelo"""
-        while self.running:
+        while True:
+            url = self.urls_para_visitar.proxima()
+            if url is None:
+                break  # não há mais páginas pendentes
             try:
-                url = self.urls_para_visitar.get(timeout=10)
-                
                 # Processar página
                 novos_links = self.processar_pagina(url)
                 
-                # Adicionar novos links à fila
+                # Adicionar novos links à fila (a fila ignora os que já passaram por ela)
                 for link in novos_links:
-                    if link not in self.urls_visitadas:
-                        self.urls_para_visitar.put(link)
+                    self.urls_para_visitar.adicionar(link)
                 
-                self.urls_para_visitar.task_done()
-                
-            except Empty:
-                continue
             except Exception as e:
                 print(f"❌ Erro no worker: {e}")
+            finally:
+                self.urls_para_visitar.concluir()
     
     def iniciar_varredura_completa(self):
         """Inicia a varredura completa do site"""
@@ -292,22 +351,24 @@ class CrawlerProfissional:
             t.start()
             threads.append(t)
         
-        # Aguardar processamento
+        # Aguardar processamento: dorme até a última página ser processada,
+        # acordando a cada 30 segundos só para mostrar o progresso
         try:
-            while not self.urls_para_visitar.empty() or threading.active_count() > 1:
-                time.sleep(1)
-                
-                # Mostrar progresso a cada 30 segundos
-                if int(time.time()) % 30 == 0:
-                    self.mostrar_progresso()
+            while not self.urls_para_visitar.aguardar(timeout=30):
+                self.mostrar_progresso()
                     
         except KeyboardInterrupt:
             print("\n⏹️  Varredura interrompida pelo usuário")
-            self.running = False
         
         # Finalizar
-        self.running = False
-        self.finalizar_varredura()
+        self.urls_para_visitar.parar()
+        for t in threads:
+            t.join(timeout=5)
+        try:
+            self.finalizar_varredura()
+        finally:
+            # registrar() grava em lotes: fechar() grava o último no resultados.db
+            self.banco.fechar()
     
     def mostrar_progresso(self):
         """Mostra o progresso atual da varredura"""
@@ -315,7 +376,7 @@ class CrawlerProfissional:
             stats = self.estatisticas.copy()
             magnets = len(self.links_magneticos)
             visitadas = len(self.urls_visitadas)
-            na_fila = self.urls_para_visitar.qsize()
+            na_fila = len(self.urls_para_visitar)
         
         tempo_decorrido = time.time() - stats['inicio']
         paginas_por_minuto = stats['total_paginas'] / (tempo_decorrido / 60) if tempo_decorrido > 0 else 0
@@ -342,60 +403,53 @@ class CrawlerProfissional:
         print(f"🔗 Links magnéticos encontrados: {len(self.links_magneticos)}")
         print(f"📂 Diretórios explorados: {len(self.paginas_por_diretorio)}")
         print(f"❌ Erros: {self.estatisticas['erros']}")
+        if self.gravador_warc:
+            self.gravador_warc.fechar()
+            print(f"🗄️ {self.gravador_warc.resumo()}")
         
         # Salvar resultados
         self.salvar_resultados_completos()
     
     def salvar_resultados_completos(self):
         """Salva todos os resultados em arquivos organizados"""
+        self.eventos.registrar('fim', estatisticas=self.estatisticas)
+        self.eventos.fechar()
+        self.csv_detalhes.fechar()
+        
         if not self.links_magneticos:
             print("❌ Nenhum link magnético encontrado")
+            print(f"📋 Log da varredura em {self.eventos.caminho}")
             return
         
-        # Criar diretório para resultados
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        pasta_resultados = f"resultados_{self.base_netloc}_{timestamp}"
-        os.makedirs(pasta_resultados, exist_ok=True)
+        pasta_resultados = self.pasta_resultados
         
-        # 1. Arquivo principal para qBittorrent
+        # 1. Arquivo principal para qBittorrent: só os magnets desta varredura (o resultados.db
+        #    é compartilhado, então "vistos desde o início" pegaria os de outros crawlers)
         arquivo_principal = os.path.join(pasta_resultados, "links_magneticos.txt")
         with open(arquivo_principal, 'w', encoding='utf-8') as f:
-            for magnet in sorted(self.links_magneticos):
-                f.write(magnet + '\n')
-        
-        # 2. Arquivo com metadados
-        arquivo_detalhado = os.path.join(pasta_resultados, "detalhes_magneticos.csv")
-        with open(arquivo_detalhado, 'w', encoding='utf-8') as f:
-            f.write("Hash,Nome,Tamanho,Link\n")
-            for magnet in self.links_magneticos:
-                # Extrair informações
-                hash_match = re.search(r'xt=urn:btih:([a-zA-Z0-9]{32,40})', magnet)
-                nome_match = re.search(r'dn=([^&]+)', magnet)
-                tamanho_match = re.search(r'xl=(\d+)', magnet)
-                
-                hash_val = hash_match.group(1) if hash_match else "N/A"
-                nome_val = requests.utils.unquote(nome_match.group(1)) if nome_match else "Sem nome"
-                tamanho_val = tamanho_match.group(1) if tamanho_match else "N/A"
-                
-                f.write(f'"{hash_val}","{nome_val}","{tamanho_val}","{magnet}"\n')
+            for info in self.links_magneticos.values():
+                f.write(info.uri + '\n')
         
-        # 3. Relatório completo em JSON
-        relatorio = {
+        # 2. Arquivo com metadados: já foi escrito durante a varredura (self.csv_detalhes)
+        
+        # 3. Relatório completo em JSON, gerado em streaming a partir do log de eventos
+        #    (diretorios_explorados traz o número de páginas de cada diretório; as URLs
+        #    de cada página estão nos eventos 'pagina' do eventos.jsonl)
+        campos = {
             'dominio': self.dominio_base,
-            'timestamp': timestamp,
+            'timestamp': self.timestamp,
             'estatisticas': self.estatisticas,
             'diretorios_explorados': dict(self.paginas_por_diretorio),
             'total_links_magneticos': len(self.links_magneticos),
-            'links_magneticos': list(self.links_magneticos)
         }
-        
-        with open(os.path.join(pasta_resultados, "relatorio_completo.json"), 'w', encoding='utf-8') as f:
-            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        escrever_relatorio_json(os.path.join(pasta_resultados, "relatorio_completo.json"), self.eventos.caminho,
+                                campos, [('links_magneticos', 'magnet', 'magnet')])
         
         print(f"\n💾 RESULTADOS SALVOS EM: {pasta_resultados}/")
         print(f"📄 links_magneticos.txt - Para importar no qBittorrent")
-        print(f"📊 detalhes_magneticos.csv - Informações detalhadas")
+        print(f"📊 {os.path.basename(self.csv_detalhes.caminho)} - Informações detalhadas")
         print(f"📋 relatorio_completo.json - Relatório completo da varredura")
+        print(f"📋 eventos.jsonl - Log da varredura, gravado durante a execução")
 
 # Função de uso simplificado
 def varredura_completa_site():
@@ -4,18 +4,30 @@ from urllib.parse import urljoin, urlparse
 import re
 import time
 from collections import deque
-import json
 import urllib.robotparser
 
+from parser_magnet import analisar_magnet, mesclar_magnets
+from banco_resultados import BancoResultados
+from relatorios import EscritorCSVMagnets, LogEventos, escrever_relatorio_json
+
 class MagnetCrawlerQBittorrent:
-    def __init__(self, dominio_base, max_paginas=800, delay=1):
+    def __init__(self, dominio_base, max_paginas=800, delay=1, comprimir_csv=False, qbittorrent=None):
         self.dominio_base = dominio_base
         self.dominio_parseado = urlparse(dominio_base)
         self.urls_visitadas = set()
         self.urls_para_visitar = deque([dominio_base])
-        self.links_magneticos = set()
+        self.links_magneticos = {}  # infohash -> MagnetInfo (trackers de todas as páginas mesclados)
         self.max_paginas = max_paginas
         self.delay = delay
+        self.banco = BancoResultados()
+        # Log de eventos gravado durante o crawl; o relatório JSON é gerado a partir dele
+        self.eventos = LogEventos('eventos_crawler.jsonl')
+        self.eventos.registrar('inicio', dominio=dominio_base, max_paginas=max_paginas, delay=delay)
+        # CSV de detalhes escrito durante o crawl (opcionalmente .csv.gz)
+        self.csv_detalhes = EscritorCSVMagnets('links_detalhados.csv', colunas=('hash', 'nome', 'link'),
+                                               comprimir=comprimir_csv)
+        # ClienteQBittorrent já conectado: os links vão para o qBittorrent assim que aparecem
+        self.qbittorrent = qbittorrent
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -71,16 +83,16 @@ class MagnetCrawlerQBittorrent:
         
         for link in found_links:
             # Limpar e validar o link
-            clean_link = link.split('"')[0].split("'")[0].split(' ')[0]
-            if self.validar_link_magnetico(clean_link):
-                magnet_links.add(clean_link)
+            info = analisar_magnet(link)
+            if info and self.validar_link_magnetico(info.uri):
+                magnet_links.add(info.uri)
         
         # Procurar em tags <a>
         soup = BeautifulSoup(html, 'html.parser')
         for link in soup.find_all('a', href=True):
             href = link['href']
             if href.startswith('magnet:') and self.validar_link_magnetico(href):
-                magnet_links.add(href)
+                magnet_links.add(analisar_magnet(href).uri)
                 
         return list(magnet_links)
     
@@ -89,16 +101,8 @@ class MagnetCrawlerQBittorrent:
         if not link.startswith('magnet:?'):
             return False
         
-        # Verificar se tem o hash info (btih)
-        if 'xt=urn:btih:' not in link:
-            return False
-        
-        # Verificar se tem hash válido (32-40 caracteres alfanuméricos)
-        hash_match = re.search(r'xt=urn:btih:([a-zA-Z0-9]{32,40})', link)
-        if not hash_match:
-            return False
-            
-        return True
+        # Verificar se tem hash info (btih) válido: 40 hex ou 32 base32
+        return analisar_magnet(link) is not None
     
     def crawler_pagina(self, url):
         """Processa uma única página"""
@@ -116,7 +120,18 @@ class MagnetCrawlerQBittorrent:
             magnets = self.extrair_links_magneticos(response.text)
             if magnets:
                 print(f"✅ Encontrados {len(magnets)} links magnéticos válidos")
-                self.links_magneticos.update(magnets)
+                for magnet in magnets:
+                    info = analisar_magnet(magnet)
+                    anterior = self.links_magneticos.get(info.infohash)
+                    if anterior is None:
+                        self.links_magneticos[info.infohash] = info
+                        self.eventos.registrar('magnet', magnet=info.uri, url=url)
+                        self.csv_detalhes.adicionar(info)
+                        if self.qbittorrent:
+                            self.qbittorrent.enviar(info)
+                    else:
+                        self.links_magneticos[info.infohash] = mesclar_magnets(anterior, info)
+                    self.banco.registrar(info, url, self.dominio_parseado.netloc, exportado=True)
             
             # Extrair links para outras páginas
             novos_links = self.extrair_links(response.text, url)
@@ -125,44 +140,39 @@ class MagnetCrawlerQBittorrent:
                     self.urls_para_visitar.append(link)
             
             self.urls_visitadas.add(url)
+            self.eventos.registrar('pagina', url=url, magnets=len(magnets))
             time.sleep(self.delay)
             
         except Exception as e:
             print(f"❌ Erro ao processar {url}: {e}")
+            self.eventos.registrar('erro', url=url, erro=str(e))
     
     def salvar_para_qbittorrent(self):
         """Salva os links em formatos compatíveis com qBittorrent"""
         
+        # Só os links deste crawler: o resultados.db é compartilhado com outros crawlers e sites
+        links = [info.uri for info in self.links_magneticos.values()]
+        
         # Formato 1: Arquivo TXT simples (um link por linha)
         with open('links_qbittorrent.txt', 'w', encoding='utf-8') as f:
-            for link in self.links_magneticos:
+            for link in links:
                 f.write(link + '\n')
         
         # Formato 2: Arquivo de download batch (mais organizado)
         with open('downloads_batch.txt', 'w', encoding='utf-8') as f:
             f.write("# Lista de downloads para qBittorrent\n")
             f.write("# Gerado automaticamente\n\n")
-            for i, link in enumerate(self.links_magneticos, 1):
+            for i, link in enumerate(links, 1):
                 f.write(f"# Download {i}\n")
                 f.write(link + '\n\n')
         
-        # Formato 3: CSV para referência
-        with open('links_detalhados.csv', 'w', encoding='utf-8') as f:
-            f.write("Hash,Nome,Link\n")
-            for link in self.links_magneticos:
-                # Extrair informações do link
-                hash_match = re.search(r'xt=urn:btih:([a-zA-Z0-9]{32,40})', link)
-                nome_match = re.search(r'dn=([^&]+)', link)
-                
-                hash_val = hash_match.group(1) if hash_match else "N/A"
-                nome_val = urllib.parse.unquote(nome_match.group(1)) if nome_match else "Sem nome"
-                
-                f.write(f'"{hash_val}","{nome_val}","{link}"\n')
+        # Formato 3: CSV para referência, já escrito durante o crawl
+        self.csv_detalhes.fechar()
         
         print(f"Arquivos gerados para qBittorrent:")
         print(f"📄 links_qbittorrent.txt - Lista simples para importar")
         print(f"📄 downloads_batch.txt - Lista organizada")
-        print(f"📄 links_detalhados.csv - Lista detalhada com informações")
+        print(f"📄 {self.csv_detalhes.caminho} - Lista detalhada com informações")
     
     def iniciar_crawler(self):
         """Inicia o processo de crawling"""
@@ -170,23 +180,27 @@ class MagnetCrawlerQBittorrent:
         print(f"📊 Limite de páginas: {self.max_paginas}")
         print(f"⏰ Delay entre requests: {self.delay}s")
         
-        while self.urls_para_visitar and len(self.urls_visitadas) < self.max_paginas:
-            url = self.urls_para_visitar.popleft()
-            self.crawler_pagina(url)
+        try:
+            while self.urls_para_visitar and len(self.urls_visitadas) < self.max_paginas:
+                url = self.urls_para_visitar.popleft()
+                self.crawler_pagina(url)
+        finally:
+            # registrar() grava em lotes: fechar() grava o último no resultados.db (também no Ctrl+C)
+            self.banco.fechar()
         
         # Salvar resultados
         self.salvar_para_qbittorrent()
-        
-        # Salvar relatório JSON
-        resultados = {
-            'dominio': self.dominio_base,
-            'paginas_visitadas': list(self.urls_visitadas),
-            'total_links_magneticos': len(self.links_magneticos),
-            'links_magneticos': list(self.links_magneticos)
-        }
-        
-        with open('relatorio_crawler.json', 'w', encoding='utf-8') as f:
-            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        if self.qbittorrent:
+            entregues, falhas = self.qbittorrent.fechar()
+            print(f"🧲 {entregues} links enviados direto ao qBittorrent ({len(falhas)} falharam)")
+        
+        # Salvar relatório JSON (em streaming, a partir do log de eventos)
+        self.eventos.registrar('fim', paginas=len(self.urls_visitadas), magnets=len(self.links_magneticos))
+        self.eventos.fechar()
+        escrever_relatorio_json('relatorio_crawler.json', self.eventos.caminho,
+                                {'dominio': self.dominio_base, 'total_links_magneticos': len(self.links_magneticos)},
+                                [('paginas_visitadas', 'pagina', 'url'),
+                                 ('links_magneticos', 'magnet', 'magnet')])
         
         print(f"\n🎉 CRAWLER FINALIZADO!")
         print(f"📈 Páginas visitadas: {len(self.urls_visitadas)}")
@@ -194,8 +208,9 @@ class MagnetCrawlerQBittorrent:
         print(f"💾 Arquivos salvos:")
         print(f"   - links_qbittorrent.txt (para importar no qBittorrent)")
         print(f"   - downloads_batch.txt")
-        print(f"   - links_detalhados.csv")
+        print(f"   - {self.csv_detalhes.caminho}")
         print(f"   - relatorio_crawler.json")
+        print(f"   - eventos_crawler.jsonl (log gravado durante o crawl)")
 
 # Função de uso simplificado
 def crawler_qbittorrent(dominio, max_paginas=50):
@@ -213,4 +228,9 @@ if __name__ == "__main__":
     
     # Ou para mais controle:
     # crawler = MagnetCrawlerQBittorrent(dominio_alvo, max_paginas=100, delay=2)
-    # crawler.iniciar_crawler()
\ No newline at end of file
+    # crawler.iniciar_crawler()
+
+    # Ou enviando os links direto para o qBittorrent (Web UI ativada):
+    # from cliente_qbittorrent import ClienteQBittorrent
+    # qbit = ClienteQBittorrent("http://127.0.0.1:8080", "admin", "adminadmin").conectar()
+    # MagnetCrawlerQBittorrent(dominio_alvo, qbittorrent=qbit).iniciar_crawler()
\ No newline at end of file
@@ -6,7 +6,8 @@ import time
 from collections import deque
 import threading
 from queue import Queue
-import json
+
+from relatorios import LogEventos, escrever_relatorio_json
 
 class MagnetCrawler:
     def __init__(self, dominio_base, max_paginas=100, delay=1):
@@ -21,6 +22,9 @@ class MagnetCrawler:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # Log de eventos gravado durante o crawl; resultado_crawler.json é gerado a partir dele
+        self.eventos = LogEventos('eventos_resultado_crawler.jsonl')
+        self.eventos.registrar('inicio', dominio=dominio_base, max_paginas=max_paginas)
         
     def eh_url_valida(self, url):
         """Verifica se a URL pertence ao domínio base"""
@@ -70,6 +74,9 @@ class MagnetCrawler:
             magnets = self.extrair_links_magneticos(response.text)
             if magnets:
                 print(f"Encontrados {len(magnets)} links magnéticos em {url}")
+                for magnet in magnets:
+                    if magnet not in self.links_magneticos:
+                        self.eventos.registrar('magnet', magnet=magnet, url=url)
                 self.links_magneticos.update(magnets)
             
             # Extrair links para outras páginas
@@ -79,10 +86,12 @@ class MagnetCrawler:
                     self.urls_para_visitar.append(link)
             
             self.urls_visitadas.add(url)
+            self.eventos.registrar('pagina', url=url, magnets=len(magnets))
             time.sleep(self.delay)  # Respeitar o site
             
         except Exception as e:
             print(f"Erro ao processar {url}: {e}")
+            self.eventos.registrar('erro', url=url, erro=str(e))
     
     def iniciar_crawler(self):
         """Inicia o processo de crawling"""
@@ -102,16 +111,16 @@ class MagnetCrawler:
             for link in self.links_magneticos:
                 f.write(link + '\n')
         
-        # Salvar em JSON com metadados
-        resultados = {
+        # Salvar em JSON com metadados (em streaming, a partir do log de eventos)
+        self.eventos.registrar('fim', paginas=len(self.urls_visitadas), magnets=len(self.links_magneticos))
+        self.eventos.fechar()
+        campos = {
             'dominio': self.dominio_base,
             'paginas_visitadas': len(self.urls_visitadas),
             'total_links_magneticos': len(self.links_magneticos),
-            'links': list(self.links_magneticos)
         }
-        
-        with open('resultado_crawler.json', 'w', encoding='utf-8') as f:
-            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        escrever_relatorio_json('resultado_crawler.json', self.eventos.caminho, campos,
+                                [('links', 'magnet', 'magnet')])
         
         print(f"\n=== RESULTADOS ===")
         print(f"Páginas visitadas: {len(self.urls_visitadas)}")
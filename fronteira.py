@@ -0,0 +1,211 @@
+import heapq
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qsl, urlsplit
+
+# ==============================================================================
+# FRONTEIRA DE URLs
+#
+# Fila das URLs a visitar com um contador de trabalho em andamento: cada URL
+# conta desde que entra na fila até o worker chamar concluir(). Quando o
+# contador chega a zero a varredura acabou, e todos os workers parados em
+# proxima() são acordados na hora pela variável de condição, sem ficar
+# consultando a fila com timeout.
+#
+# reagendar() devolve uma URL que falhou para ser tentada de novo mais tarde:
+# ela continua pendente (a varredura não acaba antes dela) e proxima() a
+# entrega quando a espera termina, sem que nenhum worker fique parado por ela.
+#
+# FilaPorPadrao troca a ordem FIFO por "melhor primeiro": as URLs são agrupadas
+# pelo padrão do caminho (/filme/<x>, /tag/<x>, /pagina/<n>) e sai primeiro o
+# grupo cujo padrão mais rendeu magnets novos por página visitada, segundo as
+# EstatisticasPadroes aprendidas nesta varredura e nas anteriores.
+# ==============================================================================
+
+
+class FilaRastreamento:
+    """Fila de URLs sem repetição, segura para várias threads, que sabe quando o trabalho acabou."""
+
+    def __init__(self, urls_iniciais=()):
+        self.condicao = threading.Condition()
+        self._fila = deque()
+        self._agendadas = []  # heap de (instante, url) das novas tentativas
+        self._enfileiradas = set()
+        self.pendentes = 0  # URLs na fila + URLs sendo processadas
+        self.parada = False
+        for url in urls_iniciais:
+            self.adicionar(url)
+
+    def adicionar(self, url):
+        """Enfileira a URL. Retorna False se ela já passou pela fila."""
+        with self.condicao:
+            if url in self._enfileiradas or self.parada:
+                return False
+            self._enfileiradas.add(url)
+            self._guardar(url)
+            self.pendentes += 1
+            self.condicao.notify()
+        return True
+
+    def proxima(self):
+        """Espera a próxima URL. Retorna None quando não há mais trabalho (ou após parar())."""
+        with self.condicao:
+            while not self.parada:
+                agora = time.monotonic()
+                if self._agendadas and self._agendadas[0][0] <= agora:
+                    return heapq.heappop(self._agendadas)[1]
+                if self._tamanho_fila():
+                    return self._retirar()
+                if self.pendentes == 0:
+                    return None
+                self.condicao.wait(self._agendadas[0][0] - agora if self._agendadas else None)
+            return None
+
+    def reagendar(self, url, espera):
+        """Agenda uma nova tentativa da URL (devolvida por proxima()) daqui a `espera` segundos.
+
+        O worker ainda chama concluir() para a tentativa que falhou.
+        """
+        with self.condicao:
+            if self.parada:
+                return False
+            heapq.heappush(self._agendadas, (time.monotonic() + espera, url))
+            self.pendentes += 1
+            self.condicao.notify()
+        return True
+
+    def concluir(self, url=None):
+        """Marca como terminada uma URL devolvida por proxima()."""
+        with self.condicao:
+            self.pendentes -= 1
+            if self.pendentes == 0:
+                self.condicao.notify_all()
+
+    def aguardar(self, timeout=None):
+        """Espera o fim do trabalho. Retorna False se o timeout acabou antes."""
+        with self.condicao:
+            return self.condicao.wait_for(lambda: self.pendentes == 0 or self.parada, timeout)
+
+    def parar(self):
+        """Descarta o que falta e libera todos os workers (ex.: Ctrl+C)."""
+        with self.condicao:
+            self.parada = True
+            self.condicao.notify_all()
+
+    def __len__(self):
+        with self.condicao:
+            return self._tamanho_fila() + len(self._agendadas)
+
+    def __contains__(self, url):
+        with self.condicao:
+            return url in self._enfileiradas
+
+    # Ordem de saída das URLs (FIFO); chamados com a condição já adquirida
+
+    def _guardar(self, url):
+        self._fila.append(url)
+
+    def _retirar(self):
+        return self._fila.popleft()
+
+    def _tamanho_fila(self):
+        return len(self._fila)
+
+
+# --- FRONTEIRA POR PADRÃO DE URL ---
+
+def _segmento_variavel(segmento):
+    return len(segmento) > 20 or any(c.isdigit() or c in '-_.%' for c in segmento)
+
+
+def padrao_url(url):
+    """Modelo do caminho da URL: números viram <n>, slugs viram <x>, a query guarda só os nomes."""
+    partes = urlsplit(url)
+    modelo = []
+    for segmento in (s for s in partes.path.split('/') if s):
+        if segmento.isdigit():
+            modelo.append('<n>')
+        elif _segmento_variavel(segmento):
+            modelo.append('<x>')
+        else:
+            modelo.append(segmento.lower())
+    padrao = '/' + '/'.join(modelo)
+    if partes.query:
+        padrao += '?' + '&'.join(sorted({nome for nome, _ in parse_qsl(partes.query, keep_blank_values=True)}))
+    return padrao
+
+
+def secao_do_padrao(padrao):
+    """Primeiro segmento do padrão (/tag/<x> -> /tag*): a estimativa dos padrões ainda pouco vistos."""
+    return '/' + padrao[1:].split('?', 1)[0].split('/', 1)[0] + '*'
+
+
+class EstatisticasPadroes:
+    """Páginas visitadas e magnets novos encontrados por padrão de URL de um site."""
+
+    def __init__(self, anteriores=None, peso_anterior=0.5, suavizacao=3.0):
+        # As execuções anteriores valem peso_anterior: um site que mudou de estrutura é reaprendido
+        self.dados = {padrao: [visitas * peso_anterior, magnets * peso_anterior]
+                      for padrao, (visitas, magnets) in (anteriores or {}).items()}
+        self.suavizacao = suavizacao
+        self.lock = threading.Lock()
+
+    def padrao(self, url):
+        return padrao_url(url)
+
+    def registrar(self, url, magnets):
+        """Conta uma página visitada do padrão da URL e quantos magnets novos ela trouxe."""
+        padrao = padrao_url(url)
+        with self.lock:
+            for chave in (padrao, secao_do_padrao(padrao), '*'):
+                contagem = self.dados.setdefault(chave, [0.0, 0.0])
+                contagem[0] += 1
+                contagem[1] += magnets
+
+    def _estimar(self, chave, referencia):
+        visitas, magnets = self.dados.get(chave, (0.0, 0.0))
+        return (magnets + self.suavizacao * referencia) / (visitas + self.suavizacao)
+
+    def pontuacao(self, padrao):
+        """Magnets novos esperados por página: média do padrão, puxada para a da seção e a do site."""
+        with self.lock:
+            site = self._estimar('*', 1.0)  # sem nada aprendido, todo padrão vale 1 magnet por página
+            return self._estimar(padrao, self._estimar(secao_do_padrao(padrao), site))
+
+    def melhores(self, quantidade=3):
+        """[(padrão, magnets por página), ...] dos padrões (não seções) mais produtivos."""
+        with self.lock:
+            medias = [(padrao, magnets / visitas) for padrao, (visitas, magnets) in self.dados.items()
+                      if not padrao.endswith('*') and visitas >= 1]
+        return sorted(medias, key=lambda item: item[1], reverse=True)[:quantidade]
+
+    def exportar(self):
+        with self.lock:
+            return {padrao: tuple(contagem) for padrao, contagem in self.dados.items()}
+
+
+class FilaPorPadrao(FilaRastreamento):
+    """FilaRastreamento que entrega primeiro as URLs dos padrões que mais rendem magnets."""
+
+    def __init__(self, estatisticas, urls_iniciais=()):
+        self.estatisticas = estatisticas
+        self._grupos = {}  # padrão -> URLs na ordem de chegada (FIFO dentro do padrão)
+        self._total_grupos = 0
+        super().__init__(urls_iniciais)
+
+    def _guardar(self, url):
+        self._grupos.setdefault(self.estatisticas.padrao(url), deque()).append(url)
+        self._total_grupos += 1
+
+    def _retirar(self):
+        padrao = max(self._grupos, key=self.estatisticas.pontuacao)
+        grupo = self._grupos[padrao]
+        url = grupo.popleft()
+        if not grupo:
+            del self._grupos[padrao]
+        self._total_grupos -= 1
+        return url
+
+    def _tamanho_fila(self):
+        return self._total_grupos
@@ -0,0 +1,278 @@
+import heapq
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+# ==============================================================================
+# FRONTEIRA DISTRIBUÍDA (SQLite)
+#
+# Vários processos (ou máquinas com uma pasta compartilhada) varrem a mesma
+# lista de sites puxando URLs de um único arquivo fronteira.db:
+#
+#   - o coordenador semeia um host por site de base_busca.txt;
+#   - cada nó reserva um host inteiro por vez (com um "aluguel" que expira se o
+#     nó morrer), então os limites de threads/delay por site continuam valendo
+#     exatamente como em uma máquina só. O aluguel é renovado por uma thread do
+#     nó, não a cada URL: um host que passa minutos só com retentativas
+#     agendadas ou com o disjuntor aberto não é tomado por outro nó;
+#   - as URLs descobertas entram na tabela urls sem repetição, e um nó que
+#     assume o host de outro nó que caiu continua de onde ele parou.
+#
+# Os magnets de todos os nós vão para o mesmo resultados.db (banco_resultados).
+# O SQLite em pasta de rede depende do travamento de arquivos do sistema de
+# arquivos: prefira vários processos na mesma máquina ou um compartilhamento SMB/NFS
+# com locks funcionando.
+# ==============================================================================
+
+ARQUIVO_FRONTEIRA = "fronteira.db"
+
+PENDENTE, EM_ANDAMENTO, CONCLUIDO = 0, 1, 2
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    host      TEXT PRIMARY KEY,
+    site_url  TEXT NOT NULL,
+    estado    INTEGER NOT NULL DEFAULT 0,
+    no        TEXT,
+    lease_ate REAL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS urls (
+    url     TEXT PRIMARY KEY,
+    host    TEXT NOT NULL,
+    estado  INTEGER NOT NULL DEFAULT 0,
+    no      TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_urls_host_estado ON urls (host, estado);
+"""
+
+
+def id_do_no():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class FronteiraDistribuida:
+    """Acesso ao fronteira.db: reserva de hosts e filas de URLs por host."""
+
+    def __init__(self, caminho=ARQUIVO_FRONTEIRA, no=None, duracao_lease=120):
+        self.caminho = caminho
+        self.no = no or id_do_no()
+        self.duracao_lease = duracao_lease
+        self.lock = threading.Lock()
+        # isolation_level=None: as transações são abertas à mão (BEGIN IMMEDIATE) onde
+        # vários nós podem disputar a mesma linha
+        self.conexao = sqlite3.connect(caminho, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(ESQUEMA)
+        # Hosts reservados por este nó; a thread de renovação estende o aluguel de todos
+        self._hosts = set()
+        self._parar_renovacao = threading.Event()
+        self._renovacao = None
+
+    def _transacao(self, funcao):
+        with self.lock:
+            self.conexao.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = funcao(self.conexao)
+            except BaseException:
+                self.conexao.execute("ROLLBACK")
+                raise
+            self.conexao.execute("COMMIT")
+            return resultado
+
+    # --- COORDENADOR ---
+
+    def semear(self, sites, reiniciar=True):
+        """Cadastra um host por site. Com reiniciar=True a execução anterior é descartada."""
+        def semear(conexao):
+            if reiniciar:
+                conexao.execute("DELETE FROM hosts")
+                conexao.execute("DELETE FROM urls")
+            for site in sites:
+                host = urlparse(site).netloc
+                conexao.execute("INSERT OR IGNORE INTO hosts (host, site_url) VALUES (?, ?)", (host, site))
+                conexao.execute("INSERT OR IGNORE INTO urls (url, host) VALUES (?, ?)", (site, host))
+        self._transacao(semear)
+
+    def situacao(self):
+        """{'hosts': {estado: n}, 'urls': {estado: n}} para acompanhar o progresso."""
+        with self.lock:
+            hosts = dict(self.conexao.execute("SELECT estado, count(*) FROM hosts GROUP BY estado").fetchall())
+            urls = dict(self.conexao.execute("SELECT estado, count(*) FROM urls GROUP BY estado").fetchall())
+        return {'hosts': hosts, 'urls': urls}
+
+    def terminou(self):
+        hosts = self.situacao()['hosts']
+        return not hosts.get(PENDENTE) and not hosts.get(EM_ANDAMENTO)
+
+    # --- NÓS ---
+
+    def reservar_host(self):
+        """Reserva um host livre (ou cujo nó parou de renovar o aluguel). Retorna (host, site_url) ou None."""
+        def reservar(conexao):
+            agora = time.time()
+            linha = conexao.execute(
+                "SELECT host, site_url, no FROM hosts WHERE estado = ? OR (estado = ? AND lease_ate < ?) LIMIT 1",
+                (PENDENTE, EM_ANDAMENTO, agora)).fetchone()
+            if linha is None:
+                return None
+            host, site_url, no_anterior = linha
+            conexao.execute("UPDATE hosts SET estado = ?, no = ?, lease_ate = ? WHERE host = ?",
+                            (EM_ANDAMENTO, self.no, agora + self.duracao_lease, host))
+            # URLs que o nó anterior pegou e não terminou voltam para a fila
+            conexao.execute("UPDATE urls SET estado = ?, no = NULL WHERE host = ? AND estado = ?",
+                            (PENDENTE, host, EM_ANDAMENTO))
+            if no_anterior and no_anterior != self.no:
+                logging.warning(f"♻️ Host {host} abandonado pelo nó {no_anterior}; continuando a varredura.")
+            return host, site_url
+        reserva = self._transacao(reservar)
+        if reserva is not None:
+            with self.lock:
+                self._hosts.add(reserva[0])
+                if self._renovacao is None:
+                    self._renovacao = threading.Thread(target=self._renovar_alugueis, name='RenovacaoAluguel',
+                                                       daemon=True)
+                    self._renovacao.start()
+        return reserva
+
+    def renovar_host(self, host):
+        """Estende o aluguel do host. Retorna False se ele não é mais deste nó."""
+        with self.lock:
+            cursor = self.conexao.execute("UPDATE hosts SET lease_ate = ? WHERE host = ? AND no = ? AND estado = ?",
+                                          (time.time() + self.duracao_lease, host, self.no, EM_ANDAMENTO))
+        return cursor.rowcount > 0
+
+    def _renovar_alugueis(self):
+        # Um terço da duração: duas renovações podem falhar (banco ocupado) antes de o aluguel vencer
+        while not self._parar_renovacao.wait(self.duracao_lease / 3):
+            with self.lock:
+                hosts = list(self._hosts)
+            for host in hosts:
+                try:
+                    if not self.renovar_host(host):
+                        logging.warning(f"⚠️ O host {host} não está mais reservado para o nó {self.no}.")
+                        with self.lock:
+                            self._hosts.discard(host)
+                except sqlite3.Error as e:
+                    logging.warning(f"⚠️ Falha ao renovar o aluguel de {host}: {e}")
+
+    def concluir_host(self, host):
+        with self.lock:
+            self._hosts.discard(host)
+            self.conexao.execute("UPDATE hosts SET estado = ?, lease_ate = NULL WHERE host = ? AND no = ?",
+                                 (CONCLUIDO, host, self.no))
+
+    def fila(self, host):
+        return FilaDistribuida(self, host)
+
+    def fechar(self):
+        """Para a renovação (hosts não concluídos ficam para outro nó quando o aluguel vencer) e fecha o banco."""
+        self._parar_renovacao.set()
+        if self._renovacao is not None:
+            self._renovacao.join()
+        with self.lock:
+            self.conexao.close()
+
+
+class FilaDistribuida:
+    """Mesma interface da FilaRastreamento (fronteira.py), com as URLs de um host no fronteira.db."""
+
+    def __init__(self, fronteira, host):
+        self.fronteira = fronteira
+        self.host = host
+        self.condicao = threading.Condition()
+        self.parada = False
+        # Novas tentativas ficam só na memória deste nó; no banco a URL continua em
+        # andamento, e volta para a fila se o nó cair e outro assumir o host.
+        self._agendadas = []
+        self._adiadas = {}  # url -> tentativas reagendadas cujo concluir() não marca a URL como feita
+        with fronteira.lock:
+            self.pendentes = fronteira.conexao.execute(
+                "SELECT count(*) FROM urls WHERE host = ? AND estado != ?", (host, CONCLUIDO)).fetchone()[0]
+
+    def adicionar(self, url):
+        """Enfileira a URL. Retorna False se ela já passou pela fronteira (em qualquer nó)."""
+        with self.condicao:
+            if self.parada:
+                return False
+            with self.fronteira.lock:
+                cursor = self.fronteira.conexao.execute(
+                    "INSERT OR IGNORE INTO urls (url, host) VALUES (?, ?)", (url, self.host))
+            if cursor.rowcount == 0:
+                return False
+            self.pendentes += 1
+            self.condicao.notify()
+        return True
+
+    def _reservar_url(self):
+        def reservar(conexao):
+            linha = conexao.execute("SELECT url FROM urls WHERE host = ? AND estado = ? LIMIT 1",
+                                    (self.host, PENDENTE)).fetchone()
+            if linha is None:
+                return None
+            conexao.execute("UPDATE urls SET estado = ?, no = ? WHERE url = ?",
+                            (EM_ANDAMENTO, self.fronteira.no, linha[0]))
+            return linha[0]
+        return self.fronteira._transacao(reservar)
+
+    def proxima(self):
+        """Espera a próxima URL do host. Retorna None quando o host foi todo varrido (ou após parar())."""
+        with self.condicao:
+            while True:
+                if self.parada:
+                    return None
+                agora = time.monotonic()
+                if self._agendadas and self._agendadas[0][0] <= agora:
+                    url = heapq.heappop(self._agendadas)[1]
+                else:
+                    url = self._reservar_url()
+                if url is not None:
+                    return url
+                if self.pendentes == 0:
+                    return None
+                self.condicao.wait(self._agendadas[0][0] - agora if self._agendadas else None)
+
+    def reagendar(self, url, espera):
+        with self.condicao:
+            if self.parada:
+                return False
+            heapq.heappush(self._agendadas, (time.monotonic() + espera, url))
+            self._adiadas[url] = self._adiadas.get(url, 0) + 1
+            self.pendentes += 1
+            self.condicao.notify()
+        return True
+
+    def concluir(self, url=None):
+        with self.condicao:
+            if url in self._adiadas:
+                self._adiadas[url] -= 1
+                if not self._adiadas[url]:
+                    del self._adiadas[url]
+            elif url is not None:
+                with self.fronteira.lock:
+                    self.fronteira.conexao.execute("UPDATE urls SET estado = ? WHERE url = ?", (CONCLUIDO, url))
+            self.pendentes -= 1
+            if self.pendentes == 0:
+                self.condicao.notify_all()
+
+    def aguardar(self, timeout=None):
+        with self.condicao:
+            return self.condicao.wait_for(lambda: self.pendentes == 0 or self.parada, timeout)
+
+    def parar(self):
+        with self.condicao:
+            self.parada = True
+            self.condicao.notify_all()
+
+    def __len__(self):
+        with self.fronteira.lock:
+            return len(self._agendadas) + self.fronteira.conexao.execute(
+                "SELECT count(*) FROM urls WHERE host = ? AND estado = ?", (self.host, PENDENTE)).fetchone()[0]
+
+    def __contains__(self, url):
+        with self.fronteira.lock:
+            return self.fronteira.conexao.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone() is not None
@@ -0,0 +1,134 @@
+import re
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# ==============================================================================
+# PAGINAÇÃO EM PARALELO
+#
+# Uma categoria com 500 páginas (/page/2, /page/3, ...) é descoberta uma página
+# por vez pelo link "próxima", então vira uma corrente serial, não importa
+# quantas threads o SiteScanner tenha. Aqui os links de cada página são
+# comparados com o modelo de paginação (um número logo depois de "page",
+# "pagina", "pg", ... no caminho ou na query) para descobrir a sequência e a
+# última página (o maior número que aparece nos links, ex.: o link "última").
+# "p" sozinho fica de fora: em muitos sites ?p=123 é o número do post.
+#
+# As páginas da sequência são enfileiradas de uma vez, em janelas: quando
+# metade da janela já foi visitada e ela ainda trouxe magnets novos, a
+# próxima janela entra na fila; uma janela inteira sem nenhum magnet novo
+# encerra a sequência (as páginas restantes ainda podem ser alcançadas pelos
+# links normais). Nunca passa da última página vista nos links.
+# ==============================================================================
+
+PALAVRAS_PAGINA = frozenset({'page', 'pagina', 'página', 'pag', 'pg', 'paged', 'pagination', 'pagenum'})
+
+REGEX_SEGMENTO = re.compile(r'(page|pagina|pag|pg)[-_]?(\d+)', re.IGNORECASE)
+
+
+def modelos_da_url(url):
+    """[((prefixo, sufixo), número), ...] para cada número de página da URL: url == prefixo + número + sufixo."""
+    partes = urlsplit(url)
+    modelos = []
+
+    segmentos = partes.path.split('/')
+    for i, segmento in enumerate(segmentos):
+        if segmento.isdigit() and i > 0 and segmentos[i - 1].lower() in PALAVRAS_PAGINA:
+            antes, numero, depois = '', segmento, ''
+        else:
+            combinacao = REGEX_SEGMENTO.fullmatch(segmento)
+            if not combinacao:
+                continue
+            antes, numero, depois = segmento[:combinacao.start(2)], combinacao.group(2), ''
+        caminho_antes = '/'.join(segmentos[:i] + [antes])
+        caminho_depois = depois + '/'.join([''] + segmentos[i + 1:]) if i + 1 < len(segmentos) else depois
+        prefixo = urlunsplit((partes.scheme, partes.netloc, caminho_antes, '', ''))
+        sufixo = caminho_depois + ('?' + partes.query if partes.query else '')
+        modelos.append(((prefixo, sufixo), int(numero)))
+
+    parametros = parse_qsl(partes.query, keep_blank_values=True)
+    for i, (nome, valor) in enumerate(parametros):
+        if nome.lower() in PALAVRAS_PAGINA and valor.isdigit():
+            antes = urlencode(parametros[:i] + [(nome, '')])
+            depois = urlencode(parametros[i + 1:])
+            prefixo = urlunsplit((partes.scheme, partes.netloc, partes.path, antes, ''))
+            modelos.append(((prefixo, '&' + depois if depois else ''), int(valor)))
+    return modelos
+
+
+class SequenciaPaginada:
+    """Uma sequência de páginas numeradas (modelo prefixo + número + sufixo) e a janela já enfileirada."""
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.ultima = 0  # maior número de página visto nos links
+        self.enfileiradas_ate = 0
+        self.inicio_janela = 0
+        self.visitadas_na_janela = 0
+        self.novos_na_janela = 0
+        self.enfileiradas = 0
+        self.encerrada = False
+
+    def url(self, numero):
+        prefixo, sufixo = self.modelo
+        return f"{prefixo}{numero}{sufixo}"
+
+
+class DetectorPaginacao:
+    """Descobre as sequências de páginas de listagem de um site e devolve as URLs a enfileirar de uma vez."""
+
+    def __init__(self, janela=50, max_paginas=2000):
+        self.janela = janela
+        self.max_paginas = max_paginas
+        self.sequencias = {}
+        self.enfileiradas = 0
+        self.lock = threading.Lock()
+
+    def observar(self, url, links, magnets_novos):
+        """Registra uma página visitada (links de saída e magnets novos dela). Retorna as URLs a enfileirar."""
+        with self.lock:
+            # A página pertence a uma sequência conhecida? Conta o que ela rendeu para a janela.
+            for modelo, numero in modelos_da_url(url):
+                sequencia = self.sequencias.get(modelo)
+                if sequencia and sequencia.inicio_janela < numero <= sequencia.enfileiradas_ate:
+                    sequencia.visitadas_na_janela += 1
+                    sequencia.novos_na_janela += magnets_novos
+
+            # Números de página nos links: criam sequências e mostram até onde elas vão
+            numeros = {}
+            for link in links:
+                for modelo, numero in modelos_da_url(link):
+                    numeros.setdefault(modelo, []).append(numero)
+            for modelo, vistos in numeros.items():
+                sequencia = self.sequencias.get(modelo)
+                if sequencia is None:
+                    sequencia = self.sequencias[modelo] = SequenciaPaginada(modelo)
+                    sequencia.enfileiradas_ate = sequencia.inicio_janela = max(min(vistos) - 1, 0)
+                sequencia.ultima = min(max(sequencia.ultima, *vistos), self.max_paginas)
+
+            novas = []
+            for sequencia in self.sequencias.values():
+                novas.extend(self._avancar(sequencia))
+            self.enfileiradas += len(novas)
+            return novas
+
+    def _avancar(self, sequencia):
+        if sequencia.encerrada or sequencia.enfileiradas_ate >= sequencia.ultima:
+            return []
+        tamanho = sequencia.enfileiradas_ate - sequencia.inicio_janela
+        if tamanho:
+            if sequencia.visitadas_na_janela >= tamanho and not sequencia.novos_na_janela:
+                sequencia.encerrada = True  # janela inteira sem nada novo
+                return []
+            if sequencia.visitadas_na_janela < tamanho / 2 or not sequencia.novos_na_janela:
+                return []
+        inicio = sequencia.enfileiradas_ate + 1
+        fim = min(sequencia.ultima, sequencia.enfileiradas_ate + self.janela)
+        sequencia.inicio_janela, sequencia.enfileiradas_ate = sequencia.enfileiradas_ate, fim
+        sequencia.visitadas_na_janela = sequencia.novos_na_janela = 0
+        sequencia.enfileiradas += fim - inicio + 1
+        return [sequencia.url(numero) for numero in range(inicio, fim + 1)]
+
+    def resumo(self):
+        with self.lock:
+            usadas = sum(1 for s in self.sequencias.values() if s.enfileiradas)
+            return f"{self.enfileiradas} páginas de listagem enfileiradas de uma vez em {usadas} sequências"
@@ -0,0 +1,141 @@
+import base64
+import binascii
+import re
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import quote, quote_plus, unquote, unquote_plus
+
+# ==============================================================================
+# PARSER DE LINKS MAGNÉTICOS
+#
+# Quebra um URI magnet em seus parâmetros uma única vez e devolve um registro
+# compacto (MagnetInfo). O resultado fica em cache, então o mesmo magnet visto
+# em várias páginas (listagem, detalhe, mirrors) só é analisado uma vez.
+# Todos os crawlers e geradores de relatório devem usar este módulo em vez de
+# aplicar regex próprias sobre o link.
+# ==============================================================================
+
+TAMANHO_CACHE = 65536
+
+# Caracteres que encerram um magnet quando ele é extraído do meio de um HTML.
+_FIM_DO_MAGNET = re.compile(r'[\s"\'<>]')
+
+
+class MagnetInfo(namedtuple('MagnetInfo', 'uri infohash nome trackers tamanho xt_extras')):
+    """Registro imutável de um magnet já analisado.
+
+    uri       -- o link limpo (sem aspas/lixo do HTML e sem '&amp;')
+    infohash  -- os 20 bytes do hash BTIH (v1)
+    nome      -- o parâmetro dn decodificado, ou None
+    trackers  -- tupla com os trackers (tr) decodificados, na ordem do link
+    tamanho   -- o parâmetro xl em bytes, ou None
+    xt_extras -- tupla com os outros xt (ex.: 'urn:btmh:...' de torrents v2)
+    """
+    __slots__ = ()
+
+    @property
+    def hash_hex(self):
+        """Hash BTIH canônico: 40 caracteres hexadecimais maiúsculos."""
+        return self.infohash.hex().upper()
+
+
+def limpar_magnet(texto):
+    """Corta o magnet no primeiro caractere que não pode fazer parte dele e desfaz '&amp;'."""
+    fim = _FIM_DO_MAGNET.search(texto)
+    if fim:
+        texto = texto[:fim.start()]
+    return texto.replace('&amp;', '&')
+
+
+# Os mesmos trackers públicos se repetem em quase todos os magnets, e unquote()
+# é a parte mais cara da análise: vale manter os já decodificados em cache.
+_decodificar_tracker = lru_cache(maxsize=4096)(unquote)
+
+
+def _decodificar_btih(valor):
+    """Aceita o hash em hexadecimal (40) ou base32 (32) e devolve os 20 bytes."""
+    try:
+        if len(valor) == 40:
+            return bytes.fromhex(valor)
+        if len(valor) == 32:
+            return base64.b32decode(valor.upper())
+    except (ValueError, binascii.Error):
+        pass
+    return None
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def analisar_magnet(magnet_link):
+    """Analisa um URI magnet. Retorna MagnetInfo, ou None se não houver um BTIH válido."""
+    uri = limpar_magnet(magnet_link)
+    if uri[:8].lower() != 'magnet:?':
+        return None
+
+    infohash = None
+    nome = None
+    tamanho = None
+    trackers = []
+    xt_extras = []
+    for parametro in uri[8:].split('&'):
+        chave, _, valor = parametro.partition('=')
+        chave = chave.lower()
+        if chave == 'xt':
+            if valor[:9].lower() == 'urn:btih:':
+                if infohash is None:
+                    infohash = _decodificar_btih(valor[9:])
+            elif valor:
+                xt_extras.append(valor)
+        elif chave == 'dn':
+            if nome is None:
+                nome = unquote_plus(valor)
+        elif chave == 'tr':
+            if valor:
+                trackers.append(_decodificar_tracker(valor))
+        elif chave == 'xl':
+            if valor.isdigit():
+                tamanho = int(valor)
+
+    if infohash is None:
+        return None
+    return MagnetInfo(uri, infohash, nome, tuple(trackers), tamanho, tuple(xt_extras))
+
+
+def mesclar_magnets(principal, outro):
+    """Junta dois registros do mesmo infohash vistos em lugares diferentes.
+
+    Mantém o link de `principal` e acrescenta a ele os trackers (e o nome/tamanho,
+    se faltarem) que só `outro` tem. Se não houver nada a acrescentar, devolve
+    `principal` sem criar um registro novo.
+    """
+    novos_trackers = tuple(t for t in outro.trackers if t not in principal.trackers)
+    falta_nome = principal.nome is None and outro.nome is not None
+    falta_tamanho = principal.tamanho is None and outro.tamanho is not None
+    if not (novos_trackers or falta_nome or falta_tamanho):
+        return principal
+
+    uri = principal.uri
+    if falta_nome:
+        uri += '&dn=' + quote_plus(outro.nome)
+    if falta_tamanho:
+        uri += f'&xl={outro.tamanho}'
+    uri += ''.join('&tr=' + quote(t, safe='') for t in novos_trackers)
+    return principal._replace(uri=uri,
+                              nome=principal.nome if principal.nome is not None else outro.nome,
+                              tamanho=principal.tamanho if principal.tamanho is not None else outro.tamanho,
+                              trackers=principal.trackers + novos_trackers)
+
+
+def extrair_hash(magnet_link):
+    """Hash BTIH canônico (hex maiúsculo) do magnet, ou None se inválido."""
+    info = analisar_magnet(magnet_link)
+    return info.hash_hex if info else None
+
+
+def extrair_nome(magnet_link, padrao="Sem nome"):
+    """Nome (dn) do magnet, ou `padrao` se ele não tiver nome ou for inválido."""
+    info = analisar_magnet(magnet_link)
+    return info.nome if info and info.nome else padrao
+
+
+def eh_magnet_valido(magnet_link):
+    return analisar_magnet(magnet_link) is not None
@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+from functools import lru_cache
+from urllib.parse import urljoin, urlparse
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+from parser_magnet import analisar_magnet, mesclar_magnets
+
+# ==============================================================================
+# PERFIS DE EXTRAÇÃO POR SITE
+#
+# Para os sites listados em perfis_sites.json (ao lado do base_busca.txt), a
+# página não é mais varrida inteira (todo href, src, meta, texto e atributo):
+# os seletores CSS do perfil dizem onde estão os links de listagem, de
+# paginação e de detalhe, e onde ficam os magnets. Os seletores são compilados
+# uma vez (soupsieve, o mesmo motor do BeautifulSoup.select) e só esses
+# elementos são lidos. Sites sem perfil continuam com a extração genérica.
+#
+# Formato de cada site (chave = domínio, com ou sem "www."):
+#   "listagem":  links para categorias/seções       (seguidos)
+#   "paginacao": links para as outras páginas       (seguidos)
+#   "detalhe":   links para a página de cada torrent (seguidos)
+#   "magnets":   elementos com o magnet (padrão: a[href^="magnet:"])
+#   "atributo_magnet": atributo onde está o magnet (padrão: href)
+# Cada seletor pode ser uma string ou uma lista de strings. Em "magnets", um
+# item também pode ser {"seletor": ..., "atributo": ...} quando o magnet fica
+# em outro atributo só naqueles elementos (ex.: button[data-magnet]).
+# ==============================================================================
+
+ARQUIVO_PERFIS = "perfis_sites.json"
+
+SELETOR_MAGNETS_PADRAO = 'a[href^="magnet:"]'
+
+
+@lru_cache(maxsize=None)
+def _compilar(seletor):
+    # Cache por processo: um perfil recebido por pickle (pipeline de parsing) não recompila
+    return soupsieve.compile(seletor)
+
+
+def _como_lista(valor):
+    if not valor:
+        return []
+    return [valor] if isinstance(valor, str) else list(valor)
+
+
+class PerfilExtracao:
+    """Seletores compilados de um site e a extração direcionada que os usa."""
+
+    def __init__(self, site, listagem=(), paginacao=(), detalhe=(), magnets=SELETOR_MAGNETS_PADRAO,
+                 atributo_magnet='href'):
+        self.site = site
+        self.seletores_links = _como_lista(listagem) + _como_lista(paginacao) + _como_lista(detalhe)
+        self.atributo_magnet = atributo_magnet
+        # {atributo: seletor}: os seletores que usam o mesmo atributo são compilados juntos
+        self.seletores_magnets = {}
+        for item in _como_lista(magnets) or [SELETOR_MAGNETS_PADRAO]:
+            if isinstance(item, dict):
+                seletor, atributo = item.get('seletor'), item.get('atributo', atributo_magnet)
+            else:
+                seletor, atributo = item, atributo_magnet
+            if not seletor:
+                raise ValueError(f"Item de 'magnets' sem seletor no perfil de {site}: {item!r}")
+            anterior = self.seletores_magnets.get(atributo)
+            self.seletores_magnets[atributo] = f"{anterior}, {seletor}" if anterior else seletor
+        try:
+            self._compilar()
+        except soupsieve.SelectorSyntaxError as e:
+            raise ValueError(f"Seletor inválido no perfil de {site}: {e}") from None
+
+    def _compilar(self):
+        self._links = _compilar(', '.join(self.seletores_links)) if self.seletores_links else None
+        self._magnets = [(atributo, _compilar(seletor)) for atributo, seletor in self.seletores_magnets.items()]
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado['_links'], estado['_magnets']
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._compilar()
+
+    def extrair(self, html, url):
+        """Magnets (MagnetInfo) e links absolutos de saída, só dos elementos do perfil."""
+        soup = BeautifulSoup(html, 'html.parser')
+
+        por_hash = {}
+        for atributo, seletor in self._magnets:
+            for elemento in seletor.select(soup):
+                valor = elemento.get(atributo)
+                if not isinstance(valor, str) or 'magnet:' not in valor:
+                    continue
+                info = analisar_magnet(valor[valor.index('magnet:'):])
+                if info is not None:
+                    anterior = por_hash.get(info.infohash)
+                    por_hash[info.infohash] = mesclar_magnets(anterior, info) if anterior else info
+
+        links = []
+        if self._links is not None:
+            vistos = set()
+            for elemento in self._links.select(soup):
+                href = elemento.get('href')
+                if not href or href.startswith(('javascript:', 'mailto:', 'magnet:')):
+                    continue
+                url_absoluta = urljoin(url, href)
+                if url_absoluta not in vistos:
+                    vistos.add(url_absoluta)
+                    links.append(url_absoluta)
+        return list(por_hash.values()), links
+
+
+def carregar_perfis(origem=ARQUIVO_PERFIS):
+    """{domínio: PerfilExtracao} de um arquivo JSON (ou de um dict já carregado); {} se não existir."""
+    if isinstance(origem, dict):
+        dados = origem
+    elif not os.path.exists(origem):
+        logging.debug(f"Arquivo {origem} não encontrado, usando a extração genérica em todos os sites.")
+        return {}
+    else:
+        with open(origem, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    sites = dados.get('sites', dados)
+    return {dominio.lower(): PerfilExtracao(dominio, **opcoes)
+            for dominio, opcoes in sites.items() if not dominio.startswith('_')}
+
+
+def perfil_do_site(perfis, url):
+    """Perfil do site da URL (pelo domínio com porta, sem porta ou sem "www."), ou None."""
+    if not perfis:
+        return None
+    partes = urlparse(url)
+    host = (partes.hostname or '').lower()
+    for chave in (partes.netloc.lower(), host, host.removeprefix('www.'), 'www.' + host):
+        if chave in perfis:
+            return perfis[chave]
+    return None
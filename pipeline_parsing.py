@@ -0,0 +1,144 @@
+import logging
+import re
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from parser_magnet import analisar_magnet
+
+# ==============================================================================
+# PIPELINE DE PARSING SEPARADO DAS THREADS DE REDE
+#
+# As threads de rede só baixam as páginas; o HTML (em bytes) vai para um pool
+# de trabalhadores que extrai os magnets e os links de saída. Assim o parsing, que
+# é limitado pelo GIL quando feito nas próprias threads, usa todos os núcleos.
+# O número de páginas esperando parsing é limitado: quando o pool está cheio,
+# quem baixa espera (backpressure) em vez de acumular HTML na memória.
+#
+# Modos de execução do pool:
+#   processos          -- ProcessPoolExecutor (funciona em qualquer Python)
+#   subinterpretadores -- InterpreterPoolExecutor (Python 3.14+): um GIL por
+#                         interpretador, sem o custo de processos separados
+#   threads            -- ThreadPoolExecutor; só faz sentido no Python
+#                         free-threaded (3.13t+) rodando sem GIL
+#   auto               -- threads sem GIL, senão processos. Subinterpretadores só
+#                         quando pedidos: o bs4 e o soupsieve ainda não foram
+#                         testados dentro deles.
+# ==============================================================================
+
+MODOS = ('auto', 'processos', 'subinterpretadores', 'threads')
+
+REGEX_MAGNET = re.compile(r'magnet:\?[^\s"\']+', re.IGNORECASE)
+
+
+def analisar_pagina(url, conteudo, encoding=None, perfil=None):
+    """Extrai de uma página os magnets (MagnetInfo) e os links absolutos de saída.
+
+    Roda dentro dos processos do pool, mas também pode ser chamada diretamente
+    (modo sem processos), com o mesmo resultado. Com um perfil (perfis_extracao.py)
+    só os elementos dos seletores do site são lidos.
+    """
+    html = conteudo.decode(encoding or 'utf-8', errors='replace') if isinstance(conteudo, bytes) else conteudo
+    if perfil is not None:
+        return perfil.extrair(html, url)
+
+    magnets = []
+    for magnet_bruto in set(REGEX_MAGNET.findall(html)):
+        info = analisar_magnet(magnet_bruto)
+        if info is not None:
+            magnets.append(info)
+
+    links = []
+    vistos = set()
+    soup = BeautifulSoup(html, 'html.parser')
+    for link in soup.find_all('a', href=True):
+        url_absoluta = urljoin(url, link['href'])
+        if url_absoluta not in vistos:
+            vistos.add(url_absoluta)
+            links.append(url_absoluta)
+    return magnets, links
+
+
+def gil_ativo():
+    """False quando o Python é free-threaded e está rodando sem o GIL."""
+    verificar = getattr(sys, '_is_gil_enabled', None)
+    return verificar() if verificar else True
+
+
+def _executor_subinterpretadores():
+    try:
+        from concurrent.futures import InterpreterPoolExecutor
+    except ImportError:
+        return None
+    return InterpreterPoolExecutor
+
+
+def modos_disponiveis():
+    """Modos que este Python consegue executar em paralelo de verdade."""
+    modos = ['processos']
+    if _executor_subinterpretadores() is not None:
+        modos.append('subinterpretadores')
+    if not gil_ativo():
+        modos.append('threads')
+    return modos
+
+
+def escolher_modo(modo='auto'):
+    if modo not in MODOS:
+        raise ValueError(f"Modo de parsing desconhecido: {modo} (use um de {', '.join(MODOS)})")
+    if modo != 'auto':
+        return modo
+    if not gil_ativo():
+        return 'threads'
+    return 'processos'
+
+
+class PipelineParsing:
+    """Pool de parsing (processos, subinterpretadores ou threads) com limite de páginas pendentes."""
+
+    def __init__(self, trabalhadores, modo='processos', max_pendentes=None):
+        self.trabalhadores = trabalhadores
+        self.modo = escolher_modo(modo)
+        if self.modo == 'processos':
+            self.executor = ProcessPoolExecutor(max_workers=trabalhadores)
+        elif self.modo == 'subinterpretadores':
+            executor = _executor_subinterpretadores()
+            if executor is None:
+                raise RuntimeError("Subinterpretadores exigem Python 3.14 ou mais novo.")
+            self.executor = executor(max_workers=trabalhadores)
+        else:
+            if gil_ativo():
+                logging.warning("⚠️ Python com GIL: o modo 'threads' não acelera o parsing.")
+            self.executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='Parsing')
+        self.vagas = threading.BoundedSemaphore(max_pendentes or trabalhadores * 4)
+        # Sobe os trabalhadores agora, antes de existirem outras threads no programa
+        self.executor.submit(analisar_pagina, '', b'').result()
+        logging.info(f"🧩 Parsing em {trabalhadores} {self.modo} (GIL {'ativo' if gil_ativo() else 'desativado'}).")
+
+    def enviar(self, url, conteudo, encoding, callback, perfil=None):
+        """Envia a página para o pool; callback(magnets, links, erro) é chamado ao terminar.
+
+        Bloqueia enquanto houver páginas demais esperando parsing.
+        """
+        self.vagas.acquire()
+        try:
+            futuro = self.executor.submit(analisar_pagina, url, conteudo, encoding, perfil)
+        except Exception:
+            self.vagas.release()
+            raise
+        futuro.add_done_callback(lambda f: self._concluir(f, callback))
+
+    def _concluir(self, futuro, callback):
+        self.vagas.release()
+        erro = futuro.exception()
+        magnets, links = futuro.result() if erro is None else ([], [])
+        try:
+            callback(magnets, links, erro)
+        except Exception:
+            logging.error("❌ Erro ao processar o resultado do parsing", exc_info=True)
+
+    def fechar(self):
+        self.executor.shutdown(wait=True)
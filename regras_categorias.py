@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+
+# ==============================================================================
+# MOTOR DE REGRAS DE CATEGORIZAÇÃO
+#
+# Compila todas as palavras-chave de descarte e de categorias de um conjunto
+# (carregado de regras_categorias.json) em UMA expressão regular. Cada nome é
+# percorrido uma única vez, não importa quantas regras existam, em vez de um
+# any(p in nome for p in [...]) por categoria.
+# ==============================================================================
+
+ARQUIVO_REGRAS = "regras_categorias.json"
+
+# Usado quando o arquivo de regras não existe (mesmas regras do arquivo distribuído).
+REGRAS_PADRAO = {
+    "conjuntos": {
+        "audio": {
+            "ignorar": {"palavras": ["cam", "hdcam", "ts", "hdts", "telesync", "subbed"]},
+            "categorias": [
+                {"nome": "Dual-Audio", "palavras": ["dual audio", "dual.audio", "dual-audio"]},
+                {"nome": "Dublado", "palavras": ["dublado", "dub", "pt-br", "pt br"]},
+                {"nome": "Legendado", "palavras": ["legendado", "leg"]},
+            ],
+            "padrao": "Outros",
+        },
+        "tipo": {
+            "categorias": [
+                {"nome": "Filmes", "palavras": ["filme", "movie", "1080p", "720p", "bluray", "dvdrip"]},
+                {"nome": "Series", "palavras": ["serie", "season", "s01", "s02", "temporada"]},
+                {"nome": "Jogos", "palavras": ["jogo", "game", "repack", "iso"]},
+                {"nome": "Musicas", "palavras": ["musica", "album", "mp3", "flac"]},
+                {"nome": "Software", "palavras": ["software", "app", "windows", "mac"]},
+            ],
+            "padrao": "Outros",
+        },
+    }
+}
+
+# Um "token" do nome é uma sequência de letras/dígitos; '.', '-', '_' e espaço separam tokens.
+_ANTES_DO_TOKEN = r'(?<![^\W_])'
+_DEPOIS_DO_TOKEN = r'(?![^\W_])'
+
+
+def carregar_regras(arquivo=ARQUIVO_REGRAS):
+    """Lê o arquivo de regras; se ele não existir, usa REGRAS_PADRAO."""
+    if not os.path.exists(arquivo):
+        logging.debug(f"Arquivo {arquivo} não encontrado, usando regras padrão.")
+        return REGRAS_PADRAO
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _padrao_palavras(grupo, primeiras_letras):
+    """Converte a lista de palavras de um grupo em alternativas de regex (mais longas primeiro)."""
+    inteira_no_grupo = grupo.get("palavra_inteira", False)
+    alternativas = []
+    for item in grupo.get("palavras", []):
+        if isinstance(item, dict):
+            palavra, inteira = item["palavra"], item.get("palavra_inteira", inteira_no_grupo)
+        else:
+            palavra, inteira = item, inteira_no_grupo
+        palavra = palavra.lower()
+        if not palavra:
+            continue
+        primeiras_letras.add(palavra[0])
+        padrao = re.escape(palavra)
+        if inteira:
+            padrao = _ANTES_DO_TOKEN + padrao + _DEPOIS_DO_TOKEN
+        alternativas.append((len(palavra), padrao))
+    alternativas.sort(key=lambda a: -a[0])
+    return '|'.join(p for _, p in alternativas)
+
+
+class MotorRegras:
+    """Classifica nomes de magnets em (deve_ignorar, categoria) com uma única regex."""
+
+    def __init__(self, conjunto):
+        self.categorias = [c["nome"] for c in conjunto.get("categorias", [])]
+        self.categoria_padrao = conjunto.get("padrao", "Outros")
+
+        # Um grupo nomeado por regra: g0 = descarte, g1..gN = categorias em ordem de prioridade.
+        # Tudo fica dentro de um lookahead para que palavras sobrepostas (ex.: 'hdts' e 'ts')
+        # sejam vistas em todas as posições do nome.
+        # O prefixo com a classe das primeiras letras deixa o motor de regex pular, em C,
+        # as posições onde nenhuma palavra pode começar.
+        grupos = []
+        primeiras_letras = set()
+        ignorar = conjunto.get("ignorar")
+        if ignorar and ignorar.get("palavras"):
+            grupos.append(f"(?P<g0>{_padrao_palavras(ignorar, primeiras_letras)})")
+        for i, categoria in enumerate(conjunto.get("categorias", []), 1):
+            if categoria.get("palavras"):
+                grupos.append(f"(?P<g{i}>{_padrao_palavras(categoria, primeiras_letras)})")
+        self._regex = None
+        if grupos:
+            classe = ''.join(re.escape(letra) for letra in sorted(primeiras_letras))
+            self._regex = re.compile(f"(?=[{classe}])(?=(?:{'|'.join(grupos)}))")
+
+        self.classificar = lru_cache(maxsize=65536)(self._classificar)
+
+    @classmethod
+    def do_arquivo(cls, nome_conjunto, arquivo=ARQUIVO_REGRAS):
+        regras = carregar_regras(arquivo)
+        conjuntos = regras.get("conjuntos", {})
+        if nome_conjunto not in conjuntos:
+            raise KeyError(f"Conjunto de regras '{nome_conjunto}' não existe em {arquivo}")
+        return cls(conjuntos[nome_conjunto])
+
+    def _classificar(self, nome):
+        """Retorna (deve_ignorar, categoria) percorrendo o nome uma única vez."""
+        ignorar = False
+        melhor = len(self.categorias) + 1
+        if self._regex is not None:
+            for match in self._regex.finditer(nome.lower()):
+                indice = int(match.lastgroup[1:])
+                if indice == 0:
+                    ignorar = True
+                elif indice < melhor:
+                    melhor = indice
+                if ignorar and melhor == 1:
+                    break
+        categoria = self.categorias[melhor - 1] if melhor <= len(self.categorias) else self.categoria_padrao
+        return ignorar, categoria
+
+    def deve_ignorar(self, nome):
+        return self.classificar(nome)[0]
+
+    def categorizar(self, nome):
+        return self.classificar(nome)[1]
+
+    def todas_categorias(self):
+        """Categorias na ordem de prioridade, seguidas da categoria padrão."""
+        return self.categorias + [self.categoria_padrao]
@@ -0,0 +1,209 @@
+import csv
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+# ==============================================================================
+# RELATÓRIOS INCREMENTAIS
+#
+# Os arquivos de saída são escritos à medida que os links são encontrados, em
+# vez de juntar tudo em memória e reescrever os arquivos no final da execução.
+# ==============================================================================
+
+
+class RelatorioCategorias:
+    """Mantém os arquivos links-<categoria>.txt atualizados durante a varredura.
+
+    Cada arquivo é aberto (e truncado) quando sua categoria recebe o primeiro link
+    da execução; o cabeçalho é escrito com um contador de largura fixa que só é
+    preenchido em fechar(), então o custo no fim da execução é constante.
+    """
+
+    LARGURA_CONTADOR = 12
+
+    def __init__(self, regras, pasta=""):
+        self.regras = regras
+        self.pasta = pasta
+        self.lock = threading.Lock()
+        self.contagem = {}
+        self._arquivos = {}
+        self._hashes_vistos = set()
+
+    @staticmethod
+    def nome_arquivo(categoria):
+        return f"links-{categoria.lower().replace(' ', '-')}.txt"
+
+    def _linhas_contador(self, total):
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        total = str(total) if total is not None else "?"
+        return f"# Total de links: {total:<{self.LARGURA_CONTADOR}}\n# Gerado em: {timestamp}\n".encode('utf-8')
+
+    def _abrir(self, categoria):
+        caminho = os.path.join(self.pasta, self.nome_arquivo(categoria))
+        arquivo = open(caminho, 'wb')
+        arquivo.write(f"# Categoria: {categoria}\n".encode('utf-8'))
+        posicao_contador = arquivo.tell()
+        arquivo.write(self._linhas_contador(None))
+        arquivo.write(b"\n")
+        self._arquivos[categoria] = (arquivo, posicao_contador, caminho)
+        self.contagem[categoria] = 0
+        return arquivo
+
+    def adicionar(self, info):
+        """Registra um magnet já analisado (MagnetInfo). Retorna a categoria, ou None se repetido."""
+        with self.lock:
+            if info.infohash in self._hashes_vistos:
+                return None
+            self._hashes_vistos.add(info.infohash)
+        # Cada infohash é categorizado uma única vez, mesmo que apareça em vários sites
+        categoria = self.regras.categorizar(info.nome or "Sem nome")
+        with self.lock:
+            arquivo = self._arquivos[categoria][0] if categoria in self._arquivos else self._abrir(categoria)
+            arquivo.write(info.uri.encode('utf-8') + b"\n")
+            self.contagem[categoria] += 1
+        return categoria
+
+    def fechar(self):
+        """Preenche os contadores dos cabeçalhos e fecha os arquivos. Retorna {categoria: (arquivo, total)}."""
+        resumo = {}
+        with self.lock:
+            for categoria, (arquivo, posicao_contador, caminho) in self._arquivos.items():
+                arquivo.seek(posicao_contador)
+                arquivo.write(self._linhas_contador(self.contagem[categoria]))
+                arquivo.close()
+                resumo[categoria] = (caminho, self.contagem[categoria])
+                logging.info(f"✅ Categoria [{categoria}] salva em '{caminho}' com {self.contagem[categoria]} links.")
+            self._arquivos = {}
+        return resumo
+
+
+class EscritorCSVMagnets:
+    """CSV de detalhes dos magnets, escrito linha a linha durante a varredura.
+
+    Recebe registros já analisados (MagnetInfo), então nenhuma regex é executada de
+    novo; o módulo csv cuida do escape de aspas e vírgulas nos nomes. Com
+    comprimir=True (ou caminho terminado em .gz) o arquivo é gravado em gzip.
+    """
+
+    # Colunas disponíveis: título no cabeçalho -> valor a partir do MagnetInfo
+    COLUNAS = {
+        'hash': ('Hash', lambda info: info.hash_hex),
+        'nome': ('Nome', lambda info: info.nome or "Sem nome"),
+        'tamanho': ('Tamanho', lambda info: info.tamanho if info.tamanho is not None else "N/A"),
+        'trackers': ('Trackers', lambda info: len(info.trackers)),
+        'link': ('Link', lambda info: info.uri),
+    }
+
+    def __init__(self, caminho, colunas=('hash', 'nome', 'tamanho', 'link'), comprimir=False):
+        if comprimir and not caminho.endswith('.gz'):
+            caminho += '.gz'
+        self.caminho = caminho
+        self.lock = threading.Lock()
+        self.total = 0
+        self._hashes_vistos = set()
+        self._valores = [self.COLUNAS[coluna][1] for coluna in colunas]
+
+        if caminho.endswith('.gz'):
+            self.arquivo = gzip.open(caminho, 'wt', encoding='utf-8', newline='')
+        else:
+            self.arquivo = open(caminho, 'w', encoding='utf-8', newline='')
+        self.escritor = csv.writer(self.arquivo, quoting=csv.QUOTE_ALL)
+        self.escritor.writerow([self.COLUNAS[coluna][0] for coluna in colunas])
+
+    def adicionar(self, info):
+        """Escreve a linha do magnet, a menos que o mesmo infohash já tenha sido escrito."""
+        with self.lock:
+            if info.infohash in self._hashes_vistos:
+                return False
+            self._hashes_vistos.add(info.infohash)
+            self.escritor.writerow([valor(info) for valor in self._valores])
+            self.total += 1
+        return True
+
+    def fechar(self):
+        with self.lock:
+            self.arquivo.close()
+        return self.total
+
+
+class LogEventos:
+    """Registro da varredura em JSON lines: um evento por linha, gravado na hora.
+
+    Eventos usados pelos crawlers: 'inicio', 'pagina' (url visitada), 'magnet'
+    (primeira vez que o magnet aparece na varredura), 'erro' e 'fim'. Se o processo
+    morrer no meio, tudo o que já foi registrado continua no arquivo.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.lock = threading.Lock()
+        # buffering=1: o arquivo é esvaziado a cada linha
+        self.arquivo = open(caminho, 'w', encoding='utf-8', buffering=1)
+
+    def registrar(self, evento, **dados):
+        linha = json.dumps({'evento': evento, 't': round(time.time(), 3), **dados}, ensure_ascii=False)
+        with self.lock:
+            self.arquivo.write(linha + '\n')
+
+    def fechar(self):
+        with self.lock:
+            self.arquivo.close()
+
+
+def iterar_eventos(caminho, evento=None):
+    """Lê o log de eventos em streaming, opcionalmente só os de um tipo."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            try:
+                dados = json.loads(linha)
+            except ValueError:
+                continue  # última linha incompleta de uma execução interrompida
+            if evento is None or dados.get('evento') == evento:
+                yield dados
+
+
+def contar_eventos(caminho):
+    return Counter(dados.get('evento') for dados in iterar_eventos(caminho))
+
+
+def escrever_relatorio_json(caminho_saida, caminho_eventos, campos, listas=()):
+    """Gera o relatório .json a partir do log de eventos sem carregá-lo em memória.
+
+    campos -- dict com os valores pequenos, escritos primeiro (como no json.dump antigo)
+    listas -- [(chave, evento, campo), ...]: cada lista é escrita com uma passada pelo log,
+              com o valor `campo` de cada evento do tipo `evento`
+    """
+    with open(caminho_saida, 'w', encoding='utf-8') as f:
+        f.write('{')
+        separador = '\n'
+        for chave, valor in campos.items():
+            texto = json.dumps(valor, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+            f.write(f'{separador}  {json.dumps(chave)}: {texto}')
+            separador = ',\n'
+        for chave, evento, campo in listas:
+            f.write(f'{separador}  {json.dumps(chave)}: [')
+            separador_item = '\n'
+            for dados in iterar_eventos(caminho_eventos, evento):
+                f.write(f'{separador_item}    {json.dumps(dados.get(campo), ensure_ascii=False)}')
+                separador_item = ',\n'
+            f.write('\n  ]' if separador_item != '\n' else ']')
+            separador = ',\n'
+        f.write('\n}\n')
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 2:
+        print("Uso: python relatorios.py <eventos.jsonl>")
+        sys.exit(1)
+    contagem = contar_eventos(sys.argv[1])
+    print(f"📋 {sys.argv[1]}")
+    print(f"📄 Páginas visitadas: {contagem['pagina']}")
+    print(f"🔗 Links magnéticos: {contagem['magnet']}")
+    print(f"❌ Erros: {contagem['erro']}")
+    print("✅ Execução concluída" if contagem['fim'] else "⚠️  Execução interrompida antes do fim")
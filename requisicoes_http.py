@@ -0,0 +1,431 @@
+import ipaddress
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as TempoEsgotado, wait
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import dns.resolver as resolvedor_dns  # dnspython (opcional): informa o TTL de cada registro
+except ImportError:
+    resolvedor_dns = None
+
+# ==============================================================================
+# CAMADA DE REQUISIÇÕES HTTP
+#
+# baixar_com_prazo() faz o GET com timeouts separados de conexão (curto: um
+# site fora do ar é detectado em segundos) e de leitura, e um prazo total para
+# a resposta inteira: o corpo é lido aos poucos e a requisição é abandonada
+# quando o prazo acaba, então um servidor que manda um byte de cada vez não
+# prende o worker indefinidamente.
+#
+# Disjuntor (circuit breaker) por host: depois de N falhas de conexão seguidas
+# ele "abre" e nenhuma requisição sai para o host por um tempo; depois deixa
+# passar uma única requisição de teste (meio-aberto). Se ela conectar, o host
+# volta ao normal; se falhar, a pausa dobra. Depois de max_sondagens testes
+# falhos o host é dado como fora do ar.
+#
+# Requisições de reserva (hedging): quando uma página passa do percentil 95 da
+# latência do host, uma segunda requisição igual é enviada e vale a que terminar
+# primeiro. Só uma fração pequena das requisições pode ganhar reserva, e só se o
+# controle de taxa do host tiver vaga, para não sobrecarregar o site.
+#
+# Vigia: thread que avisa no log quando um worker passa muito tempo na mesma URL.
+#
+# Cache de DNS: cada conexão nova da sessão resolveria o nome do site de novo
+# pelo resolvedor do sistema. AdaptadorCacheDNS guarda os endereços pelo TTL do
+# registro (com o dnspython instalado; sem ele, por ttl_padrao segundos), e
+# preaquecer_conexoes() abre as conexões (TCP + TLS) do site em paralelo antes
+# da primeira leva de páginas.
+# ==============================================================================
+
+TAMANHO_BLOCO = 64 * 1024
+
+FECHADO, ABERTO, MEIO_ABERTO = 'fechado', 'aberto', 'meio-aberto'
+
+
+class PrazoEsgotado(requests.exceptions.Timeout):
+    """A resposta não terminou dentro do prazo total da requisição."""
+
+
+class CircuitoAberto(requests.exceptions.ConnectionError):
+    """O disjuntor do host está aberto. espera: segundos até o próximo teste (None = host desistido)."""
+
+    def __init__(self, host, espera):
+        self.espera = espera
+        motivo = f"nova tentativa em {espera:g}s" if espera is not None else "host fora do ar"
+        super().__init__(f"disjuntor aberto para {host} ({motivo})")
+
+
+def _ler_corpo(resposta, limite, prazo):
+    """Lê o corpo em blocos (read1 devolve o que já chegou) verificando o prazo a cada bloco."""
+    ler = getattr(resposta.raw, 'read1', None) or resposta.raw.read
+    partes = []
+    try:
+        while True:
+            bloco = ler(TAMANHO_BLOCO, decode_content=True)
+            if not bloco:
+                break
+            partes.append(bloco)
+            if time.monotonic() > limite:
+                raise PrazoEsgotado(f"resposta de {resposta.url} não terminou em {prazo}s", request=resposta.request)
+    # Os mesmos erros que requests traduz em iter_content()
+    except urllib3.exceptions.ReadTimeoutError as e:
+        raise requests.exceptions.ReadTimeout(e, request=resposta.request)
+    except urllib3.exceptions.ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e, request=resposta.request)
+    except urllib3.exceptions.DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e, request=resposta.request)
+    except urllib3.exceptions.SSLError as e:
+        raise requests.exceptions.SSLError(e, request=resposta.request)
+    return b''.join(partes)
+
+
+def baixar_com_prazo(session, url, timeout=(3.05, 15), prazo=None, **kwargs):
+    """GET com timeout (conexão, leitura) e prazo total em segundos para a resposta inteira."""
+    if not prazo:
+        return session.get(url, timeout=timeout, **kwargs)
+    limite = time.monotonic() + prazo
+    resposta = session.get(url, timeout=timeout, stream=True, **kwargs)
+    try:
+        resposta._content = _ler_corpo(resposta, limite, prazo)
+    except BaseException:
+        resposta.close()  # conexão no meio de uma resposta: não volta para o pool
+        raise
+    resposta._content_consumed = True
+    return resposta
+
+
+class Disjuntor:
+    """Circuit breaker de um host, contando só falhas de conexão."""
+
+    def __init__(self, host, limite_falhas=5, espera_aberto=30.0, espera_max=600.0, max_sondagens=3):
+        self.host = host
+        self.limite_falhas = limite_falhas
+        self.espera_inicial = espera_aberto
+        self.espera_max = espera_max
+        self.max_sondagens = max_sondagens
+
+        self.estado = FECHADO
+        self.falhas_seguidas = 0
+        self.sondagens_falhas = 0
+        self.espera = espera_aberto
+        self.reabrir_em = 0.0
+        self.sondando = False
+        self.lock = threading.Lock()
+
+    @property
+    def desistiu(self):
+        return self.sondagens_falhas >= self.max_sondagens
+
+    def permitir(self):
+        """True se a requisição pode sair agora (no meio-aberto, só uma de teste por vez)."""
+        with self.lock:
+            if self.estado == FECHADO:
+                return True
+            if self.desistiu:
+                return False
+            if self.estado == ABERTO and time.monotonic() >= self.reabrir_em:
+                self.estado = MEIO_ABERTO
+                self.sondando = False
+            if self.estado == MEIO_ABERTO and not self.sondando:
+                self.sondando = True
+                logging.info(f"🔌 Disjuntor de {self.host} meio-aberto: enviando uma requisição de teste.")
+                return True
+            return False
+
+    def tempo_restante(self):
+        """Segundos até o próximo teste, ou None se o host foi dado como fora do ar."""
+        with self.lock:
+            if self.desistiu:
+                return None
+            # Com um teste em andamento, as outras URLs esperam o resultado dele
+            return max(self.reabrir_em - time.monotonic(), 1.0)
+
+    def registrar(self, falha_conexao):
+        """Resultado de uma requisição liberada por permitir()."""
+        with self.lock:
+            if not falha_conexao:
+                if self.estado != FECHADO:
+                    logging.info(f"🔌 Disjuntor de {self.host} fechado: o host voltou a responder.")
+                self.estado = FECHADO
+                self.falhas_seguidas = 0
+                self.sondagens_falhas = 0
+                self.espera = self.espera_inicial
+                return
+            self.falhas_seguidas += 1
+            if self.estado == MEIO_ABERTO:
+                self.sondagens_falhas += 1
+                self.espera = min(self.espera * 2, self.espera_max)
+                self._abrir()
+            elif self.estado == FECHADO and self.falhas_seguidas >= self.limite_falhas:
+                self._abrir()
+
+    def _abrir(self):
+        self.estado = ABERTO
+        self.sondando = False
+        self.reabrir_em = time.monotonic() + self.espera
+        if self.desistiu:
+            logging.error(f"🔌 {self.host} continua sem conexão após {self.sondagens_falhas} testes: "
+                          f"desistindo do host nesta execução.")
+        else:
+            logging.warning(f"🔌 Disjuntor de {self.host} aberto após {self.falhas_seguidas} falhas de conexão "
+                            f"seguidas: pausando por {self.espera:g}s.")
+
+
+class RequisicoesDeReserva:
+    """Hedging por host: repete a requisição que passou do percentil da latência e usa a primeira resposta."""
+
+    def __init__(self, max_threads, percentil=0.95, amostras_min=20, proporcao_max=0.05, janela=200):
+        self.percentil = percentil
+        self.amostras_min = amostras_min
+        self.proporcao_max = proporcao_max
+        self.latencias = deque(maxlen=janela)
+        self.total = 0
+        self.reservas = 0
+        self.vitorias_reserva = 0
+        self.lock = threading.Lock()
+        # Principal e reserva de cada worker rodam aqui, enquanto o worker espera a primeira
+        self.executor = ThreadPoolExecutor(max_workers=max_threads * 2, thread_name_prefix='Requisicao')
+
+    def limite(self):
+        """Latência a partir da qual a reserva é enviada (None enquanto há poucas amostras)."""
+        with self.lock:
+            if len(self.latencias) < self.amostras_min:
+                return None
+            ordenadas = sorted(self.latencias)
+        return ordenadas[int(self.percentil * (len(ordenadas) - 1))]
+
+    def _submeter(self, funcao):
+        inicio = time.monotonic()
+        futuro = self.executor.submit(funcao)
+
+        def registrar(f):
+            if f.exception() is None:
+                with self.lock:
+                    self.latencias.append(time.monotonic() - inicio)
+        futuro.add_done_callback(registrar)
+        return futuro
+
+    def executar(self, principal, preparar_reserva):
+        """Roda principal(); se passar do limite, preparar_reserva() devolve a função da reserva
+        (ou None, se o orçamento ou o controle de taxa do host não permitem agora)."""
+        with self.lock:
+            self.total += 1
+        futuros = [self._submeter(principal)]
+        limite = self.limite()
+        if limite is not None:
+            try:
+                return futuros[0].result(timeout=limite)
+            except TempoEsgotado:
+                pass
+            reserva = preparar_reserva() if self._dentro_do_orcamento() else None
+            if reserva is not None:
+                with self.lock:
+                    self.reservas += 1
+                futuros.append(self._submeter(reserva))
+
+        pendentes = futuros
+        while True:
+            feitos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            vencedor = next(iter(feitos))
+            # Se a primeira a terminar falhou e a outra ainda está no ar, espera a outra
+            if vencedor.exception() is None or not pendentes:
+                break
+        for futuro in futuros:
+            if futuro is not vencedor:
+                futuro.add_done_callback(_fechar_resposta)
+        if vencedor is not futuros[0]:
+            with self.lock:
+                self.vitorias_reserva += 1
+        return vencedor.result()
+
+    def _dentro_do_orcamento(self):
+        with self.lock:
+            return self.reservas < self.proporcao_max * self.total
+
+    def resumo(self):
+        with self.lock:
+            return f"{self.reservas} requisições de reserva ({self.vitorias_reserva} chegaram antes) em {self.total}"
+
+    def fechar(self):
+        self.executor.shutdown(wait=False)
+
+
+def _fechar_resposta(futuro):
+    """Descarta a resposta da requisição que perdeu a corrida."""
+    if futuro.exception() is None:
+        futuro.result().close()
+
+
+class Vigia:
+    """Thread que avisa quando um worker passa de `limite` segundos na mesma URL."""
+
+    def __init__(self, limite=120, intervalo=None):
+        self.limite = limite
+        self.intervalo = intervalo or max(limite / 4, 1)
+        self.em_andamento = {}  # nome da thread -> (url, início)
+        self.avisados = set()
+        self.lock = threading.Lock()
+        self.parada = threading.Event()
+        self.thread = threading.Thread(target=self._vigiar, name='Vigia', daemon=True)
+
+    def iniciar(self):
+        self.thread.start()
+        return self
+
+    def comecou(self, url):
+        with self.lock:
+            self.em_andamento[threading.current_thread().name] = (url, time.monotonic())
+
+    def terminou(self):
+        with self.lock:
+            self.em_andamento.pop(threading.current_thread().name, None)
+
+    def travados(self):
+        """[(thread, url, segundos), ...] dos workers parados há mais que o limite."""
+        agora = time.monotonic()
+        with self.lock:
+            return [(nome, url, agora - inicio) for nome, (url, inicio) in self.em_andamento.items()
+                    if agora - inicio > self.limite]
+
+    def _vigiar(self):
+        while not self.parada.wait(self.intervalo):
+            for nome, url, segundos in self.travados():
+                if (nome, url) not in self.avisados:
+                    self.avisados.add((nome, url))
+                    logging.warning(f"🐢 {nome} está há {segundos:.0f}s na mesma página: {url}")
+
+    def parar(self):
+        self.parada.set()
+
+
+# --- CACHE DE DNS E CONEXÕES PRÉ-AQUECIDAS ---
+
+class CacheDNS:
+    """Endereços de cada (host, porta), guardados enquanto o TTL do registro valer."""
+
+    def __init__(self, ttl_padrao=300):
+        self.ttl_padrao = ttl_padrao
+        self._enderecos = {}  # (host, porta) -> (válido até, [endereços])
+        self.consultas = 0
+        self.acertos = 0
+        self.lock = threading.Lock()
+
+    def resolver(self, host, porta):
+        """Lista de endereços IP do host (do cache, se ainda válido)."""
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+        agora = time.monotonic()
+        with self.lock:
+            self.consultas += 1
+            entrada = self._enderecos.get((host, porta))
+            if entrada and entrada[0] > agora:
+                self.acertos += 1
+                return entrada[1]
+        enderecos, ttl = self._consultar(host, porta)
+        with self.lock:
+            self._enderecos[(host, porta)] = (agora + ttl, enderecos)
+        return enderecos
+
+    def _consultar(self, host, porta):
+        if resolvedor_dns is not None:
+            try:
+                resposta = resolvedor_dns.resolve(host, 'A')
+                return [registro.address for registro in resposta], resposta.rrset.ttl
+            except Exception:
+                pass  # ex.: nomes do arquivo hosts; o resolvedor do sistema resolve
+        infos = socket.getaddrinfo(host, porta, 0, socket.SOCK_STREAM)
+        return list(dict.fromkeys(info[4][0] for info in infos)), self.ttl_padrao
+
+
+def _nova_conexao(conexao, cache, criar):
+    """Abre o socket tentando cada endereço do cache; o nome original segue no Host e no TLS (SNI)."""
+    host = conexao._dns_host
+    try:
+        enderecos = cache.resolver(host, conexao.port)
+    except socket.gaierror as e:
+        raise urllib3.exceptions.NameResolutionError(conexao.host, conexao, e) from e
+    erro = None
+    for endereco in enderecos:
+        conexao._dns_host = endereco
+        try:
+            return criar()
+        except (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError) as e:
+            erro = e
+        finally:
+            conexao._dns_host = host
+    raise erro
+
+
+def _classes_de_pool(cache):
+    class ConexaoHTTP(HTTPConnection):
+        def _new_conn(self):
+            return _nova_conexao(self, cache, super()._new_conn)
+
+    class ConexaoHTTPS(HTTPSConnection):
+        def _new_conn(self):
+            return _nova_conexao(self, cache, super()._new_conn)
+
+    class PoolHTTP(HTTPConnectionPool):
+        ConnectionCls = ConexaoHTTP
+
+    class PoolHTTPS(HTTPSConnectionPool):
+        ConnectionCls = ConexaoHTTPS
+
+    return {'http': PoolHTTP, 'https': PoolHTTPS}
+
+
+class AdaptadorCacheDNS(HTTPAdapter):
+    """HTTPAdapter do requests cujas conexões resolvem o nome pelo CacheDNS."""
+
+    def __init__(self, cache=None, **kwargs):
+        self.cache = cache or CacheDNS()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _classes_de_pool(self.cache)
+
+
+def preaquecer_conexoes(session, url, conexoes, timeout=3.05):
+    """Resolve o host e deixa `conexoes` conexões abertas no pool da sessão. Retorna quantas abriram."""
+    adaptador = session.get_adapter(url)
+    # O mesmo pool que o requests vai usar (no HTTPS a chave do pool inclui o contexto TLS)
+    if hasattr(adaptador, 'get_connection_with_tls_context'):
+        pool = adaptador.get_connection_with_tls_context(requests.Request('GET', url).prepare(), session.verify)
+    else:
+        pool = adaptador.get_connection(url)
+    conexoes = min(conexoes, pool.pool.maxsize)
+    if isinstance(adaptador, AdaptadorCacheDNS):
+        adaptador.cache.resolver(pool.host, pool.port)  # uma consulta só, antes das conexões em paralelo
+
+    # Tira as N conexões do pool de uma vez, para que sejam N diferentes
+    reservadas = [pool._get_conn() for _ in range(conexoes)]
+
+    def abrir(conexao):
+        if conexao.sock is None:
+            conexao.timeout = timeout
+            conexao.connect()
+
+    abertas = 0
+    with ThreadPoolExecutor(max_workers=conexoes, thread_name_prefix='Preaquecer') as executor:
+        for conexao, futuro in [(c, executor.submit(abrir, c)) for c in reservadas]:
+            try:
+                futuro.result()
+                abertas += 1
+            except Exception as e:
+                logging.debug(f"Falha ao pré-abrir conexão com {pool.host}: {e}")
+                conexao.close()
+            pool._put_conn(conexao)
+    return abertas
@@ -0,0 +1,57 @@
+import random
+import threading
+
+import requests
+
+from controle_taxa import ler_retry_after
+
+# ==============================================================================
+# NOVAS TENTATIVAS PARA PÁGINAS QUE FALHARAM
+#
+# Um timeout, erro de conexão ou resposta 408/429/5xx não descarta mais a URL:
+# ela volta para a fila com uma espera exponencial com jitter (ou o Retry-After
+# do servidor, se for maior), sem prender o worker, que segue com outras URLs.
+# Depois de max_tentativas a falha é definitiva: a URL vai para a tabela falhas
+# do resultados.db e é tentada de novo só na próxima execução.
+# Erros que não passam sozinhos (404, 403, ...) não são repetidos.
+# ==============================================================================
+
+STATUS_TEMPORARIOS = (408, 425, 429, 500, 502, 503, 504)
+
+
+def falha_temporaria(erro):
+    """True para timeouts, erros de conexão e respostas HTTP que costumam passar sozinhas."""
+    if isinstance(erro, requests.exceptions.HTTPError):
+        return erro.response is not None and erro.response.status_code in STATUS_TEMPORARIOS
+    return isinstance(erro, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                             requests.exceptions.ChunkedEncodingError))
+
+
+class PoliticaRetentativas:
+    """Conta as tentativas de cada URL e decide quanto esperar antes da próxima."""
+
+    def __init__(self, max_tentativas=4, espera_base=2.0, espera_max=120.0):
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.tentativas = {}
+        self.lock = threading.Lock()
+
+    def espera(self, tentativa, erro=None):
+        """Espera antes da tentativa seguinte à número `tentativa` (1 = a primeira falhou)."""
+        espera = min(self.espera_base * 2 ** (tentativa - 1), self.espera_max) * random.uniform(0.5, 1.5)
+        resposta = getattr(erro, 'response', None)
+        if resposta is not None:
+            pedida = ler_retry_after(resposta.headers.get('Retry-After'))
+            if pedida is not None:
+                espera = max(espera, min(pedida, self.espera_max))
+        return espera
+
+    def registrar_falha(self, url, erro):
+        """Registra a falha. Retorna (espera, tentativas): espera é None se não vale tentar de novo."""
+        with self.lock:
+            tentativas = self.tentativas.get(url, 0) + 1
+            self.tentativas[url] = tentativas
+        if not falha_temporaria(erro) or tentativas >= self.max_tentativas:
+            return None, tentativas
+        return self.espera(tentativas, erro), tentativas
@@ -0,0 +1,110 @@
+import hashlib
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# ==============================================================================
+# PÁGINAS QUASE DUPLICADAS (SimHash)
+#
+# Sites de torrent servem a mesma listagem em várias URLs (ordenações,
+# espelhos, versão para impressão). Cada página recebe uma assinatura SimHash
+# de 64 bits calculada sobre o conjunto dos seus magnets (infohash) e dos seus
+# links (sem os parâmetros que só mudam a apresentação, como ?sort=). Páginas
+# com conteúdo quase igual têm assinaturas a poucos bits de distância.
+#
+# O índice divide a assinatura em limiar+1 faixas: duas assinaturas a até
+# `limiar` bits de distância têm pelo menos uma faixa idêntica, então cada
+# consulta só compara com as poucas páginas que caem na mesma faixa.
+# ==============================================================================
+
+BITS = 64
+
+# Parâmetros de URL que mudam só a apresentação da página, não o conteúdo
+PARAMETROS_IGNORADOS = frozenset({
+    'sort', 'sortby', 'sort_by', 'order', 'orderby', 'order_by', 'dir', 'direction', 'ordem', 'ordenar',
+    'view', 'layout', 'print', 'imprimir', 'mode', 'modo', 'lang', 'utm_source', 'utm_medium', 'utm_campaign',
+})
+
+# Páginas com poucas características (ex.: quase sem links) geram falsos positivos
+MINIMO_CARACTERISTICAS = 5
+
+
+def normalizar_link(url, ignorados=PARAMETROS_IGNORADOS):
+    partes = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True) if k.lower() not in ignorados)
+    return urlunsplit((partes.scheme, partes.netloc, partes.path, urlencode(query), ''))
+
+
+def caracteristicas_pagina(magnets, links, ignorados=PARAMETROS_IGNORADOS):
+    """Conjunto que descreve o conteúdo da página: infohashes dos magnets e links normalizados."""
+    caracteristicas = {'m:' + info.infohash.hex() for info in magnets}
+    caracteristicas.update('l:' + normalizar_link(link, ignorados) for link in links)
+    return caracteristicas
+
+
+def simhash(caracteristicas, bits=BITS):
+    """Assinatura SimHash (inteiro de `bits` bits) de um conjunto de strings."""
+    pesos = [0] * bits
+    for caracteristica in caracteristicas:
+        valor = int.from_bytes(hashlib.blake2b(caracteristica.encode('utf-8'), digest_size=bits // 8).digest(), 'big')
+        for i in range(bits):
+            pesos[i] += 1 if valor >> i & 1 else -1
+    assinatura = 0
+    for i, peso in enumerate(pesos):
+        if peso > 0:
+            assinatura |= 1 << i
+    return assinatura
+
+
+def distancia(a, b):
+    """Número de bits diferentes entre duas assinaturas."""
+    return bin(a ^ b).count('1')
+
+
+class IndiceSimHash:
+    """Assinaturas já vistas, com busca das que estão a até `limiar` bits de distância."""
+
+    def __init__(self, limiar=3, bits=BITS):
+        self.limiar = limiar
+        self.bits = bits
+        faixas = limiar + 1
+        self._larguras = [bits // faixas + (1 if i < bits % faixas else 0) for i in range(faixas)]
+        self._faixas = [{} for _ in range(faixas)]
+        self.lock = threading.Lock()
+
+    def _chaves(self, assinatura):
+        deslocamento = 0
+        for largura in self._larguras:
+            yield (assinatura >> deslocamento) & ((1 << largura) - 1)
+            deslocamento += largura
+
+    def verificar_e_adicionar(self, assinatura):
+        """True se já havia uma assinatura quase igual; senão guarda esta e retorna False."""
+        chaves = list(self._chaves(assinatura))
+        with self.lock:
+            for faixa, chave in zip(self._faixas, chaves):
+                for outra in faixa.get(chave, ()):
+                    if distancia(assinatura, outra) <= self.limiar:
+                        return True
+            for faixa, chave in zip(self._faixas, chaves):
+                faixa.setdefault(chave, []).append(assinatura)
+        return False
+
+
+class DetectorQuaseDuplicadas:
+    """Marca as páginas de um site cujo conteúdo é quase igual ao de uma página já vista."""
+
+    def __init__(self, limiar=3, parametros_ignorados=None):
+        self.indice = IndiceSimHash(limiar)
+        self.ignorados = frozenset(p.lower() for p in parametros_ignorados) if parametros_ignorados else PARAMETROS_IGNORADOS
+        self.paginas = 0
+        self.duplicadas = 0
+        self.lock = threading.Lock()
+
+    def eh_quase_duplicada(self, magnets, links):
+        caracteristicas = caracteristicas_pagina(magnets, links, self.ignorados)
+        duplicada = (len(caracteristicas) >= MINIMO_CARACTERISTICAS
+                     and self.indice.verificar_e_adicionar(simhash(caracteristicas)))
+        with self.lock:
+            self.paginas += 1
+            self.duplicadas += duplicada
+        return duplicada